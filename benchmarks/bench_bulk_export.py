@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""
+Benchmark the export of the results of all the wells and weather stations
+of a project, one result after the other in a single process and with the
+bulk export in a pool of processes.
+
+Usage, from the root of the repository:
+    python -m benchmarks.bench_bulk_export [ndatasets] [nsamples] [workers]
+"""
+
+# ---- Standard library imports
+import contextlib
+from datetime import datetime
+import io
+import os.path as osp
+import sys
+import tempfile
+from time import perf_counter
+
+# ---- Third party imports
+import numpy as np
+import pandas as pd
+
+# ---- Local imports
+from gwhat.common.utils import save_columns_to_csv
+from gwhat.meteo.weather_reader import WXDataFrame
+from gwhat.projet.bulk_export import (
+    RESULTS, bulk_export_results, export_result, get_export_tasks)
+from gwhat.projet.reader_projet import ProjetReader
+from gwhat.projet.reader_waterlvl import WLDataFrame
+
+WXFILENAME = osp.join(osp.dirname(__file__), osp.pardir, 'gwhat', 'projet',
+                      'tests', 'data', 'sample_weather_datafile.csv')
+
+
+def create_project(filename, ndatasets, nsamples):
+    """
+    Create a project with water level datasets with MRC and BRF results
+    and with 30 years daily weather datasets.
+    """
+    wlfilename = osp.join(osp.dirname(filename), 'wldata.csv')
+    save_columns_to_csv(
+        wlfilename, [['Well Name', 'bench'], [], ['Date', 'WL', 'BP', 'ET']],
+        [41334 + np.arange(nsamples) / 96, np.random.rand(nsamples),
+         np.random.rand(nsamples), np.random.rand(nsamples)])
+    wldf = WLDataFrame(wlfilename)
+
+    wxdset = WXDataFrame(WXFILENAME)
+    index = pd.date_range('1980-01-01', periods=30 * 365, freq='D')
+    wxdset.data = pd.DataFrame(
+        np.round(np.random.rand(len(index), len(wxdset.data.columns)), 1),
+        index=index, columns=wxdset.data.columns)
+
+    project = ProjetReader(filename)
+    for i in range(ndatasets):
+        wldset = project.add_wldset('well{:03d}'.format(i), wldf)
+        wldset.set_mrc(0.1, 0.2, [0, 10], np.arange(nsamples),
+                       np.random.rand(nsamples))
+        wldset.save_brf(
+            pd.DataFrame({'Lag': np.arange(50),
+                          'SumA': np.random.rand(50),
+                          'sdA': np.random.rand(50)}),
+            datetime(2000, 1, 1), datetime(2000, 2, 1))
+        project.add_wxdset('station{:03d}'.format(i), wxdset)
+    project.close()
+
+
+def main(ndatasets=20, nsamples=50000, workers=4):
+    print('Project with {} wells of {:,} samples and {} weather '
+          'stations.'.format(ndatasets, nsamples, ndatasets))
+    with tempfile.TemporaryDirectory() as tempdir:
+        filename = osp.join(tempdir, 'bench.gwt')
+        with contextlib.redirect_stdout(io.StringIO()):
+            create_project(filename, ndatasets, nsamples)
+
+        # Export the results one after the other in this process.
+        t0 = perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            project = ProjetReader(filename, readonly=True)
+            tasks = get_export_tasks(filename, RESULTS)
+            for task in tasks:
+                export_result(
+                    task, osp.join(tempdir, 'serial'), ['csv'], project)
+            project.close()
+        t1 = perf_counter()
+        print('  one after the other: {} results in {:0.2f} sec'.format(
+            len(tasks), t1 - t0))
+
+        t0 = perf_counter()
+        reports = bulk_export_results(
+            filename, osp.join(tempdir, 'parallel'), formats=['csv'],
+            max_workers=workers)
+        t1 = perf_counter()
+        print('  bulk export with {} workers: {} results in {:0.2f} '
+              'sec'.format(workers, len(reports), t1 - t0))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""
+Benchmark the rendering of the hydrographs of all the wells of a project,
+one after the other in a single process and with the bulk rendering in a
+pool of processes.
+
+Usage, from the root of the repository:
+    python -m benchmarks.bench_bulk_render [nwells] [workers]
+"""
+
+# ---- Standard library imports
+import contextlib
+import io
+import os.path as osp
+import sys
+import tempfile
+from time import perf_counter
+
+# ---- Local imports
+from gwhat.meteo.weather_reader import WXDataFrame
+from gwhat.projet.bulk_render import (
+    bulk_render_hydrographs, render_well_hydrograph)
+from gwhat.projet.reader_projet import ProjetReader
+from gwhat.projet.reader_waterlvl import WLDataFrame
+
+DATADIR = osp.join(osp.dirname(__file__), osp.pardir, 'gwhat', 'projet',
+                   'tests', 'data')
+WXFILENAME = osp.join(DATADIR, 'sample_weather_datafile.csv')
+WLFILENAME = osp.join(DATADIR, 'sample_water_level_datafile.csv')
+
+
+def create_project(filename, nwells):
+    """Create a project with water level datasets and a weather dataset."""
+    wldf = WLDataFrame(WLFILENAME)
+    project = ProjetReader(filename)
+    for i in range(nwells):
+        project.add_wldset('well{:03d}'.format(i), wldf)
+    project.add_wxdset('station', WXDataFrame(WXFILENAME))
+    project.close()
+
+
+def main(nwells=20, workers=4):
+    print('Project with {} wells.'.format(nwells))
+    with tempfile.TemporaryDirectory() as tempdir:
+        filename = osp.join(tempdir, 'bench.gwt')
+        with contextlib.redirect_stdout(io.StringIO()):
+            create_project(filename, nwells)
+
+        # Render the hydrographs one after the other in this process.
+        t0 = perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            project = ProjetReader(filename, readonly=True)
+            for name in project.wldsets:
+                render_well_hydrograph(
+                    name, osp.join(tempdir, 'serial'), ['pdf'], project)
+            project.close()
+        t1 = perf_counter()
+        print('  one after the other: {} hydrographs in {:0.2f} sec'.format(
+            nwells, t1 - t0))
+
+        t0 = perf_counter()
+        reports = bulk_render_hydrographs(
+            filename, osp.join(tempdir, 'parallel'), formats=['pdf'],
+            max_workers=workers)
+        t1 = perf_counter()
+        print('  bulk render with {} workers: {} hydrographs in {:0.2f} '
+              'sec'.format(workers, len(reports), t1 - t0))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
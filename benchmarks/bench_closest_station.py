@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""
+Benchmark the selection of the weather station that is the closest to a
+well in a project with many weather datasets, when the coordinates are
+read from the attributes of each weather dataset and when they are read
+from the index of the weather datasets saved in the project.
+
+Usage, from the root of the repository:
+    python -m benchmarks.bench_closest_station [nstations]
+"""
+
+# ---- Standard library imports
+import contextlib
+import io
+import os.path as osp
+import sys
+import tempfile
+from time import perf_counter
+
+# ---- Third party imports
+import h5py
+import numpy as np
+import pandas as pd
+
+# ---- Local imports
+from gwhat.common.utils import calc_dist_from_coord
+from gwhat.projet.reader_projet import ProjetReader, SCHEMA_VERSION
+from gwhat.projet.storage import save_datetimes_to_h5grp
+
+
+def create_project(filename, nstations):
+    """
+    Create a project with weather datasets of stations located randomly
+    across Canada.
+    """
+    rng = np.random.RandomState(0)
+    with h5py.File(filename, mode='w') as h5file:
+        h5file.attrs['schema_version'] = SCHEMA_VERSION
+        h5file.create_group('wldsets')
+        for i in range(nstations):
+            grp = h5file.create_group('wxdsets/station{:05d}'.format(i))
+            grp.attrs['Latitude'] = rng.uniform(42, 60)
+            grp.attrs['Longitude'] = rng.uniform(-140, -55)
+            start = np.datetime64('1950-01-01') + rng.randint(0, 25000)
+            save_datetimes_to_h5grp(
+                grp, 'Time', pd.date_range(start, periods=3650).values)
+
+
+def closest_from_attrs(project, lat, lon):
+    """
+    Return the closest station by reading the coordinates in the attributes
+    of each weather dataset.
+    """
+    names = project.wxdsets
+    lats = [project.db['wxdsets/%s' % name].attrs['Latitude'] for
+            name in names]
+    lons = [project.db['wxdsets/%s' % name].attrs['Longitude'] for
+            name in names]
+    return names[np.argmin(calc_dist_from_coord(lat, lon, lats, lons))]
+
+
+def main(nstations=3000, nqueries=20):
+    print('Project with {:,} weather datasets.'.format(nstations))
+    rng = np.random.RandomState(1)
+    wells = np.column_stack(
+        [rng.uniform(42, 60, nqueries), rng.uniform(-140, -55, nqueries)])
+    with tempfile.TemporaryDirectory() as tempdir:
+        filename = osp.join(tempdir, 'bench.gwt')
+        create_project(filename, nstations)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            project = ProjetReader(filename)
+            t0 = perf_counter()
+            expected = [closest_from_attrs(project, *well) for well in wells]
+            t1 = perf_counter()
+            print_attrs = ('  from the attributes: {:0.4f} sec per '
+                           'query').format((t1 - t0) / nqueries)
+
+            t0 = perf_counter()
+            project.get_wxdsets_index()
+            t1 = perf_counter()
+            project.close()
+
+            project = ProjetReader(filename)
+            t2 = perf_counter()
+            project.get_wxdsets_index()
+            t3 = perf_counter()
+            closest = [project.get_closest_wxdsets(*well)[0] for
+                       well in wells]
+            t4 = perf_counter()
+            filtered = [project.get_closest_wxdsets(
+                *well, k=5, start=np.datetime64('2000-01-01'),
+                end=np.datetime64('2010-01-01')) for well in wells]
+            t5 = perf_counter()
+            project.close()
+        assert closest == expected
+        assert all(len(names) == 5 for names in filtered)
+        print(print_attrs)
+        print('  from the index: built in {:0.3f} sec, loaded in {:0.4f} '
+              'sec, {:0.5f} sec per query, {:0.5f} sec per 5-NN query '
+              'filtered by period'.format(
+                  t1 - t0, t3 - t2, (t4 - t3) / nqueries,
+                  (t5 - t4) / nqueries))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
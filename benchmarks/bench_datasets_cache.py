@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""
+Benchmark toggling between two large water level datasets of a project,
+with and without the cache of the datasets loaded from the project.
+
+Usage, from the root of the repository:
+    python -m benchmarks.bench_datasets_cache [nsamples]
+"""
+
+# ---- Standard library imports
+import contextlib
+import io
+import os.path as osp
+import sys
+import tempfile
+from time import perf_counter
+
+# ---- Third party imports
+import h5py
+import numpy as np
+import pandas as pd
+
+# ---- Local imports
+from gwhat.projet.reader_projet import DATASET_CACHE_SIZE, ProjetReader
+from gwhat.projet.storage import (
+    DEFAULT_STORAGE_POLICY, create_timeseries_dataset,
+    save_datetimes_to_h5grp)
+
+
+def create_wldset(h5file, name, nsamples):
+    """Create a water level dataset with 15 minutes data."""
+    grp = h5file.create_group('wldsets/{}'.format(name))
+    save_datetimes_to_h5grp(
+        grp, 'Time',
+        pd.date_range('2000-01-01', periods=nsamples, freq='15min').values,
+        DEFAULT_STORAGE_POLICY)
+    for key in ['WL', 'BP', 'ET']:
+        create_timeseries_dataset(
+            grp, key, np.random.rand(nsamples), DEFAULT_STORAGE_POLICY)
+    for key in ['Well', 'Well ID', 'Province']:
+        grp.attrs[key] = name
+    grp.create_group('glue')
+
+
+def main(nsamples=1000000, ntoggles=20):
+    print('Toggling {} times between two water level datasets with {:,} '
+          'samples.'.format(ntoggles, nsamples))
+    with tempfile.TemporaryDirectory() as tempdir:
+        filename = osp.join(tempdir, 'bench.gwt')
+        with h5py.File(filename, mode='w') as h5file:
+            for name in ['well1', 'well2']:
+                create_wldset(h5file, name, nsamples)
+
+        for cache_size, label in [(0, 'without cache'),
+                                  (DATASET_CACHE_SIZE, 'with cache')]:
+            project = ProjetReader(filename, cache_size=cache_size)
+            times = []
+            with contextlib.redirect_stdout(io.StringIO()):
+                for i in range(ntoggles):
+                    t0 = perf_counter()
+                    # The xldates are needed to plot the hydrograph.
+                    project.get_wldset(['well1', 'well2'][i % 2]).xldates
+                    times.append(perf_counter() - t0)
+            project.close()
+            print('  {}: first toggles in {:0.3f} sec, next toggles in '
+                  '{:0.4f} sec on average'.format(
+                      label, sum(times[:2]), np.mean(times[2:])))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""
+Benchmark the throughput of the export of columns of data with nan values
+to xls and xlsx files, when the cells are written one by one with the nan
+converted to text, as it was done before, and when the rows are written
+by chunks with the nan saved as empty cells.
+
+Usage, from the root of the repository:
+    python -m benchmarks.bench_excel_export [nrows] [ncols]
+"""
+
+# ---- Standard library imports
+import os.path as osp
+import sys
+import tempfile
+from time import perf_counter
+
+# ---- Third party imports
+import numpy as np
+import xlsxwriter
+import xlwt
+
+# ---- Local imports
+from gwhat.common.utils import save_columns_to_excel
+
+
+def save_cells_to_excel(fname, fcontent):
+    """
+    Save the content in a xls or xlsx file cell by cell or row by row,
+    as it was done before the export by chunks of rows.
+    """
+    if fname.endswith('.xls'):
+        wb = xlwt.Workbook()
+        ws = wb.add_sheet('Data')
+        for i, row in enumerate(fcontent):
+            for j, cell in enumerate(row):
+                ws.write(i, j, cell)
+        wb.save(fname)
+    else:
+        with xlsxwriter.Workbook(fname) as wb:
+            ws = wb.add_worksheet('Data')
+            for i, row in enumerate(fcontent):
+                ws.write_row(i, 0, row)
+
+
+def main(nrows=60000, ncols=20):
+    print('Export of {:,} rows and {} columns with nan values.'.format(
+        nrows, ncols))
+    data = np.round(np.random.rand(nrows, ncols) * 100, 1)
+    data[np.random.rand(nrows, ncols) < 0.1] = np.nan
+    header = [['Value'] * ncols]
+    ncells = nrows * ncols
+    with tempfile.TemporaryDirectory() as tempdir:
+        for ext in ['.xls', '.xlsx']:
+            filename = osp.join(tempdir, 'export' + ext)
+
+            t0 = perf_counter()
+            fcontent = [['nan' if np.isnan(x) else x for x in row] for
+                        row in data]
+            save_cells_to_excel(filename, header + fcontent)
+            t1 = perf_counter()
+            save_columns_to_excel(filename, header, data.T)
+            t2 = perf_counter()
+            print('  {}: cell by cell {:,.0f} cells/sec, by chunks of rows '
+                  '{:,.0f} cells/sec'.format(
+                      ext, ncells / (t1 - t0), ncells / (t2 - t1)))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""
+Benchmark the reading of weather and water level data from Excel files
+by columns against the previous implementation, which read all the cells
+of the files by rows.
+
+Usage, from the root of the repository:
+    python -m benchmarks.bench_excel_readers [nrows_weather] [nrows_wlvl]
+"""
+
+# ---- Standard library imports
+import os.path as osp
+import sys
+import tempfile
+from time import perf_counter
+
+# ---- Third party imports
+import numpy as np
+import pandas as pd
+import xlrd
+import xlsxwriter
+
+# ---- Local imports
+from gwhat.meteo.weather_reader import read_weather_datafile
+from gwhat.projet.reader_waterlvl import (
+    read_water_level_datafile, _read_header_row, WLDataset, HEADER)
+
+
+def write_xlsx(filename, header, columns):
+    """Write the header rows and the data columns in a xlsx file."""
+    workbook = xlsxwriter.Workbook(filename, {'constant_memory': True})
+    worksheet = workbook.add_worksheet()
+    for rowx, row in enumerate(header):
+        worksheet.write_row(rowx, 0, row)
+    for rowx, row in enumerate(zip(*columns), start=len(header)):
+        worksheet.write_row(rowx, 0, row)
+    workbook.close()
+
+
+def create_weather_datafile(filename, nrows):
+    """Create a weather datafile with nrows of daily data."""
+    dates = pd.date_range('1900-01-01', periods=nrows, freq='D')
+    header = [['Station Name', 'BENCH'],
+              ['Station ID', 7024627],
+              ['Location', 'QC'],
+              ['Latitude', 45.35],
+              ['Longitude', -73.15],
+              ['Elevation', 30],
+              [],
+              ['Year', 'Month', 'Day', 'Max Temp (°C)', 'Min Temp (°C)',
+               'Mean Temp (°C)', 'Total Precip (mm)']]
+    columns = [dates.year.values, dates.month.values, dates.day.values] + [
+        np.round(np.random.rand(nrows) * 30, 1) for i in range(4)]
+    write_xlsx(filename, header, columns)
+
+
+def create_water_level_datafile(filename, nrows):
+    """Create a water level datafile with nrows of data."""
+    header = [['Well Name', 'BENCH'],
+              ['Well ID', '3040002'],
+              ['Latitude', 45.74581],
+              ['Longitude', -73.28024],
+              ['Altitude', 19.51],
+              [],
+              ['Date', 'WL(mbgs)', 'BP(m)', 'ET']]
+    columns = [36526 + np.arange(nrows) / 96] + [
+        np.random.rand(nrows) for i in range(3)]
+    write_xlsx(filename, header, columns)
+
+
+def legacy_read_weather_datafile(filename):
+    """Read all the cells of the weather datafile as strings."""
+    data = pd.read_excel(filename, dtype='str', header=None)
+    return data.values.tolist()
+
+
+def legacy_read_water_level_datafile(filename):
+    """Read all the rows of the water level datafile with xlrd."""
+    with xlrd.open_workbook(filename, on_demand=True) as wb:
+        sheet = wb.sheet_by_index(0)
+        reader = [sheet.row_values(rowx, start_colx=0, end_colx=None) for
+                  rowx in range(sheet.nrows)]
+    header = dict(HEADER)
+    for i, row in enumerate(reader):
+        if len(row) and _read_header_row(row, header):
+            break
+    return WLDataset(reader[i+1:], columns=row)
+
+
+def timeit(func, *args):
+    """Return the time taken in seconds to execute func."""
+    t0 = perf_counter()
+    func(*args)
+    return perf_counter() - t0
+
+
+if __name__ == '__main__':
+    nrows_weather = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    nrows_wlvl = int(sys.argv[2]) if len(sys.argv) > 2 else 1000000
+
+    tempdir = tempfile.mkdtemp()
+    weather_filename = osp.join(tempdir, 'weather_datafile.xlsx')
+    wlvl_filename = osp.join(tempdir, 'water_level_datafile.xlsx')
+    print('Creating the Excel files in {}...'.format(tempdir))
+    create_weather_datafile(weather_filename, nrows_weather)
+    create_water_level_datafile(wlvl_filename, nrows_wlvl)
+
+    print('{:<40}{:>12}{:>12}'.format('Reader', 'legacy (s)', 'new (s)'))
+    for label, legacy_func, func, filename in [
+            ('weather ({:,} rows)'.format(nrows_weather),
+             legacy_read_weather_datafile, read_weather_datafile,
+             weather_filename),
+            ('water level ({:,} rows)'.format(nrows_wlvl),
+             legacy_read_water_level_datafile, read_water_level_datafile,
+             wlvl_filename)]:
+        print('{:<40}{:>12.2f}{:>12.2f}'.format(
+            label, timeit(legacy_func, filename), timeit(func, filename)))
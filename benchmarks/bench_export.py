@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""
+Benchmark the export of columns of data with nan values to csv and xlsx
+files, from a list with the content of the whole file in which nan values
+are converted to text cell by cell, and by chunks of rows from the columns.
+
+Usage, from the root of the repository:
+    python -m benchmarks.bench_export [nrows] [ncols]
+"""
+
+# ---- Standard library imports
+import os.path as osp
+import sys
+import tempfile
+from time import perf_counter
+
+# ---- Third party imports
+import numpy as np
+
+# ---- Local imports
+from gwhat.common.utils import save_columns_to_file, save_content_to_file
+
+
+def nan_as_text_tolist_by_cell(arr):
+    """
+    Convert a 2D array to a list, converting the nan values to text cell by
+    cell as it was done before the export by chunks of columns.
+    """
+    return [['nan' if np.isnan(x) else x for x in row] for row in arr]
+
+
+def main(nrows=200000, ncols=5):
+    print('Export of {:,} rows and {} columns with nan values.'.format(
+        nrows, ncols))
+    data = np.round(np.random.rand(nrows, ncols) * 100, 2)
+    data[np.random.rand(nrows, ncols) < 0.1] = np.nan
+    header = [['Time'] + ['Value'] * (ncols - 1)]
+    with tempfile.TemporaryDirectory() as tempdir:
+        for ext in ['.csv', '.xlsx']:
+            filename = osp.join(tempdir, 'export' + ext)
+
+            t0 = perf_counter()
+            save_content_to_file(
+                filename, header + nan_as_text_tolist_by_cell(data))
+            t1 = perf_counter()
+            save_columns_to_file(filename, header, data.T)
+            t2 = perf_counter()
+            print('  {}: from a list in {:0.3f} sec, by chunks of columns '
+                  'in {:0.3f} sec'.format(ext, t1 - t0, t2 - t1))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
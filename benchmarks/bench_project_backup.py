@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""
+Benchmark the backup of a project with many large water level datasets,
+when the whole project file is copied and when only the datasets that were
+modified since the last backup are copied, and the time the backup blocks
+the caller when it is made in a background thread.
+
+Usage, from the root of the repository:
+    python -m benchmarks.bench_project_backup [ndatasets] [nsamples]
+"""
+
+# ---- Standard library imports
+import os.path as osp
+from shutil import copyfile
+import sys
+import tempfile
+from time import perf_counter
+
+# ---- Third party imports
+import h5py
+import numpy as np
+import pandas as pd
+
+# ---- Local imports
+from gwhat.projet.reader_projet import ProjetReader
+from gwhat.projet.storage import (
+    DEFAULT_STORAGE_POLICY, create_timeseries_dataset,
+    save_datetimes_to_h5grp)
+
+
+def create_project(filename, ndatasets, nsamples):
+    """Create a project with water level datasets with 15 minutes data."""
+    times = pd.date_range('2000-01-01', periods=nsamples, freq='15min')
+    with h5py.File(filename, mode='w') as h5file:
+        for i in range(ndatasets):
+            grp = h5file.create_group('wldsets/bench{:02d}'.format(i))
+            save_datetimes_to_h5grp(
+                grp, 'Time', times.values, DEFAULT_STORAGE_POLICY)
+            for key in ['WL', 'BP', 'ET']:
+                create_timeseries_dataset(
+                    grp, key, np.round(np.random.rand(nsamples), 3),
+                    DEFAULT_STORAGE_POLICY)
+            for key in ['Well', 'Well ID', 'Province']:
+                grp.attrs[key] = 'bench'
+    return ProjetReader(filename)
+
+
+def main(ndatasets=20, nsamples=500000):
+    print('Project with {} water level datasets of {:,} samples.'.format(
+        ndatasets, nsamples))
+    with tempfile.TemporaryDirectory() as tempdir:
+        filename = osp.join(tempdir, 'bench.gwt')
+        project = create_project(filename, ndatasets, nsamples)
+        print('  project size: {:0.1f} MB'.format(
+            osp.getsize(filename) / 1024**2))
+
+        # The whole project file is copied after it is closed.
+        t0 = perf_counter()
+        project.close()
+        copyfile(filename, filename + '.copy')
+        project.load_projet(filename)
+        t1 = perf_counter()
+        print('  copy of the closed project file: {:0.3f} sec'.format(t1 - t0))
+
+        t0 = perf_counter()
+        project.backup_project_file()
+        t1 = perf_counter()
+        print('  first backup (full): {:0.3f} sec'.format(t1 - t0))
+
+        project.get_wldset('bench00').save_brfperiod([41241.0, 41584.0])
+        t0 = perf_counter()
+        project.backup_project_file()
+        t1 = perf_counter()
+        print('  incremental backup of one modified dataset: '
+              '{:0.3f} sec'.format(t1 - t0))
+
+        for i in range(ndatasets):
+            project.get_wldset('bench{:02d}'.format(i)).save_brfperiod(
+                [41241.0, 41584.0])
+        t0 = perf_counter()
+        project.backup_project_file(background=True)
+        t1 = perf_counter()
+        project.wait_for_backup()
+        t2 = perf_counter()
+        print('  background backup of all the datasets: caller blocked '
+              '{:0.3f} sec, completed in {:0.3f} sec'.format(t1 - t0, t2 - t0))
+        print('  backup size: {:0.1f} MB'.format(
+            osp.getsize(filename + '.bak') / 1024**2))
+        project.close()
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
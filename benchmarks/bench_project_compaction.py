@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""
+Benchmark the size, the open time and the backup time of a project in which
+GLUE results were recomputed and deleted in many sessions, before and after
+the project is compacted.
+
+Usage, from the root of the repository:
+    python -m benchmarks.bench_project_compaction [nsessions] [nsamples]
+"""
+
+# ---- Standard library imports
+import contextlib
+import io
+import os.path as osp
+import sys
+import tempfile
+from time import perf_counter
+
+# ---- Third party imports
+import h5py
+import numpy as np
+import pandas as pd
+
+# ---- Local imports
+from gwhat.projet.reader_projet import ProjetReader
+from gwhat.projet.storage import (
+    DEFAULT_STORAGE_POLICY, create_timeseries_dataset, format_space_report,
+    save_datetimes_to_h5grp)
+
+
+def create_project(filename, nsamples):
+    """Create a project with a water level dataset with daily data."""
+    with h5py.File(filename, mode='w') as h5file:
+        grp = h5file.create_group('wldsets/bench')
+        save_datetimes_to_h5grp(
+            grp, 'Time',
+            pd.date_range('1980-01-01', periods=nsamples, freq='D').values,
+            DEFAULT_STORAGE_POLICY)
+        for key in ['WL', 'BP', 'ET']:
+            create_timeseries_dataset(
+                grp, key, np.random.rand(nsamples), DEFAULT_STORAGE_POLICY)
+        for key in ['Well', 'Well ID', 'Province']:
+            grp.attrs[key] = 'bench'
+
+
+def recompute_glue(filename, nsamples, nmodels=50):
+    """
+    Save new GLUE results in a new project session and delete the previous
+    results.
+    """
+    project = ProjetReader(filename)
+    wldset = project.get_wldset('bench')
+    idnums = wldset.glue_idnums()
+    wldset.save_glue({
+        'hydrograph': np.random.rand(nmodels, nsamples),
+        'recharge': np.random.rand(nmodels, nsamples)})
+    for idnum in idnums:
+        wldset.del_glue(idnum)
+    project.close()
+
+
+def bench_project(filename):
+    """Return the time taken to open, backup and close the project."""
+    t0 = perf_counter()
+    project = ProjetReader(filename)
+    t1 = perf_counter()
+    project.backup_project_file()
+    t2 = perf_counter()
+    report = project.get_space_report()
+    project.close()
+    return t1 - t0, t2 - t1, report
+
+
+def main(nsessions=30, nsamples=15000):
+    print('Project in which GLUE results were recomputed in {} '
+          'sessions.'.format(nsessions))
+    with tempfile.TemporaryDirectory() as tempdir:
+        filename = osp.join(tempdir, 'bench.gwt')
+        create_project(filename, nsamples)
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(nsessions):
+                recompute_glue(filename, nsamples)
+            before = bench_project(filename)
+
+            t0 = perf_counter()
+            project = ProjetReader(filename)
+            project.compact()
+            project.close()
+            compact_time = perf_counter() - t0
+
+            after = bench_project(filename)
+        for label, (open_time, backup_time, report) in [
+                ('before compaction', before), ('after compaction', after)]:
+            print('  {}: open in {:0.4f} sec, full backup in {:0.3f} '
+                  'sec'.format(label, open_time, backup_time))
+            print('    ' + format_space_report(report))
+        print('  compacted in {:0.3f} sec'.format(compact_time))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
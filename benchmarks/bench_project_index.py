@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""
+Benchmark the listing and the description of all the water level datasets
+of a project with many datasets, from the attributes and the data of the
+datasets and from the metadata index of the project.
+
+Usage, from the root of the repository:
+    python -m benchmarks.bench_project_index [ndatasets] [nsamples]
+"""
+
+# ---- Standard library imports
+import os.path as osp
+import sys
+import tempfile
+from time import perf_counter
+
+# ---- Third party imports
+import h5py
+import numpy as np
+import pandas as pd
+
+# ---- Local imports
+from gwhat.projet.index import build_index
+from gwhat.projet.reader_projet import ProjetReader
+from gwhat.projet.storage import (
+    DEFAULT_STORAGE_POLICY, create_timeseries_dataset,
+    save_datetimes_to_h5grp)
+
+
+def create_project(filename, ndatasets, nsamples):
+    """Create a project with many water level datasets."""
+    times = pd.date_range('2000-01-01', periods=nsamples, freq='H')
+    with h5py.File(filename, mode='w') as h5file:
+        for i in range(ndatasets):
+            grp = h5file.create_group('wldsets/bench{:04d}'.format(i))
+            save_datetimes_to_h5grp(
+                grp, 'Time', times.values, DEFAULT_STORAGE_POLICY)
+            for key in ['WL', 'BP', 'ET']:
+                create_timeseries_dataset(
+                    grp, key, np.random.rand(nsamples),
+                    DEFAULT_STORAGE_POLICY)
+            grp.create_group('glue')
+            grp.create_group('brf')
+            for key in ['Well', 'Well ID', 'Municipality', 'Province']:
+                grp.attrs[key] = 'bench'
+            for key in ['Latitude', 'Longitude', 'Elevation']:
+                grp.attrs[key] = 0
+    ProjetReader(filename).close()
+
+
+def bench_attrs(filename):
+    """
+    Return the time taken to list and describe the water level datasets
+    from their attributes and their data.
+    """
+    project = ProjetReader(filename)
+    t0 = perf_counter()
+    build_index(project.db, 'wldsets')
+    t1 = perf_counter()
+    project.close()
+    return t1 - t0
+
+
+def bench_index(filename):
+    """
+    Return the time taken to list and describe the water level datasets
+    from the index saved in the project.
+    """
+    project = ProjetReader(filename)
+    t0 = perf_counter()
+    project.get_wldsets_index()
+    t1 = perf_counter()
+    project.close()
+    return t1 - t0
+
+
+def main(ndatasets=1000, nsamples=1000):
+    print('Project with {:,} water level datasets of {:,} samples.'.format(
+        ndatasets, nsamples))
+    with tempfile.TemporaryDirectory() as tempdir:
+        filename = osp.join(tempdir, 'bench.gwt')
+        create_project(filename, ndatasets, nsamples)
+
+        # Build and save the index once.
+        project = ProjetReader(filename)
+        project.get_wldsets_index()
+        project.close()
+
+        print('  from the attributes: {:0.3f} sec'.format(
+            bench_attrs(filename)))
+        print('  from the index: {:0.3f} sec'.format(
+            bench_index(filename)))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
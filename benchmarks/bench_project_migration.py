@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""
+Benchmark the opening of a project with many water level datasets saved
+with the first version of the schema, when the project is migrated and when
+it is opened again once migrated, and the selection of all its datasets.
+
+Usage, from the root of the repository:
+    python -m benchmarks.bench_project_migration [ndatasets] [nsamples]
+"""
+
+# ---- Standard library imports
+import os.path as osp
+import sys
+import tempfile
+from time import perf_counter
+
+# ---- Third party imports
+import h5py
+import numpy as np
+import pandas as pd
+
+# ---- Local imports
+from gwhat.projet.reader_projet import ProjetReader
+
+
+def create_legacy_project(filename, ndatasets, nsamples):
+    """
+    Create a project with water level datasets whose time axes are saved
+    as ISO date strings, as in the first version of the schema.
+    """
+    times = pd.date_range('2000-01-01', periods=nsamples, freq='H')
+    times = np.array(times.strftime('%Y-%m-%dT%H:%M:%S'), dtype='S19')
+    with h5py.File(filename, mode='w') as h5file:
+        for key in ['name', 'author', 'created', 'modified', 'version']:
+            h5file.attrs[key] = 'bench'
+        h5file.attrs['latitude'] = 0
+        h5file.attrs['longitude'] = 0
+        h5file.create_group('wxdsets')
+        for i in range(ndatasets):
+            grp = h5file.create_group('wldsets/bench{:03d}'.format(i))
+            grp.create_dataset('Time', data=times)
+            for key in ['WL', 'BP', 'ET']:
+                grp.create_dataset(key, data=np.random.rand(nsamples))
+            for key in ['Well', 'Latitude', 'Longitude', 'Elevation',
+                        'Municipality']:
+                grp.attrs[key] = 0 if key != 'Well' else 'bench'
+
+
+def bench_open(filename):
+    """
+    Return the time taken to open the project and to select all its water
+    level datasets.
+    """
+    t0 = perf_counter()
+    project = ProjetReader(filename)
+    t1 = perf_counter()
+    for name in project.wldsets:
+        project.get_wldset(name)
+    t2 = perf_counter()
+    project.close()
+    return t1 - t0, t2 - t1
+
+
+def main(ndatasets=500, nsamples=1000):
+    print('Project with {:,} water level datasets of {:,} samples.'.format(
+        ndatasets, nsamples))
+    with tempfile.TemporaryDirectory() as tempdir:
+        filename = osp.join(tempdir, 'bench.gwt')
+        create_legacy_project(filename, ndatasets, nsamples)
+        for label in ['first open', 'second open', 'third open']:
+            open_time, select_time = bench_open(filename)
+            print('  {}: open in {:0.3f} sec, select all datasets in '
+                  '{:0.3f} sec'.format(label, open_time, select_time))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
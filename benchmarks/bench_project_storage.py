@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""
+Benchmark the size and the read throughput of a large water level dataset
+saved in a project hdf5 file with different storage policies, and the
+repacking of a project saved without chunking and compression.
+
+Usage, from the root of the repository:
+    python -m benchmarks.bench_project_storage [nsamples]
+"""
+
+# ---- Standard library imports
+import os.path as osp
+import sys
+import tempfile
+from time import perf_counter
+
+# ---- Third party imports
+import h5py
+import numpy as np
+import pandas as pd
+
+# ---- Local imports
+from gwhat.projet.storage import (
+    CONTIGUOUS_STORAGE_POLICY, DEFAULT_STORAGE_POLICY, StoragePolicy,
+    create_timeseries_dataset, repack_project, save_datetimes_to_h5grp)
+
+STORAGE_POLICIES = [
+    ('contiguous', CONTIGUOUS_STORAGE_POLICY),
+    ('lzf', StoragePolicy(2 ** 15, 'lzf', None, False)),
+    ('lzf+shuffle', StoragePolicy(2 ** 15, 'lzf', None, True)),
+    ('gzip1+shuffle', StoragePolicy(2 ** 15, 'gzip', 1, True)),
+    ('gzip4+shuffle', StoragePolicy(2 ** 15, 'gzip', 4, True)),
+    ('gzip4+shuffle 4k', StoragePolicy(2 ** 12, 'gzip', 4, True)),
+    ('gzip4+shuffle 8k', StoragePolicy(2 ** 13, 'gzip', 4, True)),
+    ('gzip4+shuffle 256k', StoragePolicy(2 ** 18, 'gzip', 4, True)),
+    ]
+
+
+def create_project(filename, nsamples, storage_policy):
+    """
+    Create a project with a water level dataset that looks like the data
+    of a 15 minutes pressure logger.
+    """
+    rng = np.random.RandomState(0)
+    with h5py.File(filename, mode='w') as h5file:
+        grp = h5file.create_group('wldsets/bench')
+        save_datetimes_to_h5grp(
+            grp, 'Time',
+            pd.date_range('2000-01-01', periods=nsamples, freq='15min').values,
+            storage_policy)
+        create_timeseries_dataset(
+            grp, 'WL',
+            np.round(5 + np.cumsum(rng.normal(0, 0.001, nsamples)), 3),
+            storage_policy)
+        create_timeseries_dataset(
+            grp, 'BP',
+            np.round(10 + 0.1 * np.sin(np.arange(nsamples) / 96 * 2 *
+                                       np.pi) + rng.normal(0, 0.01, nsamples),
+                     3),
+            storage_policy)
+        create_timeseries_dataset(grp, 'ET', np.array([]), storage_policy)
+
+
+def bench_read(filename, nsamples, nwindows=200, window=2880):
+    """
+    Return the throughput in MB/s of reading all the time series of the
+    dataset in full and the time taken to read random one month windows.
+    """
+    rng = np.random.RandomState(1)
+    with h5py.File(filename, mode='r') as h5file:
+        grp = h5file['wldsets/bench']
+        t0 = perf_counter()
+        nbytes = sum(grp[key][...].nbytes for key in ['Time', 'WL', 'BP'])
+        full_read = perf_counter() - t0
+
+        starts = rng.randint(0, nsamples - window, nwindows)
+        t0 = perf_counter()
+        for start in starts:
+            grp['WL'][start:start + window]
+        window_read = perf_counter() - t0
+    return nbytes / 1024**2 / full_read, window_read
+
+
+def main(nsamples=2000000):
+    print('Water level dataset with {:,} samples.'.format(nsamples))
+    print('  {:<20}{:>12}{:>16}{:>20}'.format(
+        'Storage policy', 'Size (MB)', 'Read (MB/s)', '200 windows (sec)'))
+    with tempfile.TemporaryDirectory() as tempdir:
+        for label, storage_policy in STORAGE_POLICIES:
+            filename = osp.join(tempdir, 'bench.gwt')
+            create_project(filename, nsamples, storage_policy)
+            throughput, window_read = bench_read(filename, nsamples)
+            print('  {:<20}{:>12.1f}{:>16.0f}{:>20.3f}'.format(
+                label, osp.getsize(filename) / 1024**2, throughput,
+                window_read))
+
+        filename = osp.join(tempdir, 'bench.gwt')
+        create_project(filename, nsamples, CONTIGUOUS_STORAGE_POLICY)
+        t0 = perf_counter()
+        old_size, new_size = repack_project(filename, DEFAULT_STORAGE_POLICY)
+        t1 = perf_counter()
+        print(('  Repacked contiguous project with the default storage '
+               'policy in {:0.3f} sec: {:0.1f} MB -> {:0.1f} MB').format(
+                   t1 - t0, old_size / 1024**2, new_size / 1024**2))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
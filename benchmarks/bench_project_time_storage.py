@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""
+Benchmark the loading of the time axis of a large water level dataset saved
+in a project hdf5 file as ISO date strings (schema version 1) and as int64
+epoch times (schema version 2).
+
+Usage, from the root of the repository:
+    python -m benchmarks.bench_project_time_storage [nsamples]
+"""
+
+# ---- Standard library imports
+import os.path as osp
+import sys
+import tempfile
+from time import perf_counter
+
+# ---- Third party imports
+import h5py
+import numpy as np
+import pandas as pd
+
+# ---- Local imports
+from gwhat.projet.reader_projet import (
+    WLDataFrameHDF5, load_datetimes_from_h5grp)
+from gwhat.projet.schema import migrate_project
+from gwhat.projet.storage import save_datetimes_to_h5grp
+from gwhat.utils.dates import (
+    datetime64_to_isostrings, isostrings_to_datetime64)
+
+
+def create_wldset(h5file, name, datetimes, as_strings):
+    """Create a water level dataset with the time saved in the given format."""
+    grp = h5file.create_group('wldsets/{}'.format(name))
+    if as_strings:
+        grp.create_dataset('Time', data=np.array(
+            datetime64_to_isostrings(datetimes).tolist(),
+            dtype=h5py.special_dtype(vlen=str)))
+    else:
+        save_datetimes_to_h5grp(grp, 'Time', datetimes)
+    for key in ['WL', 'BP', 'ET']:
+        grp.create_dataset(key, data=np.random.rand(len(datetimes)))
+    for key in ['Well ID', 'Province']:
+        grp.attrs[key] = ''
+    grp.create_group('glue')
+    h5file.require_group('wxdsets')
+    return grp
+
+
+def main(nsamples=2000000):
+    datetimes = pd.date_range(
+        '2000-01-01', periods=nsamples, freq='15min').values
+    print('Water level dataset with {:,} samples.'.format(nsamples))
+    with tempfile.TemporaryDirectory() as tempdir:
+        filenames = {}
+        for version, as_strings in [('v1', True), ('v2', False)]:
+            filenames[version] = osp.join(tempdir, version + '.gwt')
+            with h5py.File(filenames[version], mode='w') as h5file:
+                create_wldset(h5file, 'wldset', datetimes, as_strings)
+        print('  project file size: v1 {:0.1f} MB, v2 {:0.1f} MB'.format(
+            osp.getsize(filenames['v1']) / 1024**2,
+            osp.getsize(filenames['v2']) / 1024**2))
+
+        with h5py.File(filenames['v1'], mode='a') as h5file:
+            t0 = perf_counter()
+            values = isostrings_to_datetime64(h5file['wldsets/wldset/Time'])
+            t1 = perf_counter()
+            assert np.array_equal(values, datetimes)
+            print('  read time axis: v1 (ISO strings) in {:0.3f} sec'
+                  .format(t1 - t0))
+        with h5py.File(filenames['v2'], mode='a') as h5file:
+            t0 = perf_counter()
+            values = load_datetimes_from_h5grp(
+                h5file['wldsets/wldset'], 'Time')
+            t1 = perf_counter()
+            assert np.array_equal(values, datetimes)
+            print('  read time axis: v2 (int64 epoch) in {:0.3f} sec'
+                  .format(t1 - t0))
+
+        with h5py.File(filenames['v1'], mode='a') as h5file:
+            t0 = perf_counter()
+            migrate_project(h5file)
+            t1 = perf_counter()
+        print('  migrate v1 project to epoch times in {:0.3f} sec'.format(
+            t1 - t0))
+
+        for version in ['v1', 'v2']:
+            with h5py.File(filenames[version], mode='a') as h5file:
+                t0 = perf_counter()
+                WLDataFrameHDF5(h5file['wldsets/wldset']).data
+                t1 = perf_counter()
+            print('  load dataset: {} after migration in {:0.3f} sec'.format(
+                version, t1 - t0))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""
+Benchmark the deletion, undo and commit of water level data edits on a
+large water level dataset saved in a project hdf5 file.
+
+Usage, from the root of the repository:
+    python -m benchmarks.bench_wldset_edits [nsamples]
+"""
+
+# ---- Standard library imports
+import os.path as osp
+import sys
+import tempfile
+from time import perf_counter
+
+# ---- Third party imports
+import h5py
+import numpy as np
+import pandas as pd
+
+# ---- Local imports
+from gwhat.projet.reader_projet import WLDataFrameHDF5
+
+
+class BenchWLDataFrameHDF5(WLDataFrameHDF5):
+    """
+    A WLDataFrameHDF5 that skips the parsing of the time data, which is not
+    what is benchmarked here.
+    """
+
+    def __load_dataset__(self, hdf5group):
+        self.dset = hdf5group
+        self._undo_stack = []
+        self._dataf = pd.DataFrame(
+            {'WL': hdf5group['WL'][...]},
+            index=pd.date_range('2000-01-01', periods=len(hdf5group['WL']),
+                                freq='15min'))
+
+
+def legacy_delete(wldset, indexes):
+    """Delete water levels storing the old values in a pandas Series."""
+    wldset._undo_stack.append(
+        (np.array([[indexes[0], indexes[-1] + 1]]),
+         wldset._dataf['WL'].iloc[indexes].copy()))
+    wldset._dataf['WL'].values[indexes] = np.nan
+
+
+def legacy_commit(wldset):
+    """Commit the changes by rewriting the whole dataset."""
+    wldset.dset['WL'][:] = np.copy(wldset.waterlevels)
+    wldset.dset.file.flush()
+    wldset._undo_stack = []
+
+
+def range_delete(wldset, indexes):
+    """Delete water levels storing the old values as index ranges."""
+    wldset.delete_waterlevels_in([[indexes[0], indexes[-1] + 1]])
+
+
+def bench(wldset, nedits, edit_size, rng):
+    nsamples = len(wldset.waterlevels)
+    for delete, commit, label in [
+            (legacy_delete, legacy_commit, 'legacy'),
+            (range_delete, WLDataFrameHDF5.commit, 'ranges')]:
+        starts = rng.randint(0, nsamples - edit_size, nedits)
+
+        t0 = perf_counter()
+        for start in starts:
+            delete(wldset, np.arange(start, start + edit_size))
+        t1 = perf_counter()
+
+        stack_nbytes = sum(
+            ranges.nbytes + (values.memory_usage(index=True) if
+                             isinstance(values, pd.Series) else values.nbytes)
+            for ranges, values in wldset._undo_stack)
+
+        t2 = perf_counter()
+        commit(wldset)
+        t3 = perf_counter()
+
+        print(('  {:>6}: {} deletes of {} values in {:0.3f} sec, undo stack '
+               'of {:0.2f} MB, commit in {:0.3f} sec').format(
+                   label, nedits, edit_size, t1 - t0,
+                   stack_nbytes / 1024**2, t3 - t2))
+
+
+def main(nsamples=5000000):
+    rng = np.random.RandomState(0)
+    with tempfile.TemporaryDirectory() as tempdir:
+        with h5py.File(osp.join(tempdir, 'bench.gwt'), mode='w') as h5file:
+            grp = h5file.create_group('wldsets/bench')
+            grp.create_dataset('WL', data=rng.rand(nsamples))
+            wldset = BenchWLDataFrameHDF5(grp)
+            print('Water level dataset with {:,} samples.'.format(nsamples))
+            for nedits, edit_size in [(10, 50), (200, 2500)]:
+                bench(wldset, nedits, edit_size, rng)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""
+Benchmark the selection of a large water level dataset saved in a project
+hdf5 file and the reading of a time window of its data, when the whole data
+are read from the project and when only the window is read lazily.
+
+Usage, from the root of the repository:
+    python -m benchmarks.bench_wldset_windows [nsamples]
+"""
+
+# ---- Standard library imports
+import os.path as osp
+import sys
+import tempfile
+from time import perf_counter
+
+# ---- Third party imports
+import h5py
+import numpy as np
+import pandas as pd
+
+# ---- Local imports
+from gwhat.projet.reader_projet import WLDataFrameHDF5
+from gwhat.projet.storage import (
+    DEFAULT_STORAGE_POLICY, create_timeseries_dataset,
+    save_datetimes_to_h5grp)
+
+
+def create_wldset(h5file, nsamples):
+    """Create a water level dataset with 15 minutes data."""
+    grp = h5file.create_group('wldsets/bench')
+    save_datetimes_to_h5grp(
+        grp, 'Time',
+        pd.date_range('2000-01-01', periods=nsamples, freq='15min').values,
+        DEFAULT_STORAGE_POLICY)
+    for key in ['WL', 'BP', 'ET']:
+        create_timeseries_dataset(
+            grp, key, np.random.rand(nsamples), DEFAULT_STORAGE_POLICY)
+    for key in ['Well', 'Well ID', 'Province']:
+        grp.attrs[key] = 'bench'
+    grp.create_group('glue')
+    return grp
+
+
+def main(nsamples=2000000):
+    print('Water level dataset with {:,} samples.'.format(nsamples))
+    start, end = np.datetime64('2020-01-01'), np.datetime64('2020-01-31')
+    with tempfile.TemporaryDirectory() as tempdir:
+        with h5py.File(osp.join(tempdir, 'bench.gwt'), mode='w') as h5file:
+            grp = create_wldset(h5file, nsamples)
+
+            t0 = perf_counter()
+            wldset = WLDataFrameHDF5(grp)
+            wldset.data
+            t1 = perf_counter()
+            window = wldset.data.loc[start:end]
+            t2 = perf_counter()
+            print('  full read: select dataset in {:0.3f} sec, '
+                  'one month window in {:0.3f} sec'.format(t1 - t0, t2 - t1))
+            expected = window
+
+            t0 = perf_counter()
+            wldset = WLDataFrameHDF5(grp)
+            wldset['Well']
+            t1 = perf_counter()
+            window = wldset.get_window(start, end)
+            t2 = perf_counter()
+            window = wldset.get_window(start, end)
+            t3 = perf_counter()
+            assert window.equals(expected)
+            print('  lazy read: select dataset in {:0.3f} sec, '
+                  'one month window in {:0.3f} sec ({:0.3f} sec once the '
+                  'time axis is read)'.format(t1 - t0, t2 - t1, t3 - t2))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""
+Benchmark the conversion of Excel numeric dates to datetimes and ISO date
+strings against the previous implementation based on xlrd.
+
+Usage, from the root of the repository:
+    python -m benchmarks.bench_xldates [nsamples]
+"""
+
+# ---- Standard library imports
+import sys
+from time import perf_counter
+
+# ---- Third party imports
+import numpy as np
+import pandas as pd
+import xlrd
+
+# ---- Local imports
+from gwhat.utils.dates import (
+    xldates_to_datetimeindex, datetimeindex_to_xldates, xldates_to_strftimes)
+
+
+def xlrd_xldates_to_datetimeindex(xldates):
+    """Convert Excel numeric dates with one call to xlrd per sample."""
+    return pd.to_datetime(pd.Series(xldates).apply(
+        lambda date: xlrd.xldate.xldate_as_datetime(date, 0)))
+
+
+def xlrd_datetimeindex_to_xldates(datetimeindex):
+    """Convert a datetime index to Excel numeric dates with pandas."""
+    timedeltas = datetimeindex - xlrd.xldate.xldate_as_datetime(4000, 0)
+    return (timedeltas.total_seconds() / (3600 * 24) + 4000).values
+
+
+def xlrd_xldates_to_strftimes(xldates):
+    """Convert Excel numeric dates to ISO strings with strftime."""
+    datetimes = pd.DatetimeIndex(xlrd_xldates_to_datetimeindex(xldates))
+    return datetimes.strftime("%Y-%m-%dT%H:%M:%S").values.tolist()
+
+
+def timeit(func, *args):
+    """Return the time taken in seconds to execute func and its result."""
+    t0 = perf_counter()
+    result = func(*args)
+    return perf_counter() - t0, result
+
+
+if __name__ == '__main__':
+    nsamples = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    # Water levels sampled every 15 minutes starting on 2000-01-01.
+    xldates = 36526 + np.arange(nsamples) / 96
+
+    print('Benchmarking with {:,} samples'.format(nsamples))
+    print('{:<32}{:>12}{:>12}{:>10}'.format(
+        'Conversion', 'xlrd (s)', 'numpy (s)', 'speedup'))
+    for label, legacy_func, func, arg in [
+            ('xldates -> datetimeindex', xlrd_xldates_to_datetimeindex,
+             xldates_to_datetimeindex, xldates),
+            ('datetimeindex -> xldates', xlrd_datetimeindex_to_xldates,
+             datetimeindex_to_xldates, xldates_to_datetimeindex(xldates)),
+            ('xldates -> ISO strings', xlrd_xldates_to_strftimes,
+             xldates_to_strftimes, xldates)]:
+        legacy_time, legacy_result = timeit(legacy_func, arg)
+        new_time, new_result = timeit(func, arg)
+        legacy_result, new_result = (
+            np.asarray(legacy_result), np.asarray(new_result))
+        if new_result.dtype.kind == 'f':
+            assert np.allclose(legacy_result, new_result, rtol=0, atol=1e-8)
+        else:
+            assert np.all(legacy_result == new_result)
+        print('{:<32}{:>12.3f}{:>12.3f}{:>9.0f}x'.format(
+            label, legacy_time, new_time, legacy_time / new_time))
@@ -7,7 +7,7 @@
 # Licensed under the terms of the GNU General Public License.
 
 # ---- Standard library imports
-from time import clock
+from time import perf_counter
 import csv
 import os
 import os.path as osp
@@ -22,7 +22,7 @@ from PyQt5.QtCore import pyqtSignal as QSignal
 from PyQt5.QtWidgets import (
     QGridLayout, QComboBox, QTextEdit, QSizePolicy, QPushButton, QLabel,
     QTabWidget, QApplication, QWidget, QMainWindow, QToolBar, QFrame,
-    QMessageBox)
+    QMessageBox, QProgressBar)
 
 import matplotlib as mpl
 import matplotlib.dates as mdates
@@ -47,6 +47,9 @@ from gwhat.brf_mod import BRFManager
 from gwhat.widgets.buttons import OnOffToolButton
 from gwhat.widgets.layout import VSep
 from gwhat.widgets.fileio import SaveFileMixin
+from gwhat.utils.math import (
+    find_ranges_in_rect, merge_ranges, ranges_to_indexes)
+from gwhat.utils.taskmanagers import WorkerBase, TaskManagerBase
 
 
 class WLCalc(QWidget, SaveFileMixin):
@@ -80,7 +83,16 @@ class WLCalc(QWidget, SaveFileMixin):
         self.brf_eval_widget.sig_select_brfperiod_requested.connect(
             self.toggle_brfperiod_selection)
 
+        # Setup the worker to compute the MRC and find peaks in a thread.
+        self.mrc_task_manager = TaskManagerBase()
+        self.mrc_task_manager.set_worker(MRCWorker())
+        self.mrc_task_manager.sig_task_progress.connect(
+            self._handle_mrc_task_progress)
+        self.mrc_task_manager.sig_run_tasks_finished.connect(
+            self._update_mrc_task_state)
+
         self.__figbckground = None
+        self.__figbckground_key = None
         self.__addPeakVisible = True
         self.__mouse_btn_is_pressed = False
 
@@ -98,8 +110,17 @@ class WLCalc(QWidget, SaveFileMixin):
         self.peak_indx = np.array([]).astype(int)
         self.peak_memory = [np.array([]).astype(int)]
 
-        # Selected water level data.
-        self.wl_selected_i = []
+        # The display coordinates of the peaks are cached in a sorted
+        # index so that the peak nearest to the mouse cursor can be found
+        # quickly. The index is rebuilt only when the peaks or the view
+        # of the graph change.
+        self._peaks_display_index = None
+        self._peaks_display_index_key = None
+
+        # Selected water level data, stored as half-open [start, stop)
+        # index ranges.
+        self.wl_selected_ranges = np.empty((0, 2), dtype=int)
+        self._time_is_sorted = True
 
         # Soil Profiles :
         self.soilFilename = []
@@ -127,6 +148,7 @@ class WLCalc(QWidget, SaveFileMixin):
         self.canvas.mpl_connect('figure_leave_event', self.on_fig_leave)
         self.canvas.mpl_connect('axes_enter_event', self.on_axes_enter)
         self.canvas.mpl_connect('axes_leave_event', self.on_axes_leave)
+        self.canvas.mpl_connect('draw_event', self._on_canvas_drawn)
 
         # Put figure canvas in a QFrame widget so that it has a frame.
         self.fig_frame_widget = QFrame()
@@ -247,6 +269,24 @@ class WLCalc(QWidget, SaveFileMixin):
                                 zorder=20, marker='x', linestyle='None',
                                 markersize=15, markeredgewidth=3)
 
+        # ---- Setup the rendering layers
+
+        # The graph is rendered in layers. The static layers (weather data,
+        # observed water levels, etc.) are rendered by a full draw of the
+        # canvas, and a bitmap of the result is cached for the current view.
+        # The artists of the dynamic layers are animated, so that they are
+        # excluded from the full draws and composited over the cached
+        # bitmap with blitting instead.
+        self._overlay_artists = sorted(
+            [self._select_wl_plt, self._mrc_plt, self._peaks_plt,
+             self.h_brf1, self.h_brf2],
+            key=lambda artist: artist.get_zorder())
+        self._cursor_artists = [
+            self._brf_selector, self._rect_selector, self.vguide,
+            self.xycoord, self.xcross]
+        for artist in self._overlay_artists + self._cursor_artists:
+            artist.set_animated(True)
+
     def _setup_toolbar(self):
         """Setup the main toolbar of the water level calc tool."""
 
@@ -426,6 +466,15 @@ class WLCalc(QWidget, SaveFileMixin):
         self.btn_MRCalc.setToolTip('<p>Calculate the Master Recession Curve'
                                    ' (MRC) for the selected time periods.</p>')
 
+        self.btn_cancel_mrc = QToolButtonNormal(icons.get_icon('stop'))
+        self.btn_cancel_mrc.setToolTip('Stop the calculation in progress.')
+        self.btn_cancel_mrc.clicked.connect(self.cancel_mrc_tasks)
+        self.btn_cancel_mrc.hide()
+
+        self.mrc_progressbar = QProgressBar()
+        self.mrc_progressbar.setTextVisible(False)
+        self.mrc_progressbar.hide()
+
         mrc_tb = ToolBarWidget()
         for btn in [self.btn_undo, self.btn_clearPeak, self.btn_addpeak,
                     self.btn_delpeak, self.btn_save_mrc]:
@@ -446,6 +495,9 @@ class WLCalc(QWidget, SaveFileMixin):
         mrc_lay.setRowMinimumHeight(row, 5)
         mrc_lay.setRowStretch(row, 100)
         row += 1
+        mrc_lay.addWidget(self.mrc_progressbar, row, 0, 1, 2)
+        mrc_lay.addWidget(self.btn_cancel_mrc, row, 2)
+        row += 1
         mrc_lay.addWidget(self.btn_MRCalc, row, 0, 1, 3)
 
         mrc_lay.setContentsMargins(10, 10, 10, 10)
@@ -521,12 +573,18 @@ class WLCalc(QWidget, SaveFileMixin):
     def wldset(self):
         return self._wldset
 
+    @property
+    def wl_selected_i(self):
+        """Return the indexes of the selected water level data."""
+        return ranges_to_indexes(self.wl_selected_ranges)
+
     @property
     def wxdset(self):
         return self.dmngr.get_current_wxdset()
 
     def set_wldset(self, wldset):
         """Set the namespace for the water level dataset."""
+        self.cancel_mrc_tasks()
         self._wldset = wldset
         self.rechg_eval_widget.set_wldset(wldset)
         self.mrc_eval_widget.setEnabled(self.wldset is not None)
@@ -549,6 +607,8 @@ class WLCalc(QWidget, SaveFileMixin):
         CONF.set('hydrocalc', 'current_tool_index',
                  self.tools_tabwidget.currentIndex())
         self.brf_eval_widget.close()
+        self.cancel_mrc_tasks()
+        self.mrc_task_manager.wait()
         super().close()
 
     def showEvent(self, event):
@@ -567,18 +627,31 @@ class WLCalc(QWidget, SaveFileMixin):
         self.draw_mrc()
 
     def btn_MRCalc_isClicked(self):
+        """
+        Handle when the button to compute the MRC is clicked.
+
+        The MRC is computed in a thread. Clicking the button again while
+        the calculation is running restarts the calculation with the
+        current peaks.
+        """
         if self.wldset is None:
             return
-
-        QApplication.setOverrideCursor(Qt.WaitCursor)
-
-        A, B, hp, RMSE = mrc_calc(self.time, self.water_lvl, self.peak_indx,
-                                  self.MRC_type.currentIndex())
-
-        print('MRC Parameters: A=%f, B=%f' % (A, B))
-        if A is None:
-            QApplication.restoreOverrideCursor()
+        self.mrc_task_manager.add_task(
+            'compute_mrc',
+            lambda A, B, hp, RMSE, wldset=self.wldset,
+            peak_indx=np.copy(self.peak_indx):
+                self._handle_mrc_calculated(wldset, peak_indx, A, B, hp, RMSE),
+            np.copy(self.time), np.copy(self.water_lvl),
+            np.copy(self.peak_indx), self.MRC_type.currentIndex(),
+            error_callback=lambda error:
+                self._handle_mrc_task_failed('MRC calculation', error))
+        self._update_mrc_task_state()
+
+    def _handle_mrc_calculated(self, wldset, peak_indx, A, B, hp, RMSE):
+        """Handle when the MRC has been calculated in the worker."""
+        if A is None or wldset is not self.wldset:
             return
+        print('MRC Parameters: A=%f, B=%f' % (A, B))
 
         # Display result :
 
@@ -592,12 +665,41 @@ class WLCalc(QWidget, SaveFileMixin):
 
         # Store and plot the results.
         print('Saving MRC interpretation in dataset...')
-        self.wldset.set_mrc(A, B, self.peak_indx, self.time, hp)
+        self.wldset.set_mrc(A, B, peak_indx, self.time, hp)
         self.btn_save_mrc.setEnabled(True)
         self.draw_mrc()
         self.sig_new_mrc.emit()
 
-        QApplication.restoreOverrideCursor()
+    def _handle_mrc_task_failed(self, task, error):
+        """Handle when the MRC or peaks calculation failed in the worker."""
+        print('ERROR: The {} failed: {}'.format(task, error))
+        self.emit_warning(
+            "The {} failed with the following error:<br><br>{}".format(
+                task, error))
+
+    def cancel_mrc_tasks(self):
+        """Cancel the calculations of the MRC or peaks that are running."""
+        self.mrc_task_manager.cancel_tasks()
+        self._update_mrc_task_state()
+
+    def _handle_mrc_task_progress(self, task, progress):
+        """Update the progress bar of the MRC and peaks calculations."""
+        if task == 'find_peaks':
+            self.mrc_progressbar.setRange(0, 100)
+            self.mrc_progressbar.setValue(int(progress))
+
+    def _update_mrc_task_state(self):
+        """
+        Update the state of the widgets used to show the progress of the
+        MRC and peaks calculations.
+        """
+        is_running = self.mrc_task_manager.is_running()
+        self.mrc_progressbar.setVisible(is_running)
+        self.btn_cancel_mrc.setVisible(is_running)
+        if is_running:
+            # The MRC calculation has no predetermined number of
+            # iterations, so the progress bar is shown as busy.
+            self.mrc_progressbar.setRange(0, 0)
 
     def load_mrc_from_wldset(self):
         """Load saved MRC results from the project hdf5 file."""
@@ -661,7 +763,7 @@ class WLCalc(QWidget, SaveFileMixin):
             if x is not None:
                 x = x + self.dt4xls2mpl*self.dformat
                 vline.set_xdata(x)
-        self.draw()
+        self.draw_overlays()
 
     def toggle_brfperiod_selection(self, value):
         """
@@ -703,8 +805,22 @@ class WLCalc(QWidget, SaveFileMixin):
 
     # ---- Peaks handlers
     def find_peak(self):
-
-        n_j, n_add = local_extrema(self.water_lvl, 4 * 5)
+        """Find the local extrema of the water levels in a thread."""
+        if self.wldset is None:
+            return
+        self.mrc_task_manager.add_task(
+            'find_peaks',
+            lambda n_j, wldset=self.wldset:
+                self._handle_peaks_found(wldset, n_j),
+            np.copy(self.water_lvl), 4 * 5,
+            error_callback=lambda error:
+                self._handle_mrc_task_failed('peaks search', error))
+        self._update_mrc_task_state()
+
+    def _handle_peaks_found(self, wldset, n_j):
+        """Handle when the local extrema were found in the worker."""
+        if wldset is not self.wldset or len(n_j) == 0:
+            return
 
         # Removing first and last point if necessary to always start with a
         # maximum and end with a minimum.
@@ -722,19 +838,51 @@ class WLCalc(QWidget, SaveFileMixin):
         self.peak_memory.append(self.peak_indx)
         self.draw_mrc()
 
+    def find_peak_at(self, x, y, tolerance=15):
+        """
+        Return the position in peak_indx of the peak that is nearest to the
+        x and y display coordinates, in pixels, or None if there is no peak
+        closer than the specified tolerance.
+        """
+        if len(self.peak_indx) == 0 or x is None or y is None:
+            return None
+        return self._get_peaks_display_index().nearest(x, y, tolerance)
+
+    def _get_peaks_display_index(self):
+        """
+        Return an index of the display coordinates of the peaks, which is
+        rebuilt only if the peaks or the view limits of the graph changed
+        since the last call.
+        """
+        ax0 = self.fig.axes[0]
+        view = (self.dformat,
+                tuple(ax0.viewLim.bounds),
+                tuple(ax0.bbox.bounds))
+        if (self._peaks_display_index is None or
+                self._peaks_display_index_key[0] is not self.peak_indx or
+                self._peaks_display_index_key[1] != view):
+            xydata = np.column_stack((
+                self.time[self.peak_indx] + self.dt4xls2mpl * self.dformat,
+                self.water_lvl[self.peak_indx]))
+            xydisplay = ax0.transData.transform(xydata)
+            self._peaks_display_index = DisplayPointsIndex(
+                xydisplay[:, 0], xydisplay[:, 1])
+            self._peaks_display_index_key = (self.peak_indx, view)
+        return self._peaks_display_index
+
     def btn_addpeak_isclicked(self):
         """Handle when the button add_peak is clicked."""
         if self.btn_addpeak.value():
             self.toggle_navig_and_select_tools(self.btn_addpeak)
             self.btn_show_mrc.setValue(True)
-        self.draw()
+        self.draw_overlays()
 
     def btn_delpeak_isclicked(self):
         """Handle when the button btn_delpeak is clicked."""
         if self.btn_delpeak.value():
             self.toggle_navig_and_select_tools(self.btn_delpeak)
             self.btn_show_mrc.setValue(True)
-        self.draw()
+        self.draw_overlays()
 
     def clear_all_peaks(self):
         """Clear all peaks from the graph."""
@@ -822,7 +970,7 @@ class WLCalc(QWidget, SaveFileMixin):
 
     def clear_selected_wl(self, draw=True):
         """Clear the selecte water level data."""
-        self.wl_selected_i = []
+        self.wl_selected_ranges = np.empty((0, 2), dtype=int)
         self.draw_select_wl(draw)
 
     def home(self):
@@ -847,8 +995,8 @@ class WLCalc(QWidget, SaveFileMixin):
     # ---- Water level edit tools
     def delete_selected_wl(self):
         """Delete the selecte water level data."""
-        if len(self.wl_selected_i) and self.wldset is not None:
-            self.wldset.delete_waterlevels_at(self.wl_selected_i)
+        if len(self.wl_selected_ranges) and self.wldset is not None:
+            self.wldset.delete_waterlevels_in(self.wl_selected_ranges)
             self._draw_obs_wl()
             self._update_edit_toolbar_state()
 
@@ -884,6 +1032,10 @@ class WLCalc(QWidget, SaveFileMixin):
     # ---- Drawing methods
     def setup_hydrograph(self):
         """Setup the hydrograph after a new wldset has been set."""
+        # The rectangular selection tool uses a binary search on the
+        # time axis when the water level data are sorted in time.
+        self._time_is_sorted = bool(np.all(np.diff(self.time) >= 0))
+
         self.peak_indx = np.array([]).astype(int)
         self.peak_memory = [np.array([]).astype(int)]
         self.btn_undo.setEnabled(False)
@@ -1128,12 +1280,57 @@ class WLCalc(QWidget, SaveFileMixin):
         self.draw()
 
     def draw(self):
-        """Draw the canvas and save a snapshot of the background figure."""
+        """
+        Render the static layers of the graph with a full draw of the canvas.
+
+        This needs to be called only when the static layers or the view
+        have changed. Use draw_overlays otherwise.
+        """
         self.vguide.set_visible(False)
         self.xycoord.set_visible(False)
         self.xcross.set_visible(False)
         self.canvas.draw()
-        self.__figbckground = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+
+    def draw_overlays(self):
+        """
+        Composite the dynamic layers of the graph over the cached bitmap
+        of the static layers.
+
+        A full draw of the canvas is done instead if the cached bitmap is
+        missing or was rendered for another view.
+        """
+        if (self.__figbckground is None or
+                self.__figbckground_key != self._get_view_key()):
+            self.draw()
+            return
+        self.canvas.restore_region(self.__figbckground)
+        self._draw_overlay_artists()
+        self.canvas.blit(self.fig.bbox)
+
+    def _draw_overlay_artists(self):
+        """Draw the artists of the dynamic layers on the canvas."""
+        for artist in self._overlay_artists:
+            if artist.get_visible():
+                self.fig.draw_artist(artist)
+
+    def _get_view_key(self):
+        """
+        Return a key describing the current view of the graph that is used
+        to invalidate the cached bitmap of the static layers.
+        """
+        return (self.fig.bbox.bounds,
+                self.fig.axes[0].viewLim.bounds,
+                self.fig.axes[1].viewLim.bounds)
+
+    def _on_canvas_drawn(self, event):
+        """
+        Handle when the canvas is drawn, either by this widget or by the
+        navigation toolbar, to cache the bitmap of the static layers and
+        to draw the dynamic layers over it.
+        """
+        self.__figbckground = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.__figbckground_key = self._get_view_key()
+        self._draw_overlay_artists()
 
     def draw_meas_wl(self):
         """Draw the water level measured manually in the well."""
@@ -1152,13 +1349,12 @@ class WLCalc(QWidget, SaveFileMixin):
     def draw_select_wl(self, draw=True):
         """Draw the selected water level data points."""
         if self.wldset is not None:
+            wl_selected_i = self.wl_selected_i
             self._select_wl_plt.set_data(
-                self.time[self.wl_selected_i] +
-                (self.dt4xls2mpl * self.dformat),
-                self.water_lvl[self.wl_selected_i]
-                )
+                self.time[wl_selected_i] + (self.dt4xls2mpl * self.dformat),
+                self.water_lvl[wl_selected_i])
         if draw:
-            self.draw()
+            self.draw_overlays()
 
     def draw_glue_wl(self):
         """Draw or hide the water level envelope estimated with GLUE."""
@@ -1255,11 +1451,12 @@ class WLCalc(QWidget, SaveFileMixin):
         """
         self._draw_mrc_wl()
         self._draw_mrc_peaks()
-        self.draw()
+        self.draw_overlays()
 
     def _draw_obs_wl(self, draw=True):
         """Draw the observed water level data on the graph."""
         self.clear_selected_wl(draw=False)
+        self._peaks_display_index = None
         if self.wldset is not None:
             self._obs_wl_plt.set_data(
                 self.time + (self.dt4xls2mpl * self.dformat),
@@ -1282,6 +1479,7 @@ class WLCalc(QWidget, SaveFileMixin):
     def _draw_mrc_peaks(self):
         """Draw the periods that will be used to compute the MRC."""
         self.btn_undo.setEnabled(len(self.peak_memory) > 1)
+        self._peaks_display_index = None
         if self.wldset is not None and self.btn_show_mrc.value():
             self._peaks_plt.set_visible(True)
             self._peaks_plt.set_data(
@@ -1341,7 +1539,7 @@ class WLCalc(QWidget, SaveFileMixin):
 
     def on_fig_leave(self, event):
         """Handle when the mouse cursor leaves the graph."""
-        self.draw()
+        self.draw_overlays()
 
     def on_axes_enter(self, event):
         """Handle when the mouse cursor enters a new axe."""
@@ -1368,12 +1566,13 @@ class WLCalc(QWidget, SaveFileMixin):
             x_rel, y_rel = xy_release
             x_rel = x_rel - (self.dt4xls2mpl * self.dformat)
 
-            self.wl_selected_i += np.where(
-                (self.time >= min(x_click, x_rel)) &
-                (self.time <= max(x_click, x_rel)) &
-                (self.water_lvl >= min(y_click, y_rel)) &
-                (self.water_lvl <= max(y_click, y_rel))
-                )[0].tolist()
+            self.wl_selected_ranges = merge_ranges(
+                self.wl_selected_ranges,
+                find_ranges_in_rect(
+                    self.time, self.water_lvl,
+                    min(x_click, x_rel), max(x_click, x_rel),
+                    min(y_click, y_rel), max(y_click, y_rel),
+                    x_is_sorted=self._time_is_sorted))
             self.draw_select_wl()
 
     def on_mouse_move(self, event):
@@ -1385,9 +1584,13 @@ class WLCalc(QWidget, SaveFileMixin):
                 self.__mouse_btn_is_pressed):
             return
 
+        if (self.__figbckground is None or
+                self.__figbckground_key != self._get_view_key()):
+            return
+
         ax0 = self.fig.axes[0]
-        fig = self.fig
-        fig.canvas.restore_region(self.__figbckground)
+        self.canvas.restore_region(self.__figbckground)
+        self._draw_overlay_artists()
 
         # Draw the vertical cursor guide.
         x, y = event.xdata, event.ydata
@@ -1418,24 +1621,14 @@ class WLCalc(QWidget, SaveFileMixin):
             # For deleting peak in the graph. Will put a cross on top of the
             # peak to delete if some proximity conditions are met.
 
-            x = event.x
-            y = event.y
-
-            xpeak = self.time[self.peak_indx] + self.dt4xls2mpl * self.dformat
-            ypeak = self.water_lvl[self.peak_indx]
-
-            xt = np.empty(len(xpeak))
-            yt = np.empty(len(ypeak))
-
-            for i, (xp, yp) in enumerate(zip(xpeak, ypeak)):
-                xt[i], yt[i] = ax0.transData.transform((xp, yp))
-
-            d = ((xt - x)**2 + (yt - y)**2)**0.5
-            if np.min(d) < 15:
+            indx = self.find_peak_at(event.x, event.y)
+            if indx is not None:
                 # Put the cross over the nearest peak.
-                indx = np.argmin(d)
-                self.xcross.set_xdata(xpeak[indx])
-                self.xcross.set_ydata(ypeak[indx])
+                self.xcross.set_xdata(
+                    [self.time[self.peak_indx[indx]] +
+                     self.dt4xls2mpl * self.dformat])
+                self.xcross.set_ydata(
+                    [self.water_lvl[self.peak_indx[indx]]])
                 self.xcross.set_visible(True)
             else:
                 self.xcross.set_visible(False)
@@ -1445,7 +1638,7 @@ class WLCalc(QWidget, SaveFileMixin):
         ax0.draw_artist(self.xcross)
 
         # Update the canvas
-        self.fig.canvas.blit()
+        self.canvas.blit(self.fig.bbox)
 
     def onrelease(self, event):
         """
@@ -1470,7 +1663,7 @@ class WLCalc(QWidget, SaveFileMixin):
             self.on_brf_select()
 
         if self.is_all_btn_raised():
-            self.draw()
+            self.draw_overlays()
         else:
             if event.button != 1:
                 return
@@ -1489,30 +1682,12 @@ class WLCalc(QWidget, SaveFileMixin):
             if len(self.peak_indx) == 0:
                 return
 
-            xt = np.empty(len(self.peak_indx))
-            yt = np.empty(len(self.peak_indx))
-            xpeak = self.time[self.peak_indx] + self.dt4xls2mpl * self.dformat
-            ypeak = self.water_lvl[self.peak_indx]
-
-            ax = self.fig.axes[0]
-            for i in range(len(self.peak_indx)):
-                xt[i], yt[i] = ax.transData.transform((xpeak[i], ypeak[i]))
-
-            r = ((xt - x)**2 + (yt - y)**2)**0.5
-            if np.min(r) < 15:
-                indx = np.argmin(r)
-
-                # Update the plot :
-                self.xcross.set_xdata(xpeak[indx])
-                self.xcross.set_ydata(ypeak[indx])
-
+            indx = self.find_peak_at(x, y)
+            if indx is not None:
                 # Remove peak from peak index sequence :
                 self.peak_indx = np.delete(self.peak_indx, indx)
                 self.peak_memory.append(self.peak_indx)
 
-                xpeak = np.delete(xpeak, indx)
-                ypeak = np.delete(ypeak, indx)
-
                 # hide the cross outside of the plotting area :
                 self.xcross.set_visible(False)
                 self.draw_mrc()
@@ -1542,19 +1717,86 @@ class WLCalc(QWidget, SaveFileMixin):
             self.peak_memory.append(self.peak_indx)
 
             self.__addPeakVisible = False
-            self.draw()
+            self.draw_overlays()
         elif self.brf_eval_widget.is_brfperiod_selection_toggled():
             self._selected_brfperiod[0] = event.xdata
             self.vguide.set_color('red')
-            self.draw()
+            self.draw_overlays()
             self.on_mouse_move(event)
         elif self.rect_select_is_active:
             self._rect_selection[0] = (event.xdata, event.ydata)
         else:
-            self.draw()
+            self.draw_overlays()
 
 
-def local_extrema(x, Deltan):
+class DisplayPointsIndex(object):
+    """
+    An index of points given in display coordinates, sorted along the
+    x-axis, that is used to find quickly the point that is the nearest to
+    the mouse cursor with a binary search, regardless of the number of
+    points.
+    """
+
+    def __init__(self, xdisplay, ydisplay):
+        xdisplay = np.asarray(xdisplay, dtype=float)
+        ydisplay = np.asarray(ydisplay, dtype=float)
+
+        # Points with non finite coordinates (for example, peaks located on
+        # deleted water levels) can't be hit and are not indexed.
+        indexes = np.where(np.isfinite(xdisplay) & np.isfinite(ydisplay))[0]
+        self._sort_indexes = indexes[
+            np.argsort(xdisplay[indexes], kind='mergesort')]
+        self._x = xdisplay[self._sort_indexes]
+        self._y = ydisplay[self._sort_indexes]
+
+    def __len__(self):
+        return len(self._sort_indexes)
+
+    def nearest(self, x, y, tolerance):
+        """
+        Return the original position of the point that is nearest to x and
+        y or None if no point is closer than the specified tolerance.
+        """
+        i0 = np.searchsorted(self._x, x - tolerance, side='left')
+        i1 = np.searchsorted(self._x, x + tolerance, side='right')
+        if i0 == i1:
+            return None
+        dist = np.hypot(self._x[i0:i1] - x, self._y[i0:i1] - y)
+        i = np.argmin(dist)
+        if dist[i] < tolerance:
+            return int(self._sort_indexes[i0 + i])
+        else:
+            return None
+
+
+class MRCWorker(WorkerBase):
+    """
+    A worker to compute the master recession curve (MRC) and the local
+    extrema of the water levels outside of the GUI thread.
+    """
+
+    def _compute_mrc(self, time, water_lvl, peak_indx, mrctype):
+        """Compute the MRC and return its parameters and predicted levels."""
+        return mrc_calc(time, water_lvl, peak_indx, mrctype,
+                        callback=self._handle_callback)
+
+    def _find_peaks(self, water_lvl, deltan):
+        """Find the local extrema of the water levels."""
+        n_j, n_add = local_extrema(
+            water_lvl, deltan, callback=self._handle_callback)
+        return n_j
+
+    def _handle_callback(self, progress=None):
+        """
+        Handle the callback of the calculations to report their progress and
+        interrupt them if their cancellation was requested.
+        """
+        self.check_cancel_requested()
+        if progress is not None:
+            self.emit_progress(progress)
+
+
+def local_extrema(x, Deltan, callback=None):
     """
     Code adapted from a MATLAB script at
     www.ictp.acad.ro/vamos/trend/local_extrema.htm
@@ -1572,6 +1814,10 @@ def local_extrema(x, Deltan):
     kadd = n_j(kadd) are the local extrema with time scale smaller than Deltan
            which are added to the partition such that an alternation of maxima
            and minima is obtained.
+
+    callback = An optional function that is called at each iteration with
+               the progress of the calculation in percent. The calculation
+               can be interrupted by raising an exception in the callback.
     """
 
     N = len(x)
@@ -1619,6 +1865,8 @@ def local_extrema(x, Deltan):
     n_j = []   # positions of the local extrema of a partition of scale Deltan
 
     while nc < nf:
+        if callback is not None:
+            callback(nc / nf * 100)
 
         # the next extremum is searched within the interval [nc, nlim]
 
@@ -1691,7 +1939,7 @@ def local_extrema(x, Deltan):
 
         elif flagante == -1:  # ANTERIOR extremum is an MINIMUM
 
-            tminante = np.abs(n_j[-1])
+            tminante = int(np.abs(n_j[-1]))
             xminante = x[tminante]
 
             if flagmax == 1:  # CURRENT extremum is a MAXIMUM
@@ -1741,7 +1989,7 @@ def local_extrema(x, Deltan):
 
         else:  # ANTERIOR extremum is a MAXIMUM
 
-            tmaxante = np.abs(n_j[-1])
+            tmaxante = int(np.abs(n_j[-1]))
             xmaxante = x[tmaxante]
 
             if flagmin == 1:  # CURRENT extremum is a MINIMUM
@@ -1827,7 +2075,7 @@ def local_extrema(x, Deltan):
 # =============================================================================
 
 
-def mrc_calc(t, h, ipeak, MRCTYPE=1):
+def mrc_calc(t, h, ipeak, MRCTYPE=1, callback=None):
     """
     Calculate the equation parameters of the Master Recession Curve (MRC) of
     the aquifer from the water level time series using a modified Gauss-Newton
@@ -1843,6 +2091,9 @@ def mrc_calc(t, h, ipeak, MRCTYPE=1):
              MODE = 0 -> linear (dh/dt = b)
              MODE = 1 -> exponential (dh/dt = -a*h + b)
 
+    callback: an optional function that is called at each iteration of the
+              optimization. The calculation can be interrupted by raising an
+              exception in the callback.
     """
 
     A, B, hp, RMSE = None, None, None, None
@@ -1867,7 +2118,7 @@ def mrc_calc(t, h, ipeak, MRCTYPE=1):
     print('\n---- MRC calculation started ----\n')
     print('MRCTYPE = %s' % (['Linear', 'Exponential'][MRCTYPE]))
 
-    tstart = clock()
+    tstart = perf_counter()
 
     # If MRCTYPE is 0, then the parameter A is kept to a value of 0 throughout
     # the entire optimization process and only paramter B is optimized.
@@ -1892,6 +2143,9 @@ def mrc_calc(t, h, ipeak, MRCTYPE=1):
         NP = 2
 
     while 1:
+        if callback is not None:
+            callback()
+
         # Calculating Jacobian (X) Numerically :
 
         hdB = calc_synth_hydrograph(A, B + tolmax, h, dt, ipeak)
@@ -1994,7 +2248,7 @@ def mrc_calc(t, h, ipeak, MRCTYPE=1):
         if tol < tolmax:
             break
 
-    tend = clock()
+    tend = perf_counter()
     print('TIME = %0.3f sec' % (tend-tstart))
     print('\n---- FIN ----\n')
 
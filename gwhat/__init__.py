@@ -52,6 +52,11 @@ OTHER DEALINGS IN THE SOFTWARE.
 import os
 import sys
 
+# The file locking of hdf5 is disabled, since the write access to the
+# project files is coordinated with lock files (see gwhat.projet.lock).
+# With h5py older than 3.5, the file locking can only be disabled with this
+# environment variable, which must be set before h5py is imported.
+os.environ.setdefault('HDF5_USE_FILE_LOCKING', 'FALSE')
 
 version_info = (0, 5, 0)
 __version__ = '.'.join(map(str, version_info))
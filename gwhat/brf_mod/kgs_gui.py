@@ -37,7 +37,9 @@ from gwhat.config.gui import FRAME_SYLE
 from gwhat.config.main import CONF
 from gwhat.utils import icons
 from gwhat.utils.icons import QToolButtonNormal, get_icon
-from gwhat.utils.dates import qdatetime_from_xldate
+from gwhat.utils.dates import (
+    datetime64_to_xldates, datetimeindex_to_xldates, qdatetime_from_xldate,
+    xldates_to_datetime64)
 from gwhat.utils.qthelpers import create_toolbar_stretcher
 from gwhat import brf_mod as bm
 from gwhat.brf_mod import __install_dir__
@@ -357,7 +359,10 @@ class BRFManager(QFrame):
         self.toggle_brfperiod_selection(False)
         self.setEnabled(wldset is not None)
         if wldset is not None:
-            xldates = self.wldset.xldates
+            # Only the first and last times are needed here, so that the
+            # whole data of the dataset do not need to be read.
+            times = self.wldset.times
+            xldates = datetime64_to_xldates([times[0], times[-1]])
             self.set_daterange((xldates[0], xldates[-1]))
 
             # Set the period over which the BRF would be evaluated.
@@ -483,20 +488,22 @@ class BRFManager(QFrame):
 
         brfperiod = self.get_brfperiod()
         t1 = min(brfperiod)
-        i1 = np.where(self.wldset.xldates >= t1)[0][0]
         t2 = max(brfperiod)
-        i2 = np.where(self.wldset.xldates <= t2)[0][-1]
 
-        time = np.copy(self.wldset.xldates[i1:i2+1])
-        wl = np.copy(self.wldset['WL'][i1:i2+1])
-        bp = np.copy(self.wldset['BP'][i1:i2+1])
+        # Only the data within the BRF period are read from the project.
+        window = self.wldset.get_window(*xldates_to_datetime64([t1, t2]))
+        time = datetimeindex_to_xldates(window.index)
+        wl = window['WL'].values.copy()
+        bp = (window['BP'].values.copy() if 'BP' in window.columns else
+              np.array([]))
         if len(bp) == 0:
             msg = ("The barometric response function cannot be computed"
                    " because the currently selected water level dataset does"
                    " not contain any barometric data for the selected period.")
             QMessageBox.warning(self, 'Warning', msg, QMessageBox.Ok)
             return
-        et = np.copy(self.wldset['ET'][i1:i2+1])
+        et = (window['ET'].values.copy() if 'ET' in window.columns else
+              np.array([]))
         if len(et) == 0:
             et = np.zeros(len(wl))
 
@@ -19,6 +19,13 @@ import numpy as np
 import xlsxwriter
 import xlwt
 
+# The number of rows of data that are formatted and written at once when
+# saving columns of data to a file.
+EXPORT_CHUNKSIZE = 10000
+
+# The maximum number of rows and columns of the sheets of Excel files.
+EXCEL_LIMITS = {'.xls': (65536, 256), '.xlsx': (1048576, 16384)}
+
 
 def calc_dist_from_coord(lat1, lon1, lat2, lon2):
     """
@@ -66,6 +73,68 @@ def save_content_to_file(fname, fcontent):
         save_content_to_csv(fname, fcontent)
 
 
+def save_columns_to_file(fname, header, columns, chunksize=EXPORT_CHUNKSIZE):
+    """
+    Save the rows of the header followed by the data columns in a file whose
+    format is determined from the extension of its name.
+
+    The columns must be 1D arrays of the same length. The data rows are
+    formatted and written by chunks of rows, so that large datasets can be
+    saved without building the content of the whole file in memory.
+    """
+    root, ext = osp.splitext(fname)
+    if ext in ['.xlsx', '.xls']:
+        save_columns_to_excel(fname, header, columns, chunksize)
+    elif ext == '.tsv':
+        save_columns_to_csv(fname, header, columns, '\t', chunksize)
+    else:
+        save_columns_to_csv(fname, header, columns, ',', chunksize)
+
+
+def save_columns_to_csv(fname, header, columns, delimiter=',',
+                        chunksize=EXPORT_CHUNKSIZE):
+    """
+    Save the rows of the header followed by the data columns in a csv file
+    with the specified delimiter.
+    """
+    create_dirname(fname)
+    columns = [np.asarray(column) for column in columns]
+    with open(fname, 'w', encoding='utf8') as csvfile:
+        writer = csv.writer(csvfile, delimiter=delimiter, lineterminator='\n')
+        writer.writerows(header)
+        nrows = len(columns[0]) if len(columns) else 0
+        for start, stop in _iter_chunks(0, nrows, chunksize):
+            texts = [_format_column_as_text(column[start:stop], delimiter)
+                     for column in columns]
+            csvfile.write(''.join(
+                [delimiter.join(row) + '\n' for row in zip(*texts)]))
+
+
+def _iter_chunks(start, stop, chunksize):
+    """
+    Iterate over the half-open index ranges of the chunks of rows between
+    start and stop.
+    """
+    for chunk_start in range(start, stop, chunksize):
+        yield chunk_start, min(chunk_start + chunksize, stop)
+
+
+def _format_column_as_text(values, delimiter):
+    """
+    Format the values of a data column as a list of csv fields.
+
+    Numerical values are formatted in a single operation, with nan written
+    as 'nan' as in the files saved by the csv module.
+    """
+    if values.dtype.kind in 'biuf':
+        return values.astype(str).tolist()
+    texts = ['' if value is None else str(value) for value in values.tolist()]
+    specials = (delimiter, '"', '\n', '\r')
+    return ['"%s"' % text.replace('"', '""') if
+            any(char in text for char in specials) else text
+            for text in texts]
+
+
 def save_content_to_csv(fname, fcontent, mode='w', delimiter=',',
                         encoding='utf8'):
     """
@@ -78,27 +147,127 @@ def save_content_to_csv(fname, fcontent, mode='w', delimiter=',',
         writer.writerows(fcontent)
 
 
-def save_content_to_excel(fname, fcontent):
-    """Save content in a xls or xlsx file."""
+def save_content_to_excel(fname, fcontent, chunksize=EXPORT_CHUNKSIZE):
+    """
+    Save content in a xls or xlsx file.
+
+    The float nan of the content are saved as empty cells. The content is
+    split in several sheets if it exceeds the number of rows of a sheet.
+    """
+    fcontent = list(fcontent)
+
+    def get_rows(start, stop):
+        return [[None if isinstance(cell, float) and np.isnan(cell) else
+                 cell for cell in row] for row in fcontent[start:stop]]
+
+    ncols = max([len(row) for row in fcontent] + [0])
+    _save_rows_to_excel(fname, [], get_rows, len(fcontent), ncols, chunksize)
+
+
+def save_columns_to_excel(fname, header, columns,
+                          chunksize=EXPORT_CHUNKSIZE):
+    """
+    Save the rows of the header followed by the data columns in a xls or
+    xlsx file.
+
+    The nan values of the numerical columns are saved as empty cells, so
+    that the columns are read back as numbers. The data are split in
+    several sheets, each starting with the rows of the header, if they
+    exceed the number of rows of a sheet.
+    """
+    columns = [np.asarray(column) for column in columns]
+
+    def get_rows(start, stop):
+        rows = np.empty((stop - start, len(columns)), dtype=object)
+        for j, column in enumerate(columns):
+            values = column[start:stop]
+            rows[:, j] = values.astype(object)
+            if values.dtype.kind == 'f':
+                rows[np.isnan(values), j] = None
+        return rows.tolist()
+
+    nrows = len(columns[0]) if len(columns) else 0
+    ncols = max([len(row) for row in header] + [len(columns)])
+    _save_rows_to_excel(fname, header, get_rows, nrows, ncols, chunksize)
+
+
+def _save_rows_to_excel(fname, header, get_rows, nrows, ncols, chunksize):
+    """
+    Save the rows of the header followed by the data rows in a xls or xlsx
+    file.
+
+    The data rows are obtained by chunks of rows with get_rows, which must
+    return the rows between a start and a stop index as lists of cell
+    values, with None for the empty cells. The data rows are written in as
+    many sheets as needed to respect the limits of the file format.
+
+    The xlsx files are written in the constant memory mode of xlsxwriter,
+    in which each row is flushed to the file once it is written, and the
+    rows of the xls files are serialized at each chunk of rows.
+    """
     create_dirname(fname)
     root, ext = os.path.splitext(fname)
+    ext = '.xls' if ext == '.xls' else '.xlsx'
+    max_rows, max_cols = EXCEL_LIMITS[ext]
+    if ncols > max_cols:
+        raise ValueError(
+            "The content has {} columns, but the {} files are limited to "
+            "{} columns.".format(ncols, ext, max_cols))
+    sheet_nrows = max_rows - len(header)
+    if sheet_nrows <= 0:
+        raise ValueError(
+            "The header has {} rows, but the {} files are limited to "
+            "{} rows.".format(len(header), ext, max_rows))
+    sheets = [(sheet_start, min(sheet_start + sheet_nrows, nrows)) for
+              sheet_start in range(0, max(nrows, 1), sheet_nrows)]
+
     if ext == '.xls':
         wb = xlwt.Workbook()
-        ws = wb.add_sheet('Data')
-        for i, row in enumerate(fcontent):
-            for j, cell in enumerate(row):
-                ws.write(i, j, cell)
-        wb.save(root+'.xls')
+        for k, (sheet_start, sheet_stop) in enumerate(sheets):
+            ws = wb.add_sheet(_get_excel_sheetname(k))
+            _write_xls_rows(ws, 0, header)
+            rowx = len(header)
+            for start, stop in _iter_chunks(
+                    sheet_start, sheet_stop, chunksize):
+                _write_xls_rows(ws, rowx, get_rows(start, stop))
+                rowx += stop - start
+                ws.flush_row_data()
+        wb.save(root + '.xls')
     else:
         try:
-            with xlsxwriter.Workbook(root + '.xlsx') as wb:
-                ws = wb.add_worksheet('Data')
-                for i, row in enumerate(fcontent):
-                    ws.write_row(i, 0, row)
+            with xlsxwriter.Workbook(
+                    root + '.xlsx', {'constant_memory': True}) as wb:
+                for k, (sheet_start, sheet_stop) in enumerate(sheets):
+                    ws = wb.add_worksheet(_get_excel_sheetname(k))
+                    for rowx, row in enumerate(header):
+                        ws.write_row(rowx, 0, row)
+                    rowx = len(header)
+                    for start, stop in _iter_chunks(
+                            sheet_start, sheet_stop, chunksize):
+                        for row in get_rows(start, stop):
+                            ws.write_row(rowx, 0, row)
+                            rowx += 1
         except xlsxwriter.exceptions.FileCreateError:
             raise PermissionError
 
 
+def _get_excel_sheetname(index):
+    """Return the name of the sheet at the specified index."""
+    return 'Data' if index == 0 else 'Data ({})'.format(index + 1)
+
+
+def _write_xls_rows(ws, rowx, rows):
+    """
+    Write the rows in the xlwt worksheet, starting at the specified row
+    index and skipping the empty cells.
+    """
+    for i, row in enumerate(rows, rowx):
+        xlsrow = ws.row(i)
+        for j, cell in enumerate(row):
+            if cell is not None:
+                xlsrow.write(j, cell)
+
+
 def create_dirname(fname):
     """Create the dirname of a file if it doesn't exists."""
     dirname = osp.dirname(fname)
@@ -46,6 +46,15 @@ DEFAULTS = [
     ('weather_normals_viewer',
         {'graphs_labels_language': 'english'}
      ),
+    ('datafile_cache',
+        {'max_size_mb': 512}
+     ),
+    ('project_storage',
+        {'chunk_size': 32768,
+         'compression': 'gzip',
+         'compression_level': 4,
+         'shuffle': True}
+     ),
 ]
 
 
@@ -15,7 +15,9 @@ import os.path as osp
 from appconfigs.base import get_home_dir
 
 # ---- Local imports
-from gwhat.config.main import CONF
+from gwhat.config.main import CONF, CONFIG_DIR
+from gwhat.utils.filecache import ParsedFileCache
+from gwhat.projet.storage import StoragePolicy
 from gwhat import __rootdir__
 
 
@@ -39,6 +41,29 @@ def set_select_file_dialog_dir(directory):
     CONF.set('main', 'select_file_dialog_dir', directory)
 
 
+def get_datafile_cache():
+    """
+    Return the cache in which the data parsed from the water level and
+    weather datafiles are stored in the user configs directory.
+    """
+    return ParsedFileCache(
+        osp.join(CONFIG_DIR, 'datafile_cache'),
+        max_size=CONF.get('datafile_cache', 'max_size_mb') * 1024 ** 2)
+
+
+def get_project_storage_policy():
+    """
+    Return the storage policy of the time series datasets saved in the
+    projects that is defined in the user configs.
+    """
+    compression = CONF.get('project_storage', 'compression')
+    return StoragePolicy(
+        chunk_size=CONF.get('project_storage', 'chunk_size'),
+        compression=None if compression == 'none' else compression,
+        compression_opts=CONF.get('project_storage', 'compression_level'),
+        shuffle=CONF.get('project_storage', 'shuffle'))
+
+
 def save_path_to_configs(section, option, path):
     """
     Save a path in the config file for the specified section and option.
@@ -19,8 +19,7 @@ import numpy as np
 from xlrd import xldate_as_tuple
 
 # ---- Local imports
-from gwhat.common.utils import save_content_to_file
-from gwhat.utils.math import nan_as_text_tolist
+from gwhat.common.utils import save_columns_to_file
 from gwhat import __namever__
 
 
@@ -48,9 +47,9 @@ class GLUEDataFrameBase(Mapping):
         be saved (xls or xlsx for Excel, csv for coma-separated values text
         file, or tsv for tab-separated values text file).
         """
-        fcontent = self._produce_file_header()
-        fcontent.extend(self._format_glue_models_calibration())
-        save_content_to_file(filename, fcontent)
+        header, data = self._format_glue_models_calibration()
+        save_columns_to_file(
+            filename, self._produce_file_header() + header, data.T)
 
     def save_mly_glue_budget_to_file(self, filename):
         """
@@ -60,9 +59,9 @@ class GLUEDataFrameBase(Mapping):
         be saved (xls or xlsx for Excel, csv for coma-separated values text
         file, or tsv for tab-separated values text file).
         """
-        fcontent = self._produce_file_header()
-        fcontent.extend(self._format_mly_glue_budget())
-        save_content_to_file(filename, fcontent)
+        header, data = self._format_mly_glue_budget()
+        save_columns_to_file(
+            filename, self._produce_file_header() + header, data.T)
 
     def save_glue_waterlvl_to_file(self, filename):
         """
@@ -72,18 +71,19 @@ class GLUEDataFrameBase(Mapping):
         be saved (xls or xlsx for Excel, csv for coma-separated values text
         file, or tsv for tab-separated values text file).
         """
-        fcontent = self._produce_file_header()
-        fcontent.extend(self._format_glue_waterlvl())
-        save_content_to_file(filename, fcontent)
+        header, data = self._format_glue_waterlvl()
+        save_columns_to_file(
+            filename, self._produce_file_header() + header, data.T)
 
     def _format_glue_models_calibration(self):
         """
         Format the models likelyhood measures that were used to evaluate
-        water levels and groundwater recharge with GLUE.
+        water levels and groundwater recharge with GLUE and return the rows
+        of the data header and a 2D array with the data.
         """
 
         # Prepare the data header.
-        fdata = [['Cru', 'RASmax (mm)', 'Sy', 'RMSE (mmbgs)']]
+        header = [['Cru', 'RASmax (mm)', 'Sy', 'RMSE (mmbgs)']]
 
         # Prepare the data.
         data = np.vstack([
@@ -92,16 +92,14 @@ class GLUEDataFrameBase(Mapping):
             np.round(self['params']['Sy'], 5),
             np.round(self['RMSE'], 1)
             ]).transpose()
-
-        # Merge the data header with the data.
-        fdata.extend(nan_as_text_tolist(data))
-        return fdata
+        return header, data
 
     def _format_mly_glue_budget(self):
         """
         Format the montlhy results for each of the component of the water
         budget and GLUE uncertainty limits in a single column format for each
         monthly time series, so that it can be easily stored in a csv format.
+        Return the rows of the data header and a 2D array with the data.
         """
         year_range = self['monthly budget']['years']
         years = np.repeat(year_range, 12).astype(int)
@@ -130,29 +128,19 @@ class GLUEDataFrameBase(Mapping):
                 data[:, col] = self['monthly budget'][var][:, :, i].flatten()
                 col += 1
         data = np.round(data, 1)
-
-        # Merge the data header with the data. Also, convert float nan to text,
-        # so that it is possible to save to an Excel file.
-        dataf = [data_header, data_header3, data_header2]
-        if np.isnan(data).any():
-            m, n = np.shape(data)
-            for i in range(m):
-                dataf.append(['nan' if np.isnan(x) else x for x in data[i, :]])
-        else:
-            dataf.extend(data.tolist())
-
-        return dataf
+        return [data_header, data_header3, data_header2], data
 
     def _format_glue_waterlvl(self):
         """
         Format the water levels predicted with GLUE for the 0.05, 0.5, and
         0.95 GLUE uncertainty limits. Also add the observed water levels and
-        those predicted with the Master Recession Curve.
+        those predicted with the Master Recession Curve. Return the rows of
+        the data header and a 2D array with the data.
         """
         # Prepare the data header.
-        dataf = [['Time', 'Obs. WL', 'Pred. WL', 'Pred. WL', 'Pred. WL'],
-                 ['(days)', '(mbgs)', '(mbgs)', '(mbgs)', '(mbgs)'],
-                 ['', '', 'GLUE05', 'GLUE50', 'GLUE95']]
+        header = [['Time', 'Obs. WL', 'Pred. WL', 'Pred. WL', 'Pred. WL'],
+                  ['(days)', '(mbgs)', '(mbgs)', '(mbgs)', '(mbgs)'],
+                  ['', '', 'GLUE05', 'GLUE50', 'GLUE95']]
 
         # Prepare the data.
         wltime = self['water levels']['time']
@@ -161,11 +149,7 @@ class GLUEDataFrameBase(Mapping):
         data[:, 1] = self['water levels']['observed']
         data[:, 2:5] = self['water levels']['predicted'] / 1000
         data = np.round(data, 2)
-
-        # Merge the data header with the data.
-        dataf.extend(nan_as_text_tolist(data))
-
-        return dataf
+        return header, data
 
     def _produce_file_header(self):
         """"
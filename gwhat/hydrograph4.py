@@ -244,6 +244,51 @@ class Hydrograph(Figure):
     def set_wxdset(self, wxdset):
         self.wxdset = wxdset
 
+    def set_layout(self, layout):
+        """
+        Set the parameters of the hydrograph from a layout dict, as returned
+        by the get_layout method of the water level datasets of a project.
+        """
+        self.language = layout['language']
+
+        # Scales :
+
+        self.WLmin = layout['WLmin']
+        self.WLscale = layout['WLscale']
+        self.RAINscale = layout['RAINscale']
+        self.NZGrid = layout['NZGrid']
+        self.WLdatum = ['mbgs', 'masl'].index(layout['WLdatum'])
+
+        # Dates :
+
+        self.datemode = layout['datemode']
+        self.TIMEmin = layout['TIMEmin']
+        self.TIMEmax = layout['TIMEmax']
+        self.date_labels_pattern = layout['date_labels_pattern']
+
+        # Page Setup :
+
+        self.fwidth = layout['fwidth']
+        self.fheight = layout['fheight']
+        self.va_ratio = layout['va_ratio']
+
+        self.trend_line = layout['trend_line']
+        self.isLegend = layout['legend_on']
+        self.isGraphTitle = layout['title_on']
+        self.set_meteo_on(layout['meteo_on'])
+        self.set_glue_wl_on(layout['glue_wl_on'])
+        self.set_mrc_wl_on(layout['mrc_wl_on'])
+        self.set_figframe_lw(layout['figframe_lw'])
+
+        # Weather bins :
+
+        self.bwidth_indx = layout['bwidth_indx']
+
+        # Colors :
+
+        for key, rgb in layout.get('colors', {}).items():
+            self.colorsDB.RGB[key] = [int(x) for x in rgb]
+
     def set_gluedf(self, gluedf):
         """Set the namespace for the GLUE dataframe."""
         self.gluedf = gluedf
@@ -256,8 +301,10 @@ class Hydrograph(Figure):
         super(Hydrograph, self).clf(*args, **kargs)
 
     def savefig(self, fname):
-        """Matplotlib override to set frameon when saving."""
-        super(Hydrograph, self).savefig(fname, frameon=True, facecolor='white',
+        """Matplotlib override to set the colors of the frame when saving."""
+        # The frameon keyword is deprecated since matplotlib 3.1 and the
+        # frame of the figure is drawn by default.
+        super(Hydrograph, self).savefig(fname, facecolor='white',
                                         edgecolor='black')
 
     def generate_hydrograph(self, wxdset=None, wldset=None):
@@ -19,6 +19,8 @@ import pytest
 
 # ---- Local library imports
 from gwhat.meteo.weather_reader import WXDataFrame, read_weather_datafile
+from gwhat.utils import filecache
+from gwhat.utils.filecache import ParsedFileCache
 
 
 @pytest.mark.parametrize(
@@ -66,6 +68,94 @@ def test_read_weather_datafile(filename):
     assert np.array_equal(expected_values, data.astype(str).values)
 
 
+def test_read_weather_datafile_with_strings(tmpdir, capsys):
+    """
+    Test that missing value tokens are read as nan and that the values that
+    can't be converted to numeric values are coerced and reported.
+    """
+    filename = osp.join(str(tmpdir), 'weather_datafile.csv')
+    with open(filename, 'w') as f:
+        f.write('Station Name,MARIEVILLE\n'
+                'Year,Month,Day,Max Temp (deg C),Min Temp (deg C),'
+                'Mean Temp (deg C),Total Precip (mm)\n'
+                '2000,1,1,2,-12.8, NONE ,0\n'
+                '2000,1,2, ,-6,1.5,6.8\n'
+                '2000,1,3,NaN,bad,-0.5,6\n'
+                '2000,1,4,none,nan,1.1,err\n')
+    metadata, data = read_weather_datafile(filename)
+
+    expected_values = np.array(
+        [['2.0', '-12.8', 'nan', '0.0'],
+         ['nan', '-6.0', '1.5', '6.8'],
+         ['nan', 'nan', '-0.5', '6.0'],
+         ['nan', 'nan', '1.1', 'nan']
+         ])
+    assert np.array_equal(expected_values, data.astype(str).values)
+    assert data.dtypes.tolist() == ['float64'] * 4
+
+    captured = capsys.readouterr()
+    assert "1 Tmin data could not be converted" in captured.out
+    assert "1 Ptot data could not be converted" in captured.out
+    assert "Tmax data could not be converted" not in captured.out
+    assert "Tavg data could not be converted" not in captured.out
+
+
+def test_read_weather_datafile_cp1252(tmpdir):
+    """
+    Test that weather datafiles that are encoded in cp1252, as the csv files
+    saved by Excel on Windows, are read.
+    """
+    filename = osp.join(str(tmpdir), 'weather_datafile.csv')
+    with open(filename, 'w', encoding='cp1252') as f:
+        f.write('Station Name,Sainte-Clotilde-de-Châteauguay\n'
+                'Province,Québec\n'
+                'Year,Month,Day,Max Temp (°C),Min Temp (°C),'
+                'Mean Temp (°C),Total Precip (mm)\n'
+                '2000,1,1,2,-12.8,-5.4,0\n'
+                '2000,1,2,0.5,-6,-2.8,6.8\n')
+    metadata, data = read_weather_datafile(filename)
+    assert metadata['Station Name'] == 'Sainte-Clotilde-de-Châteauguay'
+    assert metadata['Location'] == 'Québec'
+    assert data.columns.tolist() == ['Tmax', 'Tmin', 'Tavg', 'Ptot']
+    assert data['Tmax'].tolist() == [2, 0.5]
+
+    # The data are read even if only the data are not valid utf8.
+    with open(filename, 'w', encoding='cp1252') as f:
+        f.write('Station Name,MARIEVILLE\n'
+                'Year,Month,Day,Max Temp (deg C),Min Temp (deg C),'
+                'Mean Temp (deg C),Total Precip (mm)\n'
+                '2000,1,1,2,-12.8,-5.4,0\n'
+                '2000,1,2,0.5,-6,-2.8,érr\n')
+    metadata, data = read_weather_datafile(filename)
+    assert metadata['Station Name'] == 'MARIEVILLE'
+    assert data['Tmax'].tolist() == [2, 0.5]
+    assert data['Ptot'].astype(str).tolist() == ['0.0', 'nan']
+
+
+def test_read_weather_datafile_with_cache(tmpdir, mocker):
+    """
+    Test that weather datasets are loaded from a ParsedFileCache without
+    parsing the datafile again when it did not change.
+    """
+    cache = ParsedFileCache(osp.join(str(tmpdir), 'cache'))
+    filename = osp.join(osp.dirname(__file__), "sample_weather_datafile.xlsx")
+    spy_hash = mocker.spy(filecache, 'get_file_hash')
+    wxdset = WXDataFrame(filename, cache=cache)
+    assert len(cache) == 1
+    # The datafile is hashed only once when it is missing from the cache.
+    assert spy_hash.call_count == 1
+
+    mocked_read = mocker.patch(
+        'gwhat.meteo.weather_reader.read_weather_datafile')
+    cached_wxdset = WXDataFrame(filename, cache=cache)
+    assert mocked_read.call_count == 0
+    assert cached_wxdset.metadata == wxdset.metadata
+    assert cached_wxdset.data.equals(wxdset.data)
+    assert cached_wxdset.data.index.name == wxdset.data.index.name
+    for var, indexes in wxdset.missing_value_indexes.items():
+        assert cached_wxdset.missing_value_indexes[var].equals(indexes)
+
+
 def test_init_wxdataframe_from_input_file():
     """
     Test that the WXDataFrame can be initiated properly from an input
@@ -15,22 +15,24 @@ import os
 import os.path as osp
 import re
 from time import strftime
+import warnings
 from collections import OrderedDict
 from collections.abc import Mapping
 from abc import abstractmethod
 
 # ---- Third party imports
-import numpy as np
 import pandas as pd
-from pandas.errors import EmptyDataError
+from pandas.errors import DtypeWarning, EmptyDataError
 import xlrd
-from xlrd.xldate import xldate_as_datetime
 
 # ---- Local library imports
 from gwhat.meteo.evapotranspiration import calcul_thornthwaite
-from gwhat.common.utils import save_content_to_file
-from gwhat.utils.math import nan_as_text_tolist
-from gwhat import __namever__
+from gwhat.common.utils import save_columns_to_file
+from gwhat.utils.dates import (
+    datetime64_to_isostrings, datetimeindex_to_xldates)
+from gwhat.utils.excel import ExcelDataReader
+from gwhat.utils.filecache import to_json_value
+from gwhat import __namever__, __version__
 
 
 METEO_VARIABLES = ['Ptot', 'Rain', 'Snow', 'PET', 'Tmax', 'Tavg', 'Tmin']
@@ -43,6 +45,16 @@ VARLABELS_MAP = {'Ptot': 'Ptot (mm)',
                  'PET': 'PET (mm)'}
 FILE_EXTS = ['.out', '.csv', '.xls', '.xlsx']
 
+# The version of the parser of weather datafiles that is used to invalidate
+# the parsed data stored in a ParsedFileCache. The number after the version
+# of GWHAT must be incremented when the way datafiles are parsed changes.
+PARSER_VERSION = __version__ + '-1'
+
+# The tokens, in lower case and without leading and trailing whitespaces,
+# that are considered as missing values in weather datafiles.
+NA_TOKENS = ['', 'nan', 'none']
+NA_VALUES = [' ', 'nan', 'NaN', 'NAN', 'none', 'None', 'NONE']
+
 
 # ---- API
 class WXDataFrameBase(Mapping):
@@ -108,8 +120,8 @@ class WXDataFrameBase(Mapping):
                     ]
         fcontent.append(
             [VARLABELS_MAP.get(col, col) for col in data.columns])
-        fcontent.extend(nan_as_text_tolist(data.values))
-        save_content_to_file(filename, fcontent)
+        save_columns_to_file(
+            filename, fcontent, [data[col].values for col in data.columns])
 
     def get_data_period(self):
         """
@@ -123,9 +135,7 @@ class WXDataFrameBase(Mapping):
         Return a numpy array containing the Excel numerical dates
         corresponding to the dates of the dataset.
         """
-        timedeltas = self.data.index - xldate_as_datetime(4000, 0)
-        xldates = timedeltas.total_seconds() / (3600 * 24) + 4000
-        return xldates.values
+        return datetimeindex_to_xldates(self.data.index)
 
     # ---- utilities
     def strftime(self):
@@ -133,7 +143,7 @@ class WXDataFrameBase(Mapping):
         Return a list of formatted strings corresponding to the datetime
         indexes of this dataset.
         """
-        return self.data.index.strftime("%Y-%m-%dT%H:%M:%S").values.tolist()
+        return datetime64_to_isostrings(self.data.index.values).tolist()
 
     # ---- Monthly and yearly values
     def get_monthly_values(self):
@@ -190,11 +200,29 @@ class WXDataFrameBase(Mapping):
 
 
 class WXDataFrame(WXDataFrameBase):
-    """A daily weather dataset container that loads its data from a file."""
+    """
+    A daily weather dataset container that loads its data from a file.
+
+    If a ParsedFileCache is provided, the data are loaded from the cache
+    if the datafile did not change since it was last parsed, and are stored
+    in the cache otherwise.
+    """
 
-    def __init__(self, filename, *args, **kwargs):
+    def __init__(self, filename, *args, cache=None, **kwargs):
         super(WXDataFrame, self).__init__(*args, **kwargs)
+        if cache is not None:
+            depends = [osp.splitext(filename)[0] + '.log']
+            key = cache.get_key(filename, PARSER_VERSION, depends)
+            cached = cache.get(filename, PARSER_VERSION, depends, key=key)
+            if cached is not None:
+                print('Reading weather data of "%s" from cache.' %
+                      os.path.basename(filename))
+                self._set_cached_state(*cached)
+                return
         self.__load_dataset__(filename)
+        if cache is not None:
+            cache.put(filename, PARSER_VERSION, *self._get_cached_state(),
+                      depends=depends, key=key)
 
     def __getitem__(self, key):
         raise NotImplementedError
@@ -275,6 +303,35 @@ class WXDataFrame(WXDataFrameBase):
                   "for {}.".format(', '.join(isnull[isnull].index.tolist())))
         print('-' * 78)
 
+    def _get_cached_state(self):
+        """
+        Return the arrays and the attributes to store in a ParsedFileCache
+        to restore this dataset without parsing its datafile again.
+        """
+        arrays = {'index': self.data.index.values}
+        for column in self.data.columns:
+            arrays['data/' + column] = self.data[column].values
+        for var, indexes in self.missing_value_indexes.items():
+            arrays['missing/' + var] = indexes.values
+        attrs = {'columns': self.data.columns.tolist(),
+                 'index_name': self.data.index.name,
+                 'index_freq': self.data.index.freqstr,
+                 'metadata': {key: to_json_value(value) for
+                              key, value in self.metadata.items()}}
+        return arrays, attrs
+
+    def _set_cached_state(self, arrays, attrs):
+        """Restore this dataset from the data stored in a ParsedFileCache."""
+        self.metadata = attrs['metadata']
+        self.data = pd.DataFrame(
+            OrderedDict((column, arrays['data/' + column]) for
+                        column in attrs['columns']),
+            index=pd.DatetimeIndex(arrays['index'], name=attrs['index_name'],
+                                   freq=attrs['index_freq']))
+        for var in self.missing_value_indexes.keys():
+            self.missing_value_indexes[var] = pd.DatetimeIndex(
+                arrays['missing/' + var])
+
 
 def read_weather_datafile(filename):
     """
@@ -293,14 +350,16 @@ def read_weather_datafile(filename):
                 'Longitude': 0,
                 'Elevation': 0}
 
-    # Read the file.
+    # Read the file. The rows of the files are read lazily, so that only
+    # the rows of the header are read one by one.
     root, ext = osp.splitext(filename)
     if ext in ['.csv', '.out']:
-        with open(filename, 'r') as csvfile:
-            data = list(csv.reader(csvfile, delimiter=','))
+        datafile = open(filename, 'rb')
+        decoder = _CsvLineDecoder()
+        rows = (next(csv.reader([decoder.decode(line)], delimiter=','), [])
+                for line in iter(datafile.readline, b''))
     elif ext in ['.xls', '.xlsx']:
-        data = pd.read_excel(filename, dtype='str', header=None)
-        data = data.values.tolist()
+        datafile = rows = ExcelDataReader(filename)
     else:
         raise ValueError("Supported file format are: ",
                          ['.csv', '.out', '.xls', '.xlsx'])
@@ -314,15 +373,15 @@ def read_weather_datafile(filename):
         'Longitude': (r'(longitude)', float),
         'Location': (r'(location|province)', str),
         'Elevation': (r'(elevation|altitude)', float)}
-    for i, row in enumerate(data):
+    for row in rows:
         if len(row) == 0 or pd.isnull(row[0]):
             continue
 
-        label = row[0].replace(" ", "").replace("_", "")
+        label = str(row[0]).replace(" ", "").replace("_", "")
         for key, (regex, dtype) in header_regex_type.items():
             if re.search(regex, label, re.IGNORECASE):
                 try:
-                    metadata[key] = dtype(row[1])
+                    metadata[key] = dtype(_format_cell_value(row[1]))
                 except ValueError:
                     print("Wrong format for entry '{}'.".format(key))
                 else:
@@ -331,11 +390,24 @@ def read_weather_datafile(filename):
             if re.search(r'(year)', label, re.IGNORECASE):
                 break
     else:
+        datafile.close()
         raise ValueError("Cannot find the beginning of the data.")
 
-    # Extract and format the numerical data from the file.
-    data = pd.DataFrame(data[i + 1:], columns=data[i])
-    data = data.replace(r'(?i)^\s*$|nan|none', np.nan, regex=True)
+    # Extract the data from the file. Only the columns that are needed are
+    # read, and the missing values are set to nan while the data are parsed.
+    colxs = [colx for colx, column in enumerate(row) if
+             _match_column_name(column) is not None]
+    try:
+        if ext in ['.xls', '.xlsx']:
+            columns = datafile.read_columns(colxs)
+            data = pd.DataFrame(OrderedDict(
+                (row[colx], values) for colx, values in
+                zip(colxs, columns)))
+        else:
+            data = _read_weather_csvdata(
+                datafile, row, colxs, decoder.encoding)
+    finally:
+        datafile.close()
 
     # The data must contain the following columns :
     # (1) Tmax, (2) Tavg, (3) Tmin, (4) Ptot.
@@ -343,33 +415,11 @@ def read_weather_datafile(filename):
     # (5) Rain, (6) Snow, (7) PET
     # The dataframe must use a datetime index.
 
-    column_names_regexes = OrderedDict([
-        ('Year', r'(year)'),
-        ('Month', r'(month)'),
-        ('Day', r'(day)'),
-        ('Tmax', r'(maxtemp)'),
-        ('Tmin', r'(mintemp)'),
-        ('Tavg', r'(meantemp)'),
-        ('Ptot', r'(totalprecip)'),
-        ('PET', r'(etp|evapo)'),
-        ('Rain', r'(rain)'),
-        ('Snow', r'(snow)')])
-    for i, column in enumerate(data.columns):
-        column_ = column.replace(" ", "").replace("_", "")
-        for key, regex in column_names_regexes.items():
-            if re.search(regex, column_, re.IGNORECASE):
-                data = data.rename(columns={column: key})
-                break
-        else:
-            data = data.drop([column], axis=1)
-
-    for col in data.columns:
-        try:
-            data[col] = pd.to_numeric(data[col])
-        except ValueError:
-            data[col] = pd.to_numeric(data[col], errors='coerce')
-            print("Some {} data could not be converted to numeric value"
-                  .format(col))
+    data.columns = [_match_column_name(column) for column in data.columns]
+    for col, count in _coerce_to_numeric(data).items():
+        if count:
+            print("{} {} data could not be converted to numeric value"
+                  .format(count, col))
 
     # We now create the time indexes for the dataframe form the year,
     # month, and day data.
@@ -389,6 +439,126 @@ def read_weather_datafile(filename):
     return metadata, data
 
 
+class _CsvLineDecoder(object):
+    """
+    Decode the lines of a csv file as utf8, or as latin-1 from the first
+    line that is not valid utf8, since the csv files saved by Excel on
+    Windows are usually encoded in cp1252.
+    """
+
+    def __init__(self):
+        self.encoding = 'utf8'
+
+    def decode(self, line):
+        """Decode the line of bytes with the encoding of the file."""
+        try:
+            return line.decode(self.encoding)
+        except UnicodeDecodeError:
+            self.encoding = 'latin-1'
+            return line.decode(self.encoding)
+
+
+def _read_weather_csvdata(csvfile, columns, usecols, encoding='utf8'):
+    """
+    Read the data of the columns at the specified indexes from the current
+    position of the csv file to the end of the file and return them in a
+    dataframe.
+
+    The data are decoded with the specified encoding, or as latin-1 if they
+    are not valid for that encoding.
+    """
+    data_offset = csvfile.tell()
+    try:
+        return _read_csvdata(csvfile, columns, usecols, encoding)
+    except UnicodeDecodeError:
+        csvfile.seek(data_offset)
+        return _read_csvdata(csvfile, columns, usecols, 'latin-1')
+
+
+def _read_csvdata(csvfile, columns, usecols, encoding):
+    """
+    Read the data of the columns at the specified indexes from the current
+    position of the csv file with the specified encoding.
+
+    The data are read with the C engine of pandas, with numerical values
+    parsed directly as floats and the NA_VALUES tokens set to nan. If some
+    values can't be parsed as floats, the data are read again with the types
+    inferred by pandas and these values are coerced afterwards.
+    """
+    data_offset = csvfile.tell()
+    read_csv_kwargs = dict(
+        sep=',', header=None, names=list(range(len(columns))),
+        usecols=usecols, engine='c', encoding=encoding, na_values=NA_VALUES,
+        skip_blank_lines=True)
+    try:
+        data = pd.read_csv(csvfile, dtype='float64', **read_csv_kwargs)
+    except ValueError:
+        csvfile.seek(data_offset)
+        with warnings.catch_warnings():
+            # Columns with mixed types are expected here.
+            warnings.simplefilter('ignore', DtypeWarning)
+            data = pd.read_csv(csvfile, **read_csv_kwargs)
+    data.columns = [columns[colx] for colx in data.columns]
+    return data
+
+
+def _coerce_to_numeric(data):
+    """
+    Convert in place the columns of the dataframe that are not numerical
+    yet to numerical values in a single vectorized pass per column.
+
+    The NA_TOKENS values are set to nan and the other values that can't be
+    converted are coerced to nan. Return a dictionary with the number of
+    coerced values for each column.
+    """
+    coerced_counts = OrderedDict()
+    for column in data.columns:
+        values = data[column]
+        if values.dtype.kind in 'fiub':
+            coerced_counts[column] = 0
+            continue
+        isnull = values.isnull()
+        strings = values.astype(str).str.strip()
+        isnull |= strings.str.lower().isin(NA_TOKENS)
+        numerics = pd.to_numeric(strings.where(~isnull), errors='coerce')
+        coerced_counts[column] = int((numerics.isnull() & ~isnull).sum())
+        data[column] = numerics
+    return coerced_counts
+
+
+def _match_column_name(column):
+    """
+    Return the name of the weather variable matching the label of the
+    column of a weather datafile or None if there is no match.
+    """
+    column_names_regexes = OrderedDict([
+        ('Year', r'(year)'),
+        ('Month', r'(month)'),
+        ('Day', r'(day)'),
+        ('Tmax', r'(maxtemp)'),
+        ('Tmin', r'(mintemp)'),
+        ('Tavg', r'(meantemp)'),
+        ('Ptot', r'(totalprecip)'),
+        ('PET', r'(etp|evapo)'),
+        ('Rain', r'(rain)'),
+        ('Snow', r'(snow)')])
+    column_ = str(column).replace(" ", "").replace("_", "")
+    for key, regex in column_names_regexes.items():
+        if re.search(regex, column_, re.IGNORECASE):
+            return key
+    return None
+
+
+def _format_cell_value(value):
+    """
+    Return the value of a cell of an Excel sheet so that whole numbers,
+    which are stored as floats by Excel, are formatted as integers.
+    """
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
 def open_weather_log(fname):
     """
     Open the csv file and try to guess the delimiter.
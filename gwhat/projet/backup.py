@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""
+Incremental backups of the project hdf5 files.
+
+Each water level and weather dataset of a project has a revision number
+that is set from a counter saved in the root attributes of the project each
+time the dataset is modified. Only the datasets whose revision differs from
+the one of their copy in the backup file are copied when the project is
+backed up, so that the backup of large projects takes a time proportional
+to the size of the datasets that were modified since the last backup.
+"""
+
+# ---- Standard library imports
+from collections import namedtuple
+import os
+import os.path as osp
+import shutil
+import tempfile
+
+# ---- Third party imports
+import h5py
+
+# The groups of the projects whose datasets are backed up incrementally.
+DATASET_GROUPS = ('wldsets', 'wxdsets')
+
+# The root attribute of the backup files in which the revision counter of
+# the project is saved once a backup is completed.
+BACKUP_REVISION_ATTR = 'backup_revision'
+
+# The backup file is rewritten from scratch when it is larger than this
+# number of times the size of the project, to reclaim the space that was
+# used by the datasets that were deleted or replaced in the backup.
+MAX_BACKUP_SIZE_RATIO = 2
+
+BackupResult = namedtuple('BackupResult', ['full', 'copied', 'deleted'])
+BackupResult.__doc__ = """
+The result of a project backup.
+
+Full is whether the backup file was rewritten from scratch, copied is the
+list of the paths of the datasets that were copied in the backup and
+deleted the list of the paths of the datasets that were deleted from
+the backup.
+"""
+
+
+def get_revision(h5item):
+    """Return the revision number of the hdf5 item of a project."""
+    return int(h5item.attrs.get('revision', 0))
+
+
+def increment_revision(h5grp):
+    """
+    Increment the revision counter of the project and set the revision
+    number of the hdf5 group of the project and of its parent groups to
+    the new value of the counter.
+    """
+    revision = get_revision(h5grp.file) + 1
+    while h5grp.name != '/':
+        h5grp.attrs['revision'] = revision
+        h5grp = h5grp.parent
+    h5grp.file.attrs['revision'] = revision
+
+
+def backup_project(h5file, filename):
+    """
+    Backup the project hdf5 file to the specified filename and return
+    a BackupResult.
+
+    Only the datasets that were modified since the last backup are copied
+    if the backup file was completed by a previous backup. Otherwise, the
+    project is backed up from scratch in a temporary file that replaces the
+    backup file only once it is completely written.
+    """
+    h5file.flush()
+    if _is_backup_incremental(h5file, filename):
+        with h5py.File(filename, mode='a') as backup:
+            return _sync_project(h5file, backup, full=False)
+
+    fd, tmpfilename = tempfile.mkstemp(
+        suffix='.bak', dir=osp.dirname(osp.abspath(filename)))
+    os.close(fd)
+    try:
+        with _create_backup_file(tmpfilename) as backup:
+            result = _sync_project(h5file, backup, full=True)
+        # The temporary file is created readable and writable only by its
+        # owner, so the permissions of the backup file are preserved or
+        # set from the ones of the project file.
+        shutil.copymode(
+            filename if osp.exists(filename) else h5file.filename,
+            tmpfilename)
+        os.replace(tmpfilename, filename)
+    finally:
+        if osp.exists(tmpfilename):
+            os.remove(tmpfilename)
+    return result
+
+
+def _create_backup_file(filename):
+    """
+    Create the backup hdf5 file, tracking its free space if it is supported
+    by h5py.
+    """
+    try:
+        # Tracking the free space of the backup file across sessions allows
+        # to reuse the space of the datasets that are replaced in
+        # subsequent incremental backups.
+        return h5py.File(filename, mode='w', libver=('v110', 'latest'),
+                         fs_strategy='fsm', fs_persist=True)
+    except TypeError:
+        # The fs_strategy and fs_persist keywords were added in h5py 3.0.
+        return h5py.File(filename, mode='w')
+
+
+def _is_backup_incremental(h5file, filename):
+    """
+    Return whether the project hdf5 file can be backed up incrementally in
+    the backup file.
+    """
+    if not osp.exists(filename):
+        return False
+    if (osp.getsize(filename) >
+            MAX_BACKUP_SIZE_RATIO * max(osp.getsize(h5file.filename), 1)):
+        return False
+    try:
+        with h5py.File(filename, mode='r') as backup:
+            # The backup revision is removed from the backup file while
+            # it is updated, so it is missing if the last backup did not
+            # complete or if the backup was not made incrementally.
+            return (BACKUP_REVISION_ATTR in backup.attrs and
+                    get_revision(backup) <= get_revision(h5file))
+    except (OSError, RuntimeError):
+        return False
+
+
+def _sync_project(h5file, backup, full):
+    """
+    Copy in the backup the datasets of the project hdf5 file whose revision
+    differs from their copy in the backup and delete from the backup the
+    datasets that do not exist anymore in the project.
+    """
+    if BACKUP_REVISION_ATTR in backup.attrs:
+        del backup.attrs[BACKUP_REVISION_ATTR]
+        backup.flush()
+
+    copied = []
+    deleted = []
+    for key in h5file.keys():
+        if key not in DATASET_GROUPS:
+            if key in backup:
+                del backup[key]
+            backup.copy(h5file[key], key)
+            continue
+        dst_grp = backup.require_group(key)
+        _copy_attrs(h5file[key], dst_grp)
+        src_names = list(h5file[key].keys())
+        for name in list(dst_grp.keys()):
+            if name not in src_names:
+                del dst_grp[name]
+                deleted.append('{}/{}'.format(key, name))
+        for name in src_names:
+            if name in dst_grp:
+                if (get_revision(dst_grp[name]) ==
+                        get_revision(h5file[key][name])):
+                    continue
+                del dst_grp[name]
+            dst_grp.copy(h5file[key][name], name)
+            copied.append('{}/{}'.format(key, name))
+    for key in list(backup.keys()):
+        if key not in h5file:
+            del backup[key]
+
+    _copy_attrs(h5file, backup)
+    backup.attrs[BACKUP_REVISION_ATTR] = get_revision(h5file)
+    backup.flush()
+    return BackupResult(full, copied, deleted)
+
+
+def _copy_attrs(src, dst):
+    """Replace the attributes of the destination by those of the source."""
+    for key in list(dst.attrs.keys()):
+        if key not in src.attrs:
+            del dst.attrs[key]
+    for key, value in src.attrs.items():
+        dst.attrs[key] = value
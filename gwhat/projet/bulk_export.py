@@ -0,0 +1,365 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""
+An API and a command line interface to export the results of all the wells
+and weather stations of a project at once.
+
+The results are exported in parallel in a pool of processes that open the
+project in read-only mode. The files are written in a directory with one
+sub-directory per well and per weather station, or in a zip archive if the
+output path ends with '.zip', in which case the files are added to the
+archive by the main process as soon as they are exported.
+
+Usage, from the command line:
+    python -m gwhat.projet.bulk_export project.gwt results.zip --formats csv
+"""
+
+# ---- Standard library imports
+import argparse
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import contextlib
+import io
+import multiprocessing
+import os
+import os.path as osp
+from shutil import rmtree
+import tempfile
+from time import perf_counter
+import warnings
+import zipfile
+
+# ---- Local imports
+from gwhat.projet.reader_projet import ProjetReader
+
+# The results that can be exported for the water level and weather datasets
+# and the name of the files in which they are saved.
+WLDSET_RESULTS = {
+    'mrc': 'mrc',
+    'brf': 'brf',
+    'glue water levels': 'glue_water_levels',
+    'glue budget': 'glue_monthly_budget',
+    'glue likelihood': 'glue_likelihood_measures'}
+WXDSET_RESULTS = {
+    'weather daily': 'weather_daily',
+    'weather monthly': 'weather_monthly',
+    'weather yearly': 'weather_yearly'}
+RESULTS = list(WLDSET_RESULTS) + list(WXDSET_RESULTS)
+
+EXPORT_FORMATS = ['csv', 'tsv', 'xls', 'xlsx']
+
+# The sub-directories in which the results of the wells and of the weather
+# stations are saved.
+WLDSETS_DIRNAME = 'wells'
+WXDSETS_DIRNAME = 'weather stations'
+
+ExportTask = namedtuple('ExportTask', ['key', 'name', 'result', 'filename'])
+ExportTask.__doc__ = """
+The export of a result of a dataset of a project.
+
+The key is the group of the dataset in the project, either 'wldsets' or
+'wxdsets', and the filename is the path of the exported file, relative to
+the output directory and without extension.
+"""
+
+ExportReport = namedtuple('ExportReport', [
+    'name', 'result', 'filenames', 'status', 'export_time', 'size',
+    'messages'])
+ExportReport.__doc__ = """
+The report of the export of a result of a dataset in one or more formats.
+
+The status is either 'exported' or 'failed', the filenames are the paths
+of the exported files relative to the output directory, the export time is
+in seconds and the size is the total size of the exported files in bytes.
+"""
+
+# The project opened in read-only mode by each worker process.
+_WORKER_PROJECT = None
+
+
+# ---- API
+def bulk_export_results(filename, outpath, results=None, formats=('csv',),
+                        wldsets=None, wxdsets=None, max_workers=None,
+                        callback=None):
+    """
+    Export the results of the water level and weather datasets of the
+    project and return a list with the ExportReport of each exported
+    result, in the order of the datasets and results.
+
+    Parameters
+    ----------
+    filename : str
+        The path of the project file.
+    outpath : str
+        The directory in which the results are exported, or the path of a
+        zip archive if it ends with '.zip'.
+    results : list of str
+        The results to export. All the results of RESULTS are exported
+        if None. Only the results that exist for a dataset are exported.
+    formats : list of str
+        The formats in which each result is exported, among EXPORT_FORMATS.
+    wldsets, wxdsets : list of str
+        The names of the water level and weather datasets whose results are
+        exported. All the datasets of the project are exported if None.
+    max_workers : int
+        The maximum number of processes used to export the results. The
+        number of processors of the machine is used if None.
+    callback : callable
+        A function that is called in the main process with the report of
+        each result as soon as it is exported.
+    """
+    results = RESULTS if results is None else list(results)
+    for result in results:
+        if result not in RESULTS:
+            raise ValueError("Unknown result '{}'.".format(result))
+    for fmt in formats:
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError("Unknown format '{}'.".format(fmt))
+    filename = osp.abspath(filename)
+    tasks = get_export_tasks(filename, results, wldsets, wxdsets)
+
+    archive = None
+    if outpath.lower().endswith('.zip'):
+        archive = zipfile.ZipFile(
+            outpath, mode='w', compression=zipfile.ZIP_DEFLATED)
+        outdir = tempfile.mkdtemp(dir=osp.dirname(osp.abspath(outpath)))
+    else:
+        outdir = osp.abspath(outpath)
+
+    reports = {}
+    try:
+        # The 'spawn' start method is used so that the worker processes do
+        # not inherit the handle of the project hdf5 file.
+        with ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker, initargs=(filename,)) as executor:
+            futures = {
+                executor.submit(export_result, task, outdir, formats): task
+                for task in tasks}
+            for future in as_completed(futures):
+                task = futures[future]
+                try:
+                    report = future.result()
+                except Exception as error:
+                    # This happens if the worker process died.
+                    report = ExportReport(
+                        task.name, task.result, [], 'failed', 0, 0,
+                        [str(error)])
+                if archive is not None:
+                    for relpath in report.filenames:
+                        abspath = osp.join(outdir, relpath)
+                        archive.write(abspath, relpath)
+                        os.remove(abspath)
+                reports[task] = report
+                if callback is not None:
+                    callback(report)
+    finally:
+        if archive is not None:
+            archive.close()
+            rmtree(outdir, ignore_errors=True)
+    return [reports[task] for task in tasks]
+
+
+def get_export_tasks(filename, results, wldsets=None, wxdsets=None):
+    """
+    Return the list of the ExportTask of the results that exist for the
+    water level and weather datasets of the project.
+
+    The results of the water level datasets are found from the index of
+    the project, so that the datasets do not need to be read.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        projet = ProjetReader(filename, readonly=True)
+        try:
+            wlindex = projet.get_wldsets_index()
+            wxindex = projet.get_wxdsets_index()
+        finally:
+            projet.close()
+
+    tasks = []
+    for name in (wlindex.index if wldsets is None else wldsets):
+        if name not in wlindex.index:
+            raise ValueError(
+                "There is no water level dataset named '{}'.".format(name))
+        row = wlindex.loc[name]
+        dirname = osp.join(WLDSETS_DIRNAME, name)
+        for result in WLDSET_RESULTS:
+            if result not in results:
+                continue
+            basename = WLDSET_RESULTS[result]
+            if result == 'mrc' and row['MRC']:
+                tasks.append(ExportTask(
+                    'wldsets', name, result, osp.join(dirname, basename)))
+            elif result == 'brf':
+                tasks.extend(ExportTask(
+                    'wldsets', name, 'brf {}'.format(i + 1),
+                    osp.join(dirname, '{}_{}'.format(basename, i + 1)))
+                    for i in range(row['BRF']))
+            elif result.startswith('glue') and row['GLUE']:
+                tasks.append(ExportTask(
+                    'wldsets', name, result, osp.join(dirname, basename)))
+    for name in (wxindex.index if wxdsets is None else wxdsets):
+        if name not in wxindex.index:
+            raise ValueError(
+                "There is no weather dataset named '{}'.".format(name))
+        dirname = osp.join(WXDSETS_DIRNAME, name)
+        for result in WXDSET_RESULTS:
+            if result in results:
+                tasks.append(ExportTask(
+                    'wxdsets', name, result,
+                    osp.join(dirname, WXDSET_RESULTS[result])))
+    return tasks
+
+
+def _init_worker(filename):
+    """Open the project in read-only mode in the worker process."""
+    global _WORKER_PROJECT
+    with contextlib.redirect_stdout(io.StringIO()):
+        _WORKER_PROJECT = ProjetReader(filename, readonly=True)
+
+
+def export_result(task, outdir, formats, projet=None):
+    """
+    Export the result of the task in the output directory in each of the
+    specified formats and return the ExportReport of the result.
+
+    The project opened by the worker process is used if no project is
+    provided.
+    """
+    projet = _WORKER_PROJECT if projet is None else projet
+    t0 = perf_counter()
+    filenames = []
+    stdout = io.StringIO()
+    with contextlib.redirect_stdout(stdout), \
+            warnings.catch_warnings(record=True) as caught_warnings:
+        warnings.simplefilter('always')
+        try:
+            if task.key == 'wldsets':
+                dataset = projet.get_wldset(task.name)
+            else:
+                dataset = projet.get_wxdset(task.name)
+            if dataset is None:
+                raise ValueError("The dataset does not exist.")
+            save_result = _get_result_saver(dataset, task.result)
+            os.makedirs(osp.join(outdir, osp.dirname(task.filename)),
+                        exist_ok=True)
+            for fmt in formats:
+                relpath = '{}.{}'.format(task.filename, fmt)
+                save_result(osp.join(outdir, relpath))
+                filenames.append(relpath)
+        except Exception as error:
+            status = 'failed'
+            print("ERROR: {}".format(error))
+        else:
+            status = 'exported'
+    export_time = perf_counter() - t0
+
+    size = sum(osp.getsize(osp.join(outdir, relpath)) for
+               relpath in filenames)
+    messages = [str(warning.message) for warning in caught_warnings]
+    messages += [line.strip() for line in stdout.getvalue().splitlines() if
+                 line.strip() and line.strip('-').strip()]
+    return ExportReport(task.name, task.result, filenames, status,
+                        export_time, size, messages)
+
+
+def _get_result_saver(dataset, result):
+    """
+    Return a function that saves the result of the dataset to the file
+    whose name is passed as argument.
+    """
+    if result == 'mrc':
+        return dataset.save_mrc_tofile
+    elif result.startswith('brf'):
+        index = int(result.split()[-1]) - 1
+        return lambda filename: dataset.export_brf_to_csv(filename, index)
+    elif result.startswith('glue'):
+        gluedf = dataset.get_glue_at(-1)
+        if gluedf is None:
+            raise ValueError("There is no GLUE results.")
+        return {'glue water levels': gluedf.save_glue_waterlvl_to_file,
+                'glue budget': gluedf.save_mly_glue_budget_to_file,
+                'glue likelihood': gluedf.save_glue_likelyhood_measures
+                }[result]
+    else:
+        time_frame = result.split()[-1]
+        return lambda filename: dataset.export_dataset_to_file(
+            filename, time_frame)
+
+
+def format_export_reports(reports, elapsed=None):
+    """
+    Return the export reports formatted as a text table, followed by the
+    throughput of the export if the elapsed time in seconds is provided.
+    """
+    lines = ['{:<10}{:>10}{:>12}  {:<20}{:<30}'.format(
+        'Status', 'Time (s)', 'Size (kB)', 'Result', 'Dataset')]
+    for report in reports:
+        lines.append('{:<10}{:>10.2f}{:>12.1f}  {:<20}{:<30}'.format(
+            report.status, report.export_time, report.size / 1024,
+            report.result, report.name))
+        lines.extend('    ' + message for message in report.messages)
+    if elapsed is not None:
+        nfiles = sum(len(report.filenames) for report in reports)
+        size = sum(report.size for report in reports) / 1024**2
+        lines.append(
+            'Exported {} files ({:0.1f} MB) in {:0.1f} sec: {:0.1f} '
+            'files/sec, {:0.1f} MB/sec.'.format(
+                nfiles, size, elapsed, nfiles / max(elapsed, 1e-9),
+                size / max(elapsed, 1e-9)))
+    return '\n'.join(lines)
+
+
+# ---- CLI
+def main(argv=None):
+    """Export the results of a project from the command line."""
+    parser = argparse.ArgumentParser(
+        prog='python -m gwhat.projet.bulk_export',
+        description=("Export the results of all the wells and weather "
+                     "stations of a GWHAT project at once."))
+    parser.add_argument(
+        'project', help="The path of the project file (*.gwt).")
+    parser.add_argument(
+        'output', help=("The directory in which the results are exported, "
+                        "or the path of a zip archive (*.zip)."))
+    parser.add_argument(
+        '--results', nargs='+', choices=RESULTS, default=None,
+        metavar='RESULT',
+        help="The results to export, among {}. All by default.".format(
+            ', '.join("'{}'".format(result) for result in RESULTS)))
+    parser.add_argument(
+        '--formats', nargs='+', choices=EXPORT_FORMATS, default=['csv'],
+        help="The formats in which the results are exported.")
+    parser.add_argument(
+        '--wl', nargs='+', default=None, metavar='NAME',
+        help="The water level datasets to export. All by default.")
+    parser.add_argument(
+        '--wx', nargs='+', default=None, metavar='NAME',
+        help="The weather datasets to export. All by default.")
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=None,
+        help="The number of processes used to export the results.")
+    args = parser.parse_args(argv)
+
+    t0 = perf_counter()
+    reports = bulk_export_results(
+        args.project, args.output, results=args.results,
+        formats=args.formats, wldsets=args.wl, wxdsets=args.wx,
+        max_workers=args.jobs,
+        callback=lambda report: print('{} {} {}'.format(
+            report.status, report.name, report.result)))
+    print(format_export_reports(reports, perf_counter() - t0))
+    return 0 if all(report.status != 'failed' for report in reports) else 1
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main())
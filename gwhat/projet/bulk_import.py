@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""
+An API and a command line interface to import many water level and weather
+datafiles in a project at once.
+
+The datafiles are parsed in parallel in a pool of processes. The parsed
+datasets are sent back to the main process, which is the only one that
+owns the handle of the project hdf5 file and writes them one at a time as
+soon as they are available.
+
+Usage, from the command line:
+    python -m gwhat.projet.bulk_import project.gwt --wl *.csv --wx *.xlsx
+"""
+
+# ---- Standard library imports
+import argparse
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import contextlib
+import io
+import multiprocessing
+import os.path as osp
+from time import perf_counter
+import warnings
+
+# ---- Local imports
+from gwhat.utils.filecache import ParsedFileCache
+from gwhat.meteo.weather_reader import WXDataFrame
+from gwhat.projet.reader_waterlvl import WLDataFrame
+from gwhat.projet.reader_projet import (
+    INVALID_CHARS, ProjetReader, is_dsetname_valid)
+
+
+WLDATATYPE = 'water level'
+WXDATATYPE = 'daily weather'
+
+ON_EXISTS_OPTIONS = ['rename', 'replace', 'skip']
+
+ImportReport = namedtuple('ImportReport', [
+    'filename', 'datatype', 'name', 'status', 'parse_time', 'write_time',
+    'messages'])
+ImportReport.__doc__ = """
+The report of the import of a datafile in a project.
+
+The status is either 'imported', 'skipped' or 'failed'. The parse and
+write times are in seconds and the messages are the warnings and the
+messages that were issued while the datafile was parsed and written.
+"""
+
+
+# ---- API
+def bulk_import_datasets(projet, wlfilenames=(), wxfilenames=(),
+                         max_workers=None, on_exists='rename',
+                         callback=None, cachedir=None):
+    """
+    Import the water level and weather datafiles in the project and return
+    a list with the ImportReport of each datafile, in the order in which
+    the datafiles were provided.
+
+    Parameters
+    ----------
+    projet : ProjetReader
+        The project in which the datasets are saved.
+    wlfilenames : list of str
+        The absolute paths of the water level datafiles to import.
+    wxfilenames : list of str
+        The absolute paths of the weather datafiles to import.
+    max_workers : int
+        The maximum number of processes used to parse the datafiles. The
+        number of processors of the machine is used if None.
+    on_exists : str
+        What to do when a dataset with the same name already exists in the
+        project. If 'rename', a number is appended to the name of the new
+        dataset, if 'replace', the existing dataset is deleted and if
+        'skip', the datafile is not imported.
+    callback : callable
+        A function that is called in the main process with the report of
+        each datafile as soon as it is imported.
+    cachedir : str
+        The directory of a ParsedFileCache used to skip the parsing of the
+        datafiles that did not change since they were last parsed.
+    """
+    if on_exists not in ON_EXISTS_OPTIONS:
+        raise ValueError("on_exists must be one of {}.".format(
+            ON_EXISTS_OPTIONS))
+    datafiles = ([(filename, WLDATATYPE) for filename in wlfilenames] +
+                 [(filename, WXDATATYPE) for filename in wxfilenames])
+
+    reports = {}
+    # The 'spawn' start method is used so that the worker processes do not
+    # inherit the handle of the project hdf5 file.
+    with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context('spawn')) as executor:
+        futures = {
+            executor.submit(parse_datafile, filename, datatype, cachedir):
+            (filename, datatype) for filename, datatype in datafiles}
+        for future in as_completed(futures):
+            filename, datatype = futures[future]
+            try:
+                dataset, parse_time, messages = future.result()
+            except Exception as error:
+                # This happens if the worker process died or if the parsed
+                # dataset could not be sent back to the main process.
+                dataset, parse_time, messages = None, 0, [str(error)]
+            report = _write_dataset(
+                projet, filename, datatype, dataset, parse_time, messages,
+                on_exists)
+            reports[(filename, datatype)] = report
+            if callback is not None:
+                callback(report)
+    return [reports[datafile] for datafile in datafiles]
+
+
+def parse_datafile(filename, datatype, cachedir=None):
+    """
+    Parse the water level or weather datafile and return the dataset,
+    the time taken in seconds to parse it and a list of the warnings and
+    messages that were issued.
+
+    If the directory of a ParsedFileCache is provided, the dataset is loaded
+    from the cache if the datafile did not change since it was last parsed.
+
+    The dataset is None if the datafile could not be parsed.
+    """
+    t0 = perf_counter()
+    cache = None if cachedir is None else ParsedFileCache(cachedir)
+    stdout = io.StringIO()
+    with contextlib.redirect_stdout(stdout), \
+            warnings.catch_warnings(record=True) as caught_warnings:
+        warnings.simplefilter('always')
+        try:
+            if not osp.exists(filename):
+                raise ValueError("The datafile does not exist.")
+            if datatype == WLDATATYPE:
+                dataset = WLDataFrame(filename, cache=cache)
+                if dataset.data is None:
+                    raise ValueError(
+                        "The water level datafile is not formatted "
+                        "correctly.")
+            elif datatype == WXDATATYPE:
+                dataset = WXDataFrame(filename, cache=cache)
+            else:
+                raise ValueError(
+                    "Unknown datatype '{}'.".format(datatype))
+        except Exception as error:
+            dataset = None
+            print("ERROR: {}".format(error))
+    parse_time = perf_counter() - t0
+
+    messages = [str(warning.message) for warning in caught_warnings]
+    messages += [line.strip() for line in stdout.getvalue().splitlines() if
+                 line.strip() and line.strip('-').strip()]
+    return dataset, parse_time, messages
+
+
+def get_dataset_name(dataset, datatype, filename):
+    """
+    Return the name of the dataset in the project from the name of the well
+    or of the station, with the invalid characters replaced, or from the
+    name of the datafile if the name of the well or station is empty.
+    """
+    if datatype == WLDATATYPE:
+        name = str(dataset['Well'])
+    else:
+        name = str(dataset.metadata['Station Name'])
+    if not name.strip():
+        name = osp.splitext(osp.basename(filename))[0]
+    for char in INVALID_CHARS:
+        name = name.replace(char, '_')
+    return name
+
+
+def _write_dataset(projet, filename, datatype, dataset, parse_time,
+                   messages, on_exists):
+    """
+    Write the parsed dataset in the project and return the report of
+    the import of the datafile.
+    """
+    if dataset is None:
+        return ImportReport(filename, datatype, None, 'failed', parse_time,
+                            0, messages)
+
+    if datatype == WLDATATYPE:
+        dsetnames = projet.wldsets
+        add_dset, del_dset = projet.add_wldset, projet.del_wldset
+    else:
+        dsetnames = projet.wxdsets
+        add_dset, del_dset = projet.add_wxdset, projet.del_wxdset
+
+    name = get_dataset_name(dataset, datatype, filename)
+    if not is_dsetname_valid(name):
+        messages.append("The name of the dataset is not valid.")
+        return ImportReport(filename, datatype, name, 'failed', parse_time,
+                            0, messages)
+    if name in dsetnames:
+        if on_exists == 'skip':
+            messages.append(
+                "A dataset named '{}' already exists.".format(name))
+            return ImportReport(filename, datatype, name, 'skipped',
+                                parse_time, 0, messages)
+        elif on_exists == 'rename':
+            i = 2
+            while '{} ({})'.format(name, i) in dsetnames:
+                i += 1
+            name = '{} ({})'.format(name, i)
+
+    t0 = perf_counter()
+    stdout = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(stdout):
+            if name in dsetnames:
+                del_dset(name)
+            add_dset(name, dataset)
+    except Exception as error:
+        messages.append("Unable to save the dataset: {}".format(error))
+        status = 'failed'
+    else:
+        status = 'imported'
+    write_time = perf_counter() - t0
+    if datatype == WLDATATYPE and name not in projet.wldsets:
+        # add_wldset does not raise when it fails to save the dataset.
+        status = 'failed'
+        messages.append("Unable to save the dataset.")
+    return ImportReport(filename, datatype, name, status, parse_time,
+                        write_time, messages)
+
+
+def format_import_reports(reports):
+    """Return the import reports formatted as a text table."""
+    lines = ['{:<10}{:>10}{:>10}  {:<16}{:<30}{}'.format(
+        'Status', 'Parse (s)', 'Write (s)', 'Type', 'Dataset', 'Filename')]
+    for report in reports:
+        lines.append('{:<10}{:>10.2f}{:>10.2f}  {:<16}{:<30}{}'.format(
+            report.status, report.parse_time, report.write_time,
+            report.datatype, report.name or '', report.filename))
+        lines.extend('    ' + message for message in report.messages)
+    return '\n'.join(lines)
+
+
+# ---- CLI
+def main(argv=None):
+    """Import datafiles in a project from the command line."""
+    parser = argparse.ArgumentParser(
+        prog='python -m gwhat.projet.bulk_import',
+        description=("Import many water level and weather datafiles in "
+                     "a GWHAT project at once."))
+    parser.add_argument(
+        'project', help="The path of the project file (*.gwt).")
+    parser.add_argument(
+        '--wl', nargs='+', default=[], metavar='FILE',
+        help="The water level datafiles to import.")
+    parser.add_argument(
+        '--wx', nargs='+', default=[], metavar='FILE',
+        help="The daily weather datafiles to import.")
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=None,
+        help="The number of processes used to parse the datafiles.")
+    parser.add_argument(
+        '--on-exists', choices=ON_EXISTS_OPTIONS, default='rename',
+        help="What to do when a dataset with the same name already exists.")
+    parser.add_argument(
+        '--cache-dir', default=None, metavar='DIR',
+        help=("The directory of a cache in which the parsed datafiles are "
+              "stored, so that unchanged datafiles are not parsed again."))
+    args = parser.parse_args(argv)
+
+    projet = ProjetReader(osp.abspath(args.project))
+    try:
+        reports = bulk_import_datasets(
+            projet,
+            [osp.abspath(filename) for filename in args.wl],
+            [osp.abspath(filename) for filename in args.wx],
+            max_workers=args.jobs, on_exists=args.on_exists,
+            cachedir=args.cache_dir,
+            callback=lambda report: print('{} {}'.format(
+                report.status, report.filename)))
+    finally:
+        projet.close()
+    print(format_import_reports(reports))
+    return 0 if all(report.status != 'failed' for report in reports) else 1
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main())
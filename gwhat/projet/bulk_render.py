@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""
+An API and a command line interface to render the hydrographs of the wells
+of a project without the graphical user interface.
+
+The hydrographs are drawn with the layout saved for each well in the
+project, or with a layout fitted to the data of the well if none was saved,
+and are rendered with the Agg backend of matplotlib. The hydrographs of
+many wells are rendered in parallel in a pool of processes that open the
+project in read-only mode.
+
+Usage, from the command line:
+    python -m gwhat.projet.bulk_render project.gwt hydrographs --formats pdf
+"""
+
+# ---- Standard library imports
+import argparse
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import contextlib
+import io
+import multiprocessing
+import os
+import os.path as osp
+from time import perf_counter
+import warnings
+
+# ---- Third party imports
+import matplotlib as mpl
+
+# ---- Local imports
+from gwhat.hydrograph4 import Hydrograph
+from gwhat.projet.reader_projet import ProjetReader
+
+RENDER_FORMATS = ['pdf', 'png', 'svg']
+
+RenderReport = namedtuple('RenderReport', [
+    'name', 'wxdset', 'filenames', 'status', 'render_time', 'size',
+    'messages'])
+RenderReport.__doc__ = """
+The report of the rendering of the hydrograph of a well in one or more
+formats.
+
+The wxdset is the name of the weather dataset drawn on the hydrograph, if
+any, the status is either 'rendered' or 'failed', the filenames are the
+paths of the rendered files relative to the output directory, the render
+time is in seconds and the size is the total size of the rendered files
+in bytes.
+"""
+
+# The project opened in read-only mode by each worker process.
+_WORKER_PROJECT = None
+
+
+# ---- API
+def create_hydrograph(wldset, wxdset=None, layout=None):
+    """
+    Create and return the Hydrograph figure of a water level dataset, drawn
+    with the weather dataset and the layout if provided.
+
+    The scales of the water levels and the time are fitted to the data of
+    the water level dataset if no layout is provided.
+    """
+    hydrograph = Hydrograph()
+    hydrograph.set_wldset(wldset)
+    hydrograph.set_wxdset(wxdset)
+    hydrograph.gluedf = wldset.get_glue_at(-1)
+    if layout is None:
+        hydrograph.best_fit_waterlvl()
+        hydrograph.best_fit_time(wldset.xldates)
+    else:
+        hydrograph.set_layout(layout)
+    hydrograph.generate_hydrograph()
+    return hydrograph
+
+
+def render_hydrograph(filename, wldset, wxdset=None, layout=None):
+    """
+    Render the hydrograph of a water level dataset, drawn with the weather
+    dataset and the layout if provided, to a pdf, png or svg file and
+    return the Hydrograph figure.
+    """
+    ext = osp.splitext(filename)[1][1:].lower()
+    if ext not in RENDER_FORMATS:
+        raise ValueError("Unknown format '{}'.".format(ext))
+    hydrograph = create_hydrograph(wldset, wxdset, layout)
+    hydrograph.savefig(filename)
+    return hydrograph
+
+
+def get_hydrograph_wxdset(projet, wldset, layout=None):
+    """
+    Return the name of the weather dataset to draw on the hydrograph of the
+    water level dataset, or None if there is no weather dataset in the
+    project.
+
+    This is the weather dataset saved in the layout if it still exists in
+    the project, else the one whose station is the closest to the well,
+    preferably with a data period that overlaps the one of the well.
+    """
+    if layout is not None and layout['wxdset'] in projet.wxdsets:
+        return layout['wxdset']
+
+    index = projet.get_wldsets_index()
+    if wldset.name not in index.index:
+        return None
+    row = index.loc[wldset.name]
+    closest_stations = projet.get_closest_wxdsets(
+        row['Latitude'], row['Longitude'], start=row['Start'],
+        end=row['End'])
+    if not closest_stations:
+        closest_stations = projet.get_closest_wxdsets(
+            row['Latitude'], row['Longitude'])
+    return closest_stations[0] if closest_stations else None
+
+
+def bulk_render_hydrographs(filename, outdir, wldsets=None, formats=('pdf',),
+                            max_workers=None, callback=None):
+    """
+    Render the hydrographs of the water level datasets of the project and
+    return a list with the RenderReport of each well, in the order of the
+    datasets.
+
+    Parameters
+    ----------
+    filename : str
+        The path of the project file.
+    outdir : str
+        The directory in which the hydrographs are rendered. The files are
+        named after the water level datasets.
+    wldsets : list of str
+        The names of the water level datasets whose hydrographs are
+        rendered. All the datasets of the project are rendered if None.
+    formats : list of str
+        The formats in which each hydrograph is rendered, among
+        RENDER_FORMATS.
+    max_workers : int
+        The maximum number of processes used to render the hydrographs. The
+        number of processors of the machine is used if None.
+    callback : callable
+        A function that is called in the main process with the report of
+        each well as soon as its hydrograph is rendered.
+    """
+    for fmt in formats:
+        if fmt not in RENDER_FORMATS:
+            raise ValueError("Unknown format '{}'.".format(fmt))
+    filename = osp.abspath(filename)
+    outdir = osp.abspath(outdir)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        projet = ProjetReader(filename, readonly=True)
+        try:
+            names = list(projet.get_wldsets_index().index)
+        finally:
+            projet.close()
+    if wldsets is not None:
+        for name in wldsets:
+            if name not in names:
+                raise ValueError(
+                    "There is no water level dataset named '{}'.".format(name))
+        names = list(wldsets)
+
+    reports = {}
+    # The 'spawn' start method is used so that the worker processes do
+    # not inherit the handle of the project hdf5 file.
+    with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker, initargs=(filename,)) as executor:
+        futures = {
+            executor.submit(render_well_hydrograph, name, outdir, formats):
+            name for name in names}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                report = future.result()
+            except Exception as error:
+                # This happens if the worker process died.
+                report = RenderReport(
+                    name, None, [], 'failed', 0, 0, [str(error)])
+            reports[name] = report
+            if callback is not None:
+                callback(report)
+    return [reports[name] for name in names]
+
+
+def _init_worker(filename):
+    """
+    Select the Agg backend of matplotlib and open the project in read-only
+    mode in the worker process.
+    """
+    global _WORKER_PROJECT
+    mpl.use('Agg')
+    with contextlib.redirect_stdout(io.StringIO()):
+        _WORKER_PROJECT = ProjetReader(filename, readonly=True)
+
+
+def render_well_hydrograph(name, outdir, formats, projet=None):
+    """
+    Render the hydrograph of the water level dataset named name with its
+    saved layout in the output directory in each of the specified formats
+    and return the RenderReport of the well.
+
+    The project opened by the worker process is used if no project is
+    provided.
+    """
+    projet = _WORKER_PROJECT if projet is None else projet
+    t0 = perf_counter()
+    filenames = []
+    wxdset_name = None
+    stdout = io.StringIO()
+    with contextlib.redirect_stdout(stdout), \
+            warnings.catch_warnings(record=True) as caught_warnings:
+        warnings.simplefilter('always')
+        try:
+            wldset = projet.get_wldset(name)
+            if wldset is None:
+                raise ValueError("The dataset does not exist.")
+            layout = wldset.get_layout()
+            wxdset_name = get_hydrograph_wxdset(projet, wldset, layout)
+            wxdset = (None if wxdset_name is None else
+                      projet.get_wxdset(wxdset_name))
+            # The hydrograph is drawn once and saved in each format.
+            hydrograph = create_hydrograph(wldset, wxdset, layout)
+            os.makedirs(outdir, exist_ok=True)
+            for fmt in formats:
+                relpath = '{}.{}'.format(name, fmt)
+                hydrograph.savefig(osp.join(outdir, relpath))
+                filenames.append(relpath)
+        except Exception as error:
+            status = 'failed'
+            print("ERROR: {}".format(error))
+        else:
+            status = 'rendered'
+    render_time = perf_counter() - t0
+
+    size = sum(osp.getsize(osp.join(outdir, relpath)) for
+               relpath in filenames)
+    messages = [str(warning.message) for warning in caught_warnings]
+    messages += [line.strip() for line in stdout.getvalue().splitlines() if
+                 line.strip().startswith(('ERROR', 'WARNING'))]
+    return RenderReport(name, wxdset_name, filenames, status, render_time,
+                        size, messages)
+
+
+def format_render_reports(reports, elapsed=None):
+    """
+    Return the render reports formatted as a text table, followed by the
+    throughput of the rendering if the elapsed time in seconds is provided.
+    """
+    lines = ['{:<10}{:>10}{:>12}  {:<30}{:<30}'.format(
+        'Status', 'Time (s)', 'Size (kB)', 'Well', 'Weather')]
+    for report in reports:
+        lines.append('{:<10}{:>10.2f}{:>12.1f}  {:<30}{:<30}'.format(
+            report.status, report.render_time, report.size / 1024,
+            report.name, report.wxdset or ''))
+        lines.extend('    ' + message for message in report.messages)
+    if elapsed is not None:
+        nwells = len(reports)
+        lines.append(
+            'Rendered the hydrographs of {} wells in {:0.1f} sec: '
+            '{:0.2f} wells/sec.'.format(
+                nwells, elapsed, nwells / max(elapsed, 1e-9)))
+    return '\n'.join(lines)
+
+
+# ---- CLI
+def main(argv=None):
+    """Render the hydrographs of a project from the command line."""
+    parser = argparse.ArgumentParser(
+        prog='python -m gwhat.projet.bulk_render',
+        description=("Render the hydrographs of the wells of a GWHAT "
+                     "project with their saved layout."))
+    parser.add_argument(
+        'project', help="The path of the project file (*.gwt).")
+    parser.add_argument(
+        'output', help="The directory in which the hydrographs are saved.")
+    parser.add_argument(
+        '--formats', nargs='+', choices=RENDER_FORMATS, default=['pdf'],
+        help="The formats in which the hydrographs are rendered.")
+    parser.add_argument(
+        '--wl', nargs='+', default=None, metavar='NAME',
+        help="The water level datasets to render. All by default.")
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=None,
+        help="The number of processes used to render the hydrographs.")
+    args = parser.parse_args(argv)
+
+    t0 = perf_counter()
+    reports = bulk_render_hydrographs(
+        args.project, args.output, wldsets=args.wl, formats=args.formats,
+        max_workers=args.jobs,
+        callback=lambda report: print('{} {}'.format(
+            report.status, report.name)))
+    print(format_render_reports(reports, perf_counter() - t0))
+    return 0 if all(report.status != 'failed' for report in reports) else 1
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main())
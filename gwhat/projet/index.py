@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""
+An index of the metadata of the water level and weather datasets of a
+project, saved in the 'index' group of the project hdf5 file, so that the
+datasets can be listed, described and searched without reading the
+attributes and the data of each dataset.
+
+The index of a group of datasets is saved as a group with one dataset per
+column of the index and is loaded as a pandas dataframe indexed by the
+names of the datasets. The revision of the group of datasets at the time
+the index was saved is saved in the attributes of the index, so that an
+index that is not up-to-date can be detected and rebuilt.
+"""
+
+# ---- Third party imports
+import h5py
+import numpy as np
+import pandas as pd
+
+# ---- Local imports
+from gwhat.common.utils import calc_dist_from_coord
+from gwhat.projet.backup import get_revision
+
+INDEX_GROUP = 'index'
+
+# The columns of the indexes of the water level and weather datasets and
+# their dtype.
+WLDSETS_INDEX_COLUMNS = [
+    ('Well', 'object'),
+    ('Well ID', 'object'),
+    ('Municipality', 'object'),
+    ('Province', 'object'),
+    ('Latitude', 'float64'),
+    ('Longitude', 'float64'),
+    ('Elevation', 'float64'),
+    ('Start', 'datetime64[ns]'),
+    ('End', 'datetime64[ns]'),
+    ('Samples', 'int64'),
+    ('MRC', 'bool'),
+    ('GLUE', 'int64'),
+    ('BRF', 'int64'),
+    ('Size', 'int64')]
+WXDSETS_INDEX_COLUMNS = [
+    ('Station Name', 'object'),
+    ('Station ID', 'object'),
+    ('Location', 'object'),
+    ('Latitude', 'float64'),
+    ('Longitude', 'float64'),
+    ('Elevation', 'float64'),
+    ('Start', 'datetime64[ns]'),
+    ('End', 'datetime64[ns]'),
+    ('Samples', 'int64'),
+    ('Size', 'int64')]
+INDEX_COLUMNS = {'wldsets': WLDSETS_INDEX_COLUMNS,
+                 'wxdsets': WXDSETS_INDEX_COLUMNS}
+
+
+# ---- Rows
+def get_index_row(h5grp, key):
+    """
+    Return a dict with the values of the columns of the index for the
+    dataset saved in the hdf5 group, which is a dataset of the group of
+    the project with the specified key.
+    """
+    row = {}
+    for column, dtype in INDEX_COLUMNS[key]:
+        if dtype == 'object':
+            row[column] = str(h5grp.attrs.get(column, ''))
+        elif dtype == 'float64':
+            row[column] = _to_float(h5grp.attrs.get(column, np.nan))
+
+    times = h5grp['Time']
+    row['Samples'] = len(times)
+    if len(times):
+        # The first and last times are read separately, since h5py can't
+        # read a list of indexes that are not increasing.
+        row['Start'], row['End'] = (
+            np.array([times[0], times[-1]]).astype('int64')
+            .view('datetime64[ns]'))
+    else:
+        row['Start'] = row['End'] = np.datetime64('NaT', 'ns')
+
+    datasets = []
+    h5grp.visititems(
+        lambda name, item: datasets.append(item) if
+        isinstance(item, h5py.Dataset) else None)
+    row['Size'] = sum(dataset.id.get_storage_size() for dataset in datasets)
+
+    if key == 'wldsets':
+        row['MRC'] = bool('mrc' in h5grp and h5grp['mrc'].attrs['exists'])
+        row['GLUE'] = len(h5grp['glue']) if 'glue' in h5grp else 0
+        row['BRF'] = len(h5grp['brf']) if 'brf' in h5grp else 0
+    return row
+
+
+def _to_float(value):
+    """Return the value as a float or nan if it is not a number."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+# ---- Index
+def build_index(h5file, key):
+    """
+    Build the index of the datasets of the group of the project hdf5 file
+    with the specified key.
+    """
+    h5grp = h5file[key]
+    names = list(h5grp.keys())
+    return _format_index(pd.DataFrame(
+        [get_index_row(h5grp[name], key) for name in names],
+        index=pd.Index(names, dtype='object'),
+        columns=[column for column, dtype in INDEX_COLUMNS[key]]), key)
+
+
+def update_index(h5file, key, index, name):
+    """
+    Return the index of the datasets of the group of the project hdf5 file
+    with the specified key, with the row of the dataset with the specified
+    name updated, or removed if the dataset does not exist anymore.
+    """
+    index = index.drop(name, errors='ignore')
+    if name in h5file[key]:
+        index = pd.concat([index, pd.DataFrame(
+            [get_index_row(h5file[key][name], key)],
+            index=pd.Index([name], dtype='object'))])
+        index = _format_index(index.loc[sorted(index.index)], key)
+    return index
+
+
+def _format_index(index, key):
+    """Set the dtype of the columns of the index."""
+    return index.astype(dict(INDEX_COLUMNS[key]))
+
+
+def is_index_uptodate(h5file, key, revision):
+    """
+    Return whether an index of the datasets of the group of the project
+    hdf5 file with the specified key, which was built at the specified
+    revision of the group, is up-to-date.
+    """
+    return revision == get_revision(h5file[key])
+
+
+def load_index(h5file, key):
+    """
+    Load the index of the datasets of the group of the project hdf5 file
+    with the specified key and return it with the revision of the group at
+    the time the index was saved, or return None if the index was not
+    saved in the project or if its columns are not the ones expected.
+    """
+    try:
+        grp = h5file[INDEX_GROUP][key]
+    except KeyError:
+        return None
+    columns = INDEX_COLUMNS[key]
+    if set(grp.keys()) != {'name'} | {column for column, dtype in columns}:
+        return None
+    index = pd.DataFrame(index=pd.Index(
+        _read_strings(grp['name']), dtype='object'))
+    for column, dtype in columns:
+        if dtype == 'object':
+            index[column] = _read_strings(grp[column])
+        elif dtype.startswith('datetime64'):
+            index[column] = grp[column][...].astype('int64').view(dtype)
+        else:
+            index[column] = grp[column][...].astype(dtype)
+    return index, get_revision(grp)
+
+
+def _read_strings(dataset):
+    """Read the variable-length strings of the hdf5 dataset."""
+    # Variable-length strings are read as bytes with h5py >= 3.0.
+    return [value.decode('utf-8') if isinstance(value, bytes) else value
+            for value in dataset[...]]
+
+
+def save_index(h5file, key, index):
+    """
+    Save the index of the datasets of the group of the project hdf5 file
+    with the specified key.
+
+    The index is written in a new group that replaces the previous index
+    only once it is completely written, so that the index is either saved
+    completely or not at all.
+    """
+    grp = h5file.require_group(INDEX_GROUP)
+    tmpkey = key + '.tmp'
+    if tmpkey in grp:
+        del grp[tmpkey]
+    tmpgrp = grp.create_group(tmpkey)
+    strtype = h5py.special_dtype(vlen=str)
+    tmpgrp.create_dataset(
+        'name', data=np.array(index.index, dtype=object), dtype=strtype)
+    for column, dtype in INDEX_COLUMNS[key]:
+        values = index[column].values
+        if dtype == 'object':
+            tmpgrp.create_dataset(
+                column, data=values.astype(object), dtype=strtype)
+        elif dtype.startswith('datetime64'):
+            tmpgrp.create_dataset(
+                column, data=values.astype(dtype).view('int64'))
+        else:
+            tmpgrp.create_dataset(column, data=values)
+    tmpgrp.attrs['revision'] = get_revision(h5file[key])
+    if key in grp:
+        del grp[key]
+    grp.move(tmpkey, key)
+
+
+# ---- Search
+def get_closest(index, lat, lon, k=1, start=None, end=None):
+    """
+    Return the names of the k datasets of the index that are closest to the
+    specified coordinates, sorted by distance.
+
+    If a start and an end datetime are specified, only the datasets whose
+    data period overlaps the period between start and end are considered.
+    """
+    if start is not None:
+        index = index[index['End'] >= np.datetime64(start, 'ns')]
+    if end is not None:
+        index = index[index['Start'] <= np.datetime64(end, 'ns')]
+    k = min(k, len(index))
+    if k < 1:
+        return []
+    dist = calc_dist_from_coord(
+        lat, lon, index['Latitude'].values, index['Longitude'].values)
+    nearest = np.argpartition(dist, k - 1)[:k]
+    nearest = nearest[np.argsort(dist[nearest], kind='stable')]
+    return list(index.index[nearest])
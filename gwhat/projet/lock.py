@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""
+The coordination of the access to the project hdf5 files, so that a single
+process can write to a project while other processes read it.
+
+The writer of a project holds a lock file, saved next to the project file
+with a .lock extension, that contains the process id and the host name of
+the writer. The lock is reentrant within the process that holds it, and
+lock files left by a process of the same host that is no longer running
+are considered stale and are replaced. The lock files left by a process of
+another host can't be checked and must be broken explicitly.
+"""
+
+# ---- Standard library imports
+from datetime import datetime
+import json
+import os
+import os.path as osp
+import socket
+
+# ---- Third party imports
+import h5py
+
+# The number of ProjectLock that hold the lock of each lock file in this
+# process.
+_LOCK_COUNTS = {}
+
+
+class ProjectLockedError(Exception):
+    """
+    Raised when a project is opened with write access while another process
+    holds its lock.
+    """
+
+    def __init__(self, filename, owner):
+        super().__init__(
+            "The project '{}' is already opened with write access by the "
+            "process {} on host {}.".format(
+                osp.basename(filename), owner.get('pid'),
+                owner.get('hostname')))
+        self.filename = filename
+        self.owner = owner
+
+
+class ProjectLock(object):
+    """
+    The lock that grants the write access to the project hdf5 file
+    to a single process.
+    """
+
+    def __init__(self, filename):
+        self.filename = osp.abspath(filename) + '.lock'
+        self._acquired = False
+
+    def is_acquired(self):
+        """Return whether this lock is acquired."""
+        return self._acquired
+
+    def get_owner(self):
+        """
+        Return a dict with the pid, host name and creation time of the
+        process that holds the lock, or None if the lock is not held.
+        """
+        try:
+            with open(self.filename, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def acquire(self):
+        """
+        Acquire the lock or raise a ProjectLockedError if it is held by
+        another process.
+        """
+        if self._acquired:
+            return
+        if _LOCK_COUNTS.get(self.filename, 0) == 0:
+            self._create_lockfile()
+        _LOCK_COUNTS[self.filename] = _LOCK_COUNTS.get(self.filename, 0) + 1
+        self._acquired = True
+
+    def release(self):
+        """Release the lock if it is acquired."""
+        if not self._acquired:
+            return
+        self._acquired = False
+        _LOCK_COUNTS[self.filename] -= 1
+        if _LOCK_COUNTS[self.filename] == 0:
+            del _LOCK_COUNTS[self.filename]
+            try:
+                os.remove(self.filename)
+            except OSError:
+                pass
+
+    def break_lock(self):
+        """
+        Remove the lock file, whichever process holds the lock.
+
+        This must only be done when the process that holds the lock is
+        known not to be running anymore, for example when it was running
+        on another host that crashed.
+        """
+        if _LOCK_COUNTS.get(self.filename, 0) > 0:
+            raise ValueError("The lock is held by this process.")
+        try:
+            os.remove(self.filename)
+        except FileNotFoundError:
+            pass
+
+    def _create_lockfile(self):
+        """
+        Create the lock file atomically, replacing it if it was left by a
+        process that is no longer running.
+        """
+        owner = {'pid': os.getpid(),
+                 'hostname': socket.gethostname(),
+                 'created': datetime.now().isoformat()}
+        for attempt in range(2):
+            try:
+                fd = os.open(self.filename,
+                             os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                current_owner = self.get_owner()
+                if current_owner is not None and not _is_stale(current_owner):
+                    raise ProjectLockedError(
+                        self.filename[:-len('.lock')], current_owner)
+                try:
+                    os.remove(self.filename)
+                except OSError:
+                    pass
+            else:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(owner, f)
+                return
+        raise ProjectLockedError(
+            self.filename[:-len('.lock')], self.get_owner() or {})
+
+
+def open_readonly(filename):
+    """
+    Open the project hdf5 file in read-only mode, so that it can be read
+    while another process writes to it.
+    """
+    return _open_unlocked(filename, 'r')
+
+
+def open_readwrite(filename):
+    """
+    Open the project hdf5 file in read/write mode, creating it if it does
+    not exist. The write access must be granted with a ProjectLock.
+    """
+    return _open_unlocked(filename, 'a')
+
+
+def _open_unlocked(filename, mode):
+    """
+    Open the hdf5 file in the specified mode without the file locking of
+    hdf5, since the write access to the projects is coordinated with the
+    lock files and the file locking flags of all the handles of a file
+    opened in a process must match.
+    """
+    try:
+        return h5py.File(filename, mode=mode, locking=False)
+    except TypeError:
+        # The locking keyword was added in h5py 3.5. With older versions,
+        # the file locking is disabled with the HDF5_USE_FILE_LOCKING
+        # environment variable that is set when gwhat is imported.
+        return h5py.File(filename, mode=mode)
+
+
+def _is_stale(owner):
+    """
+    Return whether the lock file of the owner was left by a process of this
+    host that is no longer running.
+    """
+    if owner.get('hostname') != socket.gethostname():
+        # The processes of other hosts can't be checked.
+        return False
+    try:
+        pid = int(owner['pid'])
+    except (KeyError, TypeError, ValueError):
+        return True
+    if pid == os.getpid():
+        # The lock files are only created when this process does not
+        # hold the lock, so this one was left by a lock of this process
+        # that was not released.
+        return True
+    return not _is_process_running(pid)
+
+
+def _is_process_running(pid):
+    """Return whether a process with the specified pid is running."""
+    if os.name == 'nt':
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        # PROCESS_QUERY_LIMITED_INFORMATION
+        handle = kernel32.OpenProcess(0x1000, False, pid)
+        if not handle:
+            return False
+        exit_code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        kernel32.CloseHandle(handle)
+        # STILL_ACTIVE
+        return exit_code.value == 259
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -13,7 +13,6 @@ import os
 import os.path as osp
 
 # ---- Third party imports
-import numpy as np
 from PyQt5.QtCore import Qt, QCoreApplication
 from PyQt5.QtCore import pyqtSignal as QSignal
 from PyQt5.QtWidgets import (
@@ -23,12 +22,12 @@ from PyQt5.QtWidgets import (
 # ---- Local library imports
 from gwhat.config.main import CONF
 from gwhat.config.ospath import (
-    get_select_file_dialog_dir, set_select_file_dialog_dir)
+    get_datafile_cache, get_select_file_dialog_dir,
+    set_select_file_dialog_dir)
 from gwhat.meteo.weather_viewer import WeatherViewer, ExportWeatherButton
 from gwhat.utils.icons import QToolButtonSmall
 from gwhat.utils import icons
 import gwhat.common.widgets as myqt
-from gwhat.common.utils import calc_dist_from_coord
 from gwhat.projet.reader_waterlvl import WLDataFrame
 from gwhat.projet.reader_projet import INVALID_CHARS, is_dsetname_valid
 from gwhat.meteo.weather_reader import WXDataFrame
@@ -276,22 +275,26 @@ class DataManager(QWidget):
     def update_wldsets(self, name=None):
         self.wldsets_cbox.blockSignals(True)
         self.wldsets_cbox.clear()
-        self.wldsets_cbox.addItems(self.projet.wldsets)
+        self.wldsets_cbox.addItems(
+            list(self.projet.get_wldsets_index().index))
         if name:
             self.wldsets_cbox.setCurrentIndex(self.wldsets_cbox.findText(name))
         self.wldsets_cbox.blockSignals(False)
 
     def update_wldset_info(self):
         """Update the infos of the wldset."""
-        wldset = self.get_current_wldset()
-        if wldset is not None:
-            model = ["Well : %s" % wldset['Well'],
-                     "Well ID : %s" % wldset['Well ID'],
-                     "Latitude : %0.3f°" % wldset['Latitude'],
-                     "Longitude : %0.3f°" % wldset['Longitude'],
-                     "Elevation : %0.1f m" % wldset['Elevation'],
-                     "Municipality : %s" % wldset['Municipality'],
-                     "Province : %s" % wldset['Province']]
+        if self.wldsets_cbox.currentIndex() != -1:
+            # The infos are read from the index of the project, so that
+            # the dataset does not need to be read.
+            info = self.projet.get_wldsets_index().loc[
+                self.wldsets_cbox.currentText()]
+            model = ["Well : %s" % info['Well'],
+                     "Well ID : %s" % info['Well ID'],
+                     "Latitude : %0.3f°" % info['Latitude'],
+                     "Longitude : %0.3f°" % info['Longitude'],
+                     "Elevation : %0.1f m" % info['Elevation'],
+                     "Municipality : %s" % info['Municipality'],
+                     "Province : %s" % info['Province']]
         else:
             model = None
         self.well_info_widget.set_model(model)
@@ -392,21 +395,23 @@ class DataManager(QWidget):
     def update_wxdsets(self, name=None, silent=False):
         self.wxdsets_cbox.blockSignals(True)
         self.wxdsets_cbox.clear()
-        self.wxdsets_cbox.addItems(self.projet.wxdsets)
+        self.wxdsets_cbox.addItems(
+            list(self.projet.get_wxdsets_index().index))
         if name:
             self.wxdsets_cbox.setCurrentIndex(self.wxdsets_cbox.findText(name))
         self.wxdsets_cbox.blockSignals(False)
 
     def update_wxdset_info(self):
         """Update the infos of the wxdset."""
-        wxdset = self.get_current_wxdset()
-        if wxdset is not None:
-            model = ["Station : %s" % wxdset.metadata['Station Name'],
-                     "Station ID : %s" % wxdset.metadata['Station ID'],
-                     "Latitude : %0.3f°" % wxdset.metadata['Latitude'],
-                     "Longitude : %0.3f°" % wxdset.metadata['Longitude'],
-                     "Elevation : %0.1f m" % wxdset.metadata['Elevation'],
-                     "Location : %s" % wxdset.metadata['Location']]
+        if self.wxdsets_cbox.currentIndex() != -1:
+            info = self.projet.get_wxdsets_index().loc[
+                self.wxdsets_cbox.currentText()]
+            model = ["Station : %s" % info['Station Name'],
+                     "Station ID : %s" % info['Station ID'],
+                     "Latitude : %0.3f°" % info['Latitude'],
+                     "Longitude : %0.3f°" % info['Longitude'],
+                     "Elevation : %0.1f m" % info['Elevation'],
+                     "Location : %s" % info['Location']]
         else:
             model = None
         self.meteo_info_widget.set_model(model)
@@ -462,11 +467,17 @@ class DataManager(QWidget):
         if self._wldset is None or self.wxdataset_count() == 0:
             return None
 
-        dist = calc_dist_from_coord(self._wldset['Latitude'],
-                                    self._wldset['Longitude'],
-                                    self.projet.get_wxdsets_lat(),
-                                    self.projet.get_wxdsets_lon())
-        closest_station = self.wxdsets[np.argmin(dist)]
+        # The stations whose data period overlaps the one of the water
+        # level dataset are preferred.
+        lat, lon = self._wldset['Latitude'], self._wldset['Longitude']
+        times = self._wldset.times
+        closest_stations = []
+        if len(times):
+            closest_stations = self.projet.get_closest_wxdsets(
+                lat, lon, start=times[0], end=times[-1])
+        if not closest_stations:
+            closest_stations = self.projet.get_closest_wxdsets(lat, lon)
+        closest_station = closest_stations[0]
         self.set_current_wxdset(closest_station)
         return closest_station
 
@@ -705,11 +716,15 @@ class NewDatasetDialog(QDialog):
         for i in range(5):
             QCoreApplication.processEvents()
 
+        # The data are loaded from the cache when the datafile did not
+        # change since it was last parsed.
         try:
             if self._datatype == 'water level':
-                self._dataset = WLDataFrame(filename)
+                self._dataset = WLDataFrame(
+                    filename, cache=get_datafile_cache())
             elif self._datatype == 'daily weather':
-                self._dataset = WXDataFrame(filename)
+                self._dataset = WXDataFrame(
+                    filename, cache=get_datafile_cache())
         except Exception as e:
             print(e)
             self._dataset = None
@@ -14,6 +14,7 @@ import os
 import os.path as osp
 from datetime import datetime
 from shutil import copyfile
+import socket
 
 # ---- Third party imports
 from appconfigs.base import get_home_dir
@@ -25,8 +26,11 @@ from PyQt5.QtWidgets import (
 
 # ---- Local imports
 from gwhat.config.ospath import (
-    get_select_file_dialog_dir, set_select_file_dialog_dir)
+    get_project_storage_policy, get_select_file_dialog_dir,
+    set_select_file_dialog_dir)
 from gwhat.config.main import CONF
+from gwhat.projet.lock import (
+    ProjectLock, ProjectLockedError, open_readonly)
 from gwhat.projet.reader_projet import ProjetReader
 from gwhat.utils import icons
 from gwhat.projet.manager_data import DataManager
@@ -117,7 +121,45 @@ class ProjetManager(QWidget):
 
         # If the project fails to load.
         try:
-            projet = ProjetReader(filename)
+            projet = ProjetReader(
+                filename, storage_policy=get_project_storage_policy())
+        except ProjectLockedError as error:
+            message = (
+                "<b>Failed to open the project.</b><br><br>"
+                "The project is already opened by another instance of "
+                "GWHAT (process {} on {}). Please close the project in "
+                "the other instance and try again.").format(
+                    error.owner.get('pid'), error.owner.get('hostname'))
+            if error.owner.get('hostname') == socket.gethostname():
+                # The lock files left by the processes of this host that
+                # are not running anymore are replaced automatically, so
+                # the other instance is still running.
+                msg_box = QMessageBox(
+                    QMessageBox.Warning,
+                    "Open project warning",
+                    message + "<br><br><i>{}</i>".format(
+                        osp.abspath(filename)),
+                    buttons=QMessageBox.Ok,
+                    parent=self)
+                msg_box.exec_()
+                return False
+
+            msg_box = QMessageBox(
+                QMessageBox.Question,
+                "Open project warning",
+                message + (
+                    "<br><br>If the other instance is not running anymore, "
+                    "for example because it crashed, do you want to break "
+                    "its lock and open the project?"
+                    "<br><br><i>{}</i>").format(osp.abspath(filename)),
+                buttons=QMessageBox.Yes | QMessageBox.Cancel,
+                parent=self)
+            reply = msg_box.exec_()
+            if reply == QMessageBox.Yes:
+                ProjectLock(filename).break_lock()
+                return self.load_project(filename)
+            else:
+                return False
         except Exception:
             if osp.exists(filename + '.bak'):
                 msg_box = QMessageBox(
@@ -151,7 +193,7 @@ class ProjetManager(QWidget):
 
         # If the project is corrupted.
         if self.projet.check_project_file() is True:
-            self.projet.backup_project_file()
+            self.projet.backup_project_file(background=True)
         else:
             if osp.exists(filename + '.bak'):
                 msg_box = QMessageBox(
@@ -214,11 +256,12 @@ class ProjetManager(QWidget):
             buttons=QMessageBox.Ok,
             parent=self)
 
-        # First we check that the backup is ok.
+        # First we check that the backup is ok. The backup is opened in
+        # read-only mode, so that it is not migrated or changed in any way
+        # by the check.
         try:
-            backup = ProjetReader(filename + '.bak')
-            assert backup.check_project_file() is True
-            backup.close()
+            with open_readonly(filename + '.bak') as backup:
+                backup.visit(lambda name: None)
         except Exception:
             msg_box.exec_()
             return False
@@ -9,9 +9,10 @@
 from __future__ import division, unicode_literals
 
 # ---- Standard library imports
+from collections import OrderedDict
 import os
 import os.path as osp
-from shutil import copyfile
+import threading
 
 # ---- Third party imports
 import h5py
@@ -21,18 +22,74 @@ import datetime
 
 # ---- Local library imports
 from gwhat.meteo.weather_reader import WXDataFrameBase, METEO_VARIABLES
+from gwhat.projet.backup import (
+    backup_project, get_revision, increment_revision)
+from gwhat.projet.index import (
+    build_index, get_closest, is_index_uptodate, load_index, save_index,
+    update_index)
+from gwhat.projet.lock import (
+    ProjectLock, ProjectLockedError, open_readonly, open_readwrite)
 from gwhat.projet.reader_waterlvl import WLDataFrameBase, WLDataset
+from gwhat.projet.schema import (
+    SCHEMA_VERSION, backup_project_before_migration, get_schema_version,
+    migrate_project)
+from gwhat.projet.storage import (
+    DEFAULT_STORAGE_POLICY, create_timeseries_dataset, get_space_report,
+    repack_project, save_datetimes_to_h5grp)
 from gwhat.gwrecharge.glue import GLUEDataFrameBase
-from gwhat.common.utils import save_content_to_file
-from gwhat.utils.math import nan_as_text_tolist, calcul_rmse
-from gwhat.utils.dates import xldates_to_datetimeindex, xldates_to_strftimes
+from gwhat.common.utils import save_columns_to_file
+from gwhat.utils.math import calcul_rmse
 
 INVALID_CHARS = ['\\', '/', ':', '*', '?', '"', '<', '>', '|']
 
+# The maximum number of unchanged values between two ranges of changed water
+# level data under which the ranges are written to the project file in a
+# single operation when commiting changes.
+COMMIT_GAP = 4096
+
+# The default memory budget in bytes of the cache of the datasets loaded
+# from the project.
+DATASET_CACHE_SIZE = 256 * 1024 ** 2
+
 
 class ProjetReader(object):
-    def __init__(self, filename):
+    """
+    A reader and writer of the project hdf5 files.
+
+    The time series of the datasets added to the project are stored with the
+    specified StoragePolicy.
+
+    The datasets loaded from the project are kept in a least recently used
+    (LRU) cache, so that getting again a recently used dataset does not
+    require to load it again from the project file. The least recently
+    used datasets are evicted from the cache when the memory used by the
+    cached datasets exceeds cache_size, in bytes.
+
+    The project file is backed up incrementally, so that only the datasets
+    that were modified since the last backup are copied in the backup file,
+    and the backup can be made in a background thread.
+
+    A single process can open a project with write access at a time, which
+    is coordinated with a lock file saved next to the project file. A
+    ProjectLockedError is raised if the project is already opened with
+    write access by another process. Any number of processes can open the
+    project in read-only mode, even while it is opened with write access,
+    to read the changes flushed by the writer. Projects saved with an older
+    version of the schema can't be opened in read-only mode, since they need
+    to be migrated first.
+    """
+
+    def __init__(self, filename, storage_policy=DEFAULT_STORAGE_POLICY,
+                 cache_size=DATASET_CACHE_SIZE, readonly=False):
         self.__db = None
+        self._lock = None
+        self.readonly = readonly
+        self.storage_policy = storage_policy
+        self.cache_size = cache_size
+        self._dataset_cache = OrderedDict()
+        self._indexes = {}
+        self._backup_thread = None
+        self._backup_result = None
         self.load_projet(filename)
 
     def __del__(self):
@@ -56,15 +113,53 @@ class ProjetReader(object):
         print("Loading project from '{}'... ".format(osp.basename(filename)),
               end='')
         try:
-            if not osp.exists(osp.dirname(filename)):
-                os.makedirs(osp.dirname(filename))
-            self.__db = h5py.File(filename, mode='a')
+            if self.readonly:
+                self.__db = open_readonly(filename)
+            else:
+                if not osp.exists(osp.dirname(filename)):
+                    os.makedirs(osp.dirname(filename))
+                self._lock = ProjectLock(filename)
+                self._lock.acquire()
+                self.__db = open_readwrite(filename)
             print('done')
+        except ProjectLockedError:
+            self._lock = None
+            print('failed')
+            raise
         except Exception:
             self.__db = None
+            self._release_lock()
             print('failed')
             raise ValueError('Project file is not valid!')
 
+        if self.readonly:
+            if self.schema_version < SCHEMA_VERSION:
+                self.close()
+                raise ValueError(
+                    "The project must be opened with write access to migrate "
+                    "it to the current schema version.")
+            return
+
+        version = self.schema_version
+        if list(self.db.keys()) and version < SCHEMA_VERSION:
+            # The project file is copied before it is changed in any way,
+            # so that a copy of the project saved with the older schema is
+            # kept after the project is migrated.
+            # The project is not migrated if it can't be copied.
+            self.__db.close()
+            self.__db = None
+            try:
+                backup_project_before_migration(filename, version)
+            except OSError:
+                print('failed')
+                self._release_lock()
+                raise
+            self.__db = open_readwrite(filename)
+
+        if not list(self.db.keys()):
+            # This is a newly created project.
+            self.db.attrs['schema_version'] = SCHEMA_VERSION
+
         # For newly created project and backward compatibility.
         for key in ['name', 'author', 'created', 'modified', 'version']:
             if key not in list(self.db.attrs.keys()):
@@ -81,14 +176,38 @@ class ProjetReader(object):
                 # Added in version 0.4.0 (see PR #267)
                 self.db[key].attrs['last_opened'] = 'None'
 
+        # Projects saved with an older version of the schema are migrated
+        # in a single pass, so that the datasets can then be loaded without
+        # checking their format.
+        if self.schema_version < SCHEMA_VERSION:
+            migrate_project(self.db)
+
     def close(self):
         """Close the project hdf5 file."""
+        self.wait_for_backup()
+        # The cached datasets reference the groups of the file.
+        self._dataset_cache.clear()
+        self._indexes = {}
         try:
             self.db.close()
             self.__db = None
         except AttributeError:
             # projet is None or already closed.
             pass
+        self._release_lock()
+
+    def _release_lock(self):
+        """Release the write access to the project file, if any."""
+        if self._lock is not None:
+            self._lock.release()
+            self._lock = None
+
+    def refresh(self):
+        """
+        Reopen the project file to read the changes that were saved to
+        the project by another process since it was opened.
+        """
+        self.load_projet(self.filename)
 
     def check_project_file(self):
         """Check to ensure that the project hdf5 file is not corrupt."""
@@ -100,31 +219,90 @@ class ProjetReader(object):
         else:
             return True
 
-    def backup_project_file(self):
-        """Copy the project hdf5 file in a file with a .bak extension."""
-        if self.db is not None:
-            filename = self.filename
-            self.db.close()
-            print("Creating a backup of the project hdf5 file... ", end='')
-            try:
-                copyfile(filename, filename + '.bak')
-            except (OSError, PermissionError):
-                print('failed')
-                return False
-            else:
-                print('done')
-                return True
-            finally:
-                self.load_projet(filename)
+    def backup_project_file(self, background=False):
+        """
+        Backup the project hdf5 file in a file with a .bak extension.
+
+        Only the datasets that were modified since the last backup are
+        copied in the backup file. If background is True, the backup is made
+        in a background thread and this method returns immediately, else
+        this method returns whether the backup was successful.
+        """
+        self.wait_for_backup()
+        if self.db is None or self.readonly:
+            return False
+        self.db.flush()
+        if background:
+            self._backup_thread = threading.Thread(
+                target=self._backup_project_file)
+            self._backup_thread.start()
+            return True
+        return self._backup_project_file()
 
+    def _backup_project_file(self):
+        """Backup the project hdf5 file and return whether it succeeded."""
+        print("Creating a backup of the project hdf5 file... ", end='')
         try:
-            copyfile(self.filename, bak_filename)
-        except (OSError, PermissionError):
+            result = backup_project(self.db, self.filename + '.bak')
+        except Exception:
             print('failed')
-            return False
+            self._backup_result = False
+        else:
+            print('done ({}{} datasets copied)'.format(
+                'full backup, ' if result.full else '', len(result.copied)))
+            self._backup_result = True
+        return self._backup_result
+
+    def wait_for_backup(self):
+        """
+        Wait for the backup running in a background thread, if any, to
+        complete and return whether the last backup was successful.
+        """
+        if self._backup_thread is not None:
+            self._backup_thread.join()
+            self._backup_thread = None
+        return self._backup_result
+
+    def get_space_report(self):
+        """
+        Return a SpaceReport of the space used by the project hdf5 file,
+        including the space left unused by the datasets that were deleted.
+        """
+        return get_space_report(self.db)
+
+    def compact(self, storage_policy=None):
+        """
+        Compact the project hdf5 file and return the size of the file in
+        bytes before and after it was compacted.
+
+        The project is rewritten in a new file, with its time series stored
+        with the specified storage policy or the storage policy of the
+        project if None, which reclaims the space left unused by the
+        datasets that were deleted or rewritten. The new file replaces the
+        project file only once it is completely written.
+        """
+        if self.readonly:
+            raise ValueError(
+                "A project opened in read-only mode can't be compacted.")
+        filename = self.filename
+        print("Compacting the project hdf5 file...", end=' ')
+        # The write access to the project is kept while the project is
+        # closed and rewritten.
+        lock = ProjectLock(filename)
+        lock.acquire()
+        self.close()
+        try:
+            old_size, new_size = repack_project(
+                filename, storage_policy or self.storage_policy)
+        except Exception:
+            print('failed')
+            raise
         else:
             print('done')
-            return True
+        finally:
+            self.load_projet(filename)
+            lock.release()
+        return old_size, new_size
 
     # ---- Project Properties
     @property
@@ -167,6 +345,10 @@ class ProjetReader(object):
     def version(self, x):
         self.db.attrs['version'] = x
 
+    @property
+    def schema_version(self):
+        return get_schema_version(self.db)
+
     @property
     def lat(self):
         return self.db.attrs['latitude']
@@ -183,6 +365,57 @@ class ProjetReader(object):
     def lon(self, x):
         self.db.attrs['longitude'] = x
 
+    # ---- Datasets index
+    def _get_index(self, key):
+        """
+        Return the index of the datasets of the group of the project with
+        the specified key.
+
+        The index is saved in the project and updated when the datasets are
+        added, modified or deleted, so that it does not need to be built
+        from the attributes and the data of the datasets each time the
+        project is opened. The index is rebuilt if it is not up-to-date
+        with the revision of the group, which happens if the datasets were
+        modified without updating the index.
+        """
+        revision, index = self._indexes.get(key, (None, None))
+        if index is None or not is_index_uptodate(self.db, key, revision):
+            loaded = load_index(self.db, key)
+            if loaded is not None:
+                index, revision = loaded
+            if (loaded is None or
+                    not is_index_uptodate(self.db, key, revision) or
+                    list(index.index) != list(self.db[key].keys())):
+                # The datasets were added, deleted or modified by an older
+                # version of GWHAT or without updating the index.
+                print("Building the index of the {}...".format(key), end=' ')
+                index = build_index(self.db, key)
+                if not self.readonly:
+                    save_index(self.db, key, index)
+                print('done')
+            self._indexes[key] = (get_revision(self.db[key]), index)
+        return index
+
+    def _update_index(self, key, name):
+        """
+        Update the row of the dataset of the group of the project with the
+        specified key and name in the index, or remove it if the dataset
+        does not exist anymore.
+        """
+        if self.readonly:
+            return
+        if key in self._indexes:
+            index = self._indexes[key][1]
+        else:
+            loaded = load_index(self.db, key)
+            if loaded is None:
+                # The index will be built the next time it is needed.
+                return
+            index = loaded[0]
+        index = update_index(self.db, key, index, name)
+        save_index(self.db, key, index)
+        self._indexes[key] = (get_revision(self.db[key]), index)
+
     # ---- Water Levels Dataset Handlers
     @property
     def wldsets(self):
@@ -192,6 +425,15 @@ class ProjetReader(object):
         """
         return list(self.db['wldsets'].keys())
 
+    def get_wldsets_index(self):
+        """
+        Return a dataframe indexed by the names of the water level datasets
+        with the metadata of their well, their data period, their number of
+        samples, the number of their MRC, GLUE and BRF results and their
+        size in bytes in the project file.
+        """
+        return self._get_index('wldsets')
+
     def get_last_opened_wldset(self):
         """
         Return the name of the last opened water level dataset in the project
@@ -203,12 +445,24 @@ class ProjetReader(object):
     def get_wldset(self, name):
         """
         Return the water level dataset corresponding to the provided name.
+
+        The dataset is read from the cache of the project if it is cached,
+        unless it has changes that were not commited, so that the changes
+        that were not commited are never returned.
         """
         print("Getting wldset {}...".format(name), end=' ')
-        if name in self.wldsets:
-            self.db['wldsets'].attrs['last_opened'] = name
+        if name in self.db['wldsets']:
+            if not self.readonly:
+                self.db['wldsets'].attrs['last_opened'] = name
+            wldset = self._get_cached_dataset('wldsets', name)
+            if wldset is None or wldset.has_uncommited_changes:
+                wldset = WLDataFrameHDF5(
+                    self.db['wldsets/%s' % name],
+                    on_commit=self._wldset_commited,
+                    on_modified=self._wldset_modified)
+            self._cache_dataset('wldsets', name, wldset)
             print('done')
-            return WLDataFrameHDF5(self.db['wldsets/%s' % name])
+            return wldset
         else:
             print('failed')
             return None
@@ -219,24 +473,21 @@ class ProjetReader(object):
 
         A dataset name must be at least one charater long and can't contain
         any of the following special characters: \\ / : * ? " < > |
+
+        None is returned if the dataset can't be saved in the project.
         """
         if not is_dsetname_valid(name):
             raise ValueError("The name of the dataset is not valid.")
+        self._uncache_dataset('wldsets', name)
 
+        grp = self.db['wldsets'].create_group(name)
         try:
-            grp = self.db['wldsets'].create_group(name)
-
             # Water level data
-            grp.create_dataset(
-                'Time',
-                data=np.array(df['Time'], dtype=h5py.special_dtype(vlen=str)))
-            # See http://docs.h5py.org/en/latest/strings.html as to why this
-            # is necessary to do this in order to save a list of strings in
-            # a dataset with h5py.
-
-            grp.create_dataset('WL', data=np.copy(df['WL']))
-            grp.create_dataset('BP', data=np.copy(df['BP']))
-            grp.create_dataset('ET', data=np.copy(df['ET']))
+            save_datetimes_to_h5grp(
+                grp, 'Time', df.dates, self.storage_policy)
+            for key in ['WL', 'BP', 'ET']:
+                create_timeseries_dataset(
+                    grp, key, df[key], self.storage_policy)
 
             # Piezometric well info
             grp.attrs['filename'] = df['filename']
@@ -274,20 +525,48 @@ class ProjetReader(object):
             mmeas.create_dataset('Time', data=np.array([]), maxshape=(None,))
             mmeas.create_dataset('WL', data=np.array([]), maxshape=(None,))
 
+            increment_revision(grp)
+            self._update_index('wldsets', name)
             self.db.flush()
 
             print('New dataset created sucessfully')
         except Exception:
             print('Unable to save dataset to project db')
-            del self.db['wldsets'][name]
+            self.del_wldset(name)
+            return None
 
-        return WLDataFrameHDF5(grp)
+        return WLDataFrameHDF5(
+            grp, on_commit=self._wldset_commited,
+            on_modified=self._wldset_modified)
 
     def del_wldset(self, name):
         """Delete the specified water level dataset."""
+        self._uncache_dataset('wldsets', name)
         del self.db['wldsets/%s' % name]
+        increment_revision(self.db['wldsets'])
+        self._update_index('wldsets', name)
         self.db.flush()
 
+    def _wldset_commited(self, wldset):
+        """
+        Remove from the cache the water level dataset with the same name as
+        the one whose changes were just commited to the project, unless it
+        is the same object, since its data are not up-to-date anymore.
+
+        The changes that were not commited from the removed dataset are
+        kept in that object, but are not returned by get_wldset anymore.
+        """
+        key = ('wldsets', wldset.name)
+        if self._dataset_cache.get(key, wldset) is not wldset:
+            del self._dataset_cache[key]
+
+    def _wldset_modified(self, wldset):
+        """
+        Update the row of the water level dataset in the index of the
+        project when it is modified.
+        """
+        self._update_index('wldsets', wldset.name)
+
     # ---- Weather Dataset Handlers
     @property
     def wxdsets(self):
@@ -301,15 +580,33 @@ class ProjetReader(object):
         """
         Return a list with the latitude coordinates of the weather datasets.
         """
-        return [self.db['wxdsets/%s' % name].attrs['Latitude'] for
-                name in self.wxdsets]
+        return list(self.get_wxdsets_index()['Latitude'])
 
     def get_wxdsets_lon(self):
         """
         Return a list with the longitude coordinates of the weather datasets.
         """
-        return [self.db['wxdsets/%s' % name].attrs['Longitude'] for
-                name in self.wxdsets]
+        return list(self.get_wxdsets_index()['Longitude'])
+
+    def get_wxdsets_index(self):
+        """
+        Return a dataframe indexed by the names of the weather datasets with
+        the metadata of their station, their data period, their number of
+        samples and their size in bytes in the project file.
+        """
+        return self._get_index('wxdsets')
+
+    def get_closest_wxdsets(self, lat, lon, k=1, start=None, end=None):
+        """
+        Return the names of the k weather datasets whose station is the
+        closest to the specified coordinates, sorted by distance.
+
+        If a start and an end datetime are specified, only the weather
+        datasets whose data period overlaps the period between start and
+        end are considered.
+        """
+        return get_closest(
+            self.get_wxdsets_index(), lat, lon, k, start, end)
 
     def get_last_opened_wxdset(self):
         """
@@ -324,10 +621,15 @@ class ProjetReader(object):
         Return the weather dataset corresponding to the provided name.
         """
         print("Getting wxdset {}...".format(name), end=' ')
-        if name in self.wxdsets:
+        if name in self.db['wxdsets']:
+            if not self.readonly:
+                self.db['wxdsets'].attrs['last_opened'] = name
+            wxdset = self._get_cached_dataset('wxdsets', name)
+            if wxdset is None:
+                wxdset = WXDataFrameHDF5(self.db['wxdsets/%s' % name])
+            self._cache_dataset('wxdsets', name, wxdset)
             print('done')
-            self.db['wxdsets'].attrs['last_opened'] = name
-            return WXDataFrameHDF5(self.db['wxdsets/%s' % name])
+            return wxdset
         else:
             print('failed')
             return None
@@ -341,6 +643,7 @@ class ProjetReader(object):
         """
         if not is_dsetname_valid(name):
             raise ValueError("The name of the dataset is not valid.")
+        self._uncache_dataset('wxdsets', name)
         grp = self.db['wxdsets'].create_group(name)
 
         # Save the metadata.
@@ -348,36 +651,69 @@ class ProjetReader(object):
             grp.attrs[key] = value
 
         # Save time.
-        strtimes = np.array(
-            wxdset.strftime(), dtype=h5py.special_dtype(vlen=str))
-        grp.create_dataset('Time', data=strtimes)
-        # See http://docs.h5py.org/en/latest/strings.html as to why this
-        # is necessary to do this in order to save a list of strings in
-        # a dataset with h5py.
+        save_datetimes_to_h5grp(
+            grp, 'Time', wxdset.data.index.values, self.storage_policy)
 
         # Save timeseries data
         for variable in METEO_VARIABLES:
-            grp.create_dataset(
-                variable, data=np.copy(wxdset.data[variable].values))
+            create_timeseries_dataset(
+                grp, variable, wxdset.data[variable].values,
+                self.storage_policy)
 
         # Save times where data was missing.
         for variable in METEO_VARIABLES:
-            datetimeindex = wxdset.missing_value_indexes[variable]
-            strtimes = np.array(
-                datetimeindex.strftime("%Y-%m-%dT%H:%M:%S").values.tolist(),
-                dtype=h5py.special_dtype(vlen=str)
-                )
-            grp.create_dataset(
-                'Missing {}'.format(variable), data=strtimes)
+            save_datetimes_to_h5grp(
+                grp, 'Missing {}'.format(variable),
+                wxdset.missing_value_indexes[variable].values,
+                self.storage_policy)
 
+        increment_revision(grp)
+        self._update_index('wxdsets', name)
         print('Dataset {} created sucessfully.'.format(name))
         self.db.flush()
 
     def del_wxdset(self, name):
         """Delete the specified weather dataset."""
+        self._uncache_dataset('wxdsets', name)
         del self.db['wxdsets/%s' % name]
+        increment_revision(self.db['wxdsets'])
+        self._update_index('wxdsets', name)
         self.db.flush()
 
+    # ---- Datasets cache
+    def _get_cached_dataset(self, group, name):
+        """
+        Return the dataset of the group with the specified name from the
+        cache, or None if it is not cached.
+        """
+        return self._dataset_cache.get((group, name))
+
+    def _cache_dataset(self, group, name, dataset):
+        """
+        Add or move the dataset to the most recently used end of the cache
+        and evict the least recently used datasets if the cache exceeds its
+        memory budget.
+
+        The memory used by the datasets is evaluated each time a dataset is
+        used, since the water level data are read lazily.
+        """
+        self._dataset_cache[(group, name)] = dataset
+        self._dataset_cache.move_to_end((group, name))
+        memory_usages = [
+            (key, dset.memory_usage()) for
+            key, dset in self._dataset_cache.items()]
+        total = sum(memory_usage for key, memory_usage in memory_usages)
+        # The dataset that was just added is never evicted.
+        for key, memory_usage in memory_usages[:-1]:
+            if total <= self.cache_size:
+                break
+            del self._dataset_cache[key]
+            total -= memory_usage
+
+    def _uncache_dataset(self, group, name):
+        """Remove the dataset of the group from the cache if cached."""
+        self._dataset_cache.pop((group, name), None)
+
 
 class WLDataFrameHDF5(WLDataFrameBase):
     """
@@ -385,54 +721,31 @@ class WLDataFrameHDF5(WLDataFrameBase):
     water level datasets. It mimick the structure of the DataFrame that
     is returned when loading water level dataset from an Excel file in
     reader_waterlvl module.
+
+    The data are read lazily from the project file. Time windows of the
+    data are read from hyperslabs of the datasets, using the sorted time
+    axis of the dataset to map the datetimes to index ranges, and the whole
+    data are read only once they are needed.
     """
 
-    def __init__(self, hdf5group, *args, **kwargs):
+    def __init__(self, hdf5group, *args, on_commit=None, on_modified=None,
+                 **kwargs):
         super(WLDataFrameHDF5, self).__init__(*args, **kwargs)
+        self._on_commit = on_commit
+        self._on_modified = on_modified
         self.__load_dataset__(hdf5group)
 
     def __load_dataset__(self, hdf5group):
         self.dset = hdf5group
         self._undo_stack = []
-
-        columns = []
-        data = []
-        for colname in ['Time', 'WL', 'BP', 'ET']:
-            if len(self.dset[colname][...]):
-                data.append(self.dset[colname][...])
-                columns.append(colname)
-        data = np.vstack(tuple(data)).transpose()
-        columns = tuple(columns)
-        self._dataf = WLDataset(data, columns)
-
-        # Make older datasets compatible with newer format.
-        if isinstance(self.dset['Time'][0], (int, float)):
-            # Time needs to be converted from Excel numeric dates
-            # to ISO date strings (see PR #276).
-            print('Saving time as ISO date strings instead of Excel dates...',
-                  end=' ')
-            del self.dset['Time']
-            self.dset.create_dataset(
-                'Time',
-                data=np.array(self.strftime,
-                              dtype=h5py.special_dtype(vlen=str)))
-            self.dset.file.flush()
-            print('done')
-        if 'Well ID' not in list(self.dset.attrs.keys()):
-            # Added in version 0.2.1 (see PR #124).
-            self.dset.attrs['Well ID'] = ""
-            self.dset.file.flush()
-        if 'Province' not in list(self.dset.attrs.keys()):
-            # Added in version 0.2.1 (see PR #124).
-            self.dset.attrs['Province'] = ""
-            self.dset.file.flush()
-        if 'glue' not in list(self.dset.keys()):
-            # Added in version 0.3.1 (see PR #184)
-            self.dset.create_group('glue')
-            self.dset.file.flush()
+        self._dataf = None
+        self._times = None
+        self._times_sorted = None
 
     def __getitem__(self, key):
-        if key in list(self.dset.attrs.keys()):
+        if key == 'Time':
+            return self.strftime
+        elif key in list(self.dset.attrs.keys()):
             return self.dset.attrs[key]
         else:
             return self.dset[key][...]
@@ -441,17 +754,96 @@ class WLDataFrameHDF5(WLDataFrameBase):
     def dirname(self):
         return os.path.dirname(self.dset.file.filename)
 
+    @property
+    def data(self):
+        """
+        Return the whole water level data, which are read from the project
+        file the first time they are needed.
+        """
+        if self._dataf is None:
+            print('Reading water level data of {}...'.format(self.name),
+                  end=' ')
+            self._dataf = self._read_rows(0, len(self.times))
+            self._times = None
+            print('done')
+        return self._dataf
+
+    @property
+    def times(self):
+        if self._dataf is not None:
+            return self._dataf.index.values
+        if self._times is None:
+            self._times = load_datetimes_from_h5grp(self.dset, 'Time')
+        return self._times
+
+    def get_window(self, start=None, end=None):
+        """
+        Return a dataframe with the data whose times are between the start
+        and end datetimes inclusively.
+
+        If the whole data were not read yet and the times are sorted, only
+        the rows of the window are read from the project file.
+        """
+        if self._dataf is None:
+            if self._times_sorted is None:
+                times = self.times
+                self._times_sorted = bool(np.all(times[1:] >= times[:-1]))
+            if self._times_sorted:
+                return self._read_rows(*self.get_index_range(start, end))
+        return super().get_window(start, end)
+
+    def memory_usage(self):
+        """
+        Return the memory used by the data of this dataset in bytes.
+        """
+        memory_usage = sum(
+            ranges.nbytes + values.nbytes for
+            ranges, values in self._undo_stack)
+        if self._dataf is not None:
+            memory_usage += self._dataf.memory_usage(index=True).sum()
+        if self._times is not None:
+            memory_usage += self._times.nbytes
+        return int(memory_usage)
+
+    def _read_rows(self, start, stop):
+        """
+        Read the data in the [start, stop) index range from the project file
+        and return them in a WLDataset.
+        """
+        data = OrderedDict([('Time', self.times[start:stop])])
+        for colname in ['WL', 'BP', 'ET']:
+            if len(self.dset[colname]):
+                data[colname] = self.dset[colname][start:stop]
+        return WLDataset(pd.DataFrame(data), tuple(data.keys()))
+
     @property
     def name(self):
         return osp.basename(self.dset.name)
 
+    def _flush(self):
+        """
+        Increment the revision of this dataset and flush the changes made to
+        it to the project file.
+        """
+        increment_revision(self.dset)
+        if self._on_modified is not None:
+            self._on_modified(self)
+        self.dset.file.flush()
+
     # ---- Water levels
     def commit(self):
         """Commit the changes made to the water level data to the project."""
         if self.has_uncommited_changes:
-            self.dset['WL'][:] = np.copy(self.waterlevels)
-            self.dset.file.flush()
+            # Only the hyperslabs of the dataset that were changed since the
+            # last commit are written to the project file. Ranges that are
+            # close to each other are written in a single operation.
+            waterlevels = self.waterlevels
+            for start, stop in self.get_uncommited_ranges(gap=COMMIT_GAP):
+                self.dset['WL'][start:stop] = waterlevels[start:stop]
+            self._flush()
             self._undo_stack = []
+            if self._on_commit is not None:
+                self._on_commit(self)
             print('Changes commited successfully.')
 
     # ---- Manual measurements
@@ -467,11 +859,14 @@ class WLDataFrameHDF5(WLDataFrameBase):
             mmeas = self.dset.create_group('manual')
             mmeas.create_dataset('Time', data=time, maxshape=(None,))
             mmeas.create_dataset('WL', data=wl, maxshape=(None,))
-        self.dset.file.flush()
+        self._flush()
 
     def get_wlmeas(self):
         """Get the water level measurements for this dataset."""
-        grp = self.dset.require_group('manual')
+        if 'manual' not in self.dset.keys():
+            # The project may be opened in read-only mode.
+            return np.array([]), np.array([])
+        grp = self.dset['manual']
         return grp['Time'][...], grp['WL'][...]
 
     # ---- Master recession curve
@@ -491,20 +886,10 @@ class WLDataFrameHDF5(WLDataFrameBase):
 
         self.dset['mrc'].attrs['exists'] = 1
 
-        self.dset.file.flush()
+        self._flush()
 
     def mrc_exists(self):
         """Return whether a mrc results is saved in the hdf5 project file."""
-        if 'mrc' not in list(self.dset.keys()):
-            mrc = self.dset.create_group('mrc')
-            mrc.attrs['exists'] = 0
-            mrc.create_dataset('params', data=(0, 0), dtype='float64')
-            mrc.create_dataset('peak_indx', data=np.array([]),
-                               dtype='int16', maxshape=(None,))
-            mrc.create_dataset('recess', data=np.array([]),
-                               dtype='float64', maxshape=(None,))
-            mrc.create_dataset('time', data=np.array([]),
-                               dtype='float64', maxshape=(None,))
         return bool(self.dset['mrc'].attrs['exists'])
 
     def save_mrc_tofile(self, filename):
@@ -530,12 +915,9 @@ class WLDataFrameHDF5(WLDataFrameBase):
             ['Time', 'hrecess(mbgs)', 'hobs(mbgs)']
             ])
 
-        # Format the observed and simulated data.
-        data = np.vstack([self['Time'], self['WL'], self['mrc/recess']])
-        data = nan_as_text_tolist(np.array(data).transpose())
-        fcontent.extend(data)
-
-        save_content_to_file(filename, fcontent)
+        save_columns_to_file(
+            filename, fcontent,
+            [np.array(self['Time']), self['WL'], self['mrc/recess']])
 
     # ---- GLUE water budget and water level evaluation
 
@@ -558,7 +940,7 @@ class WLDataFrameHDF5(WLDataFrameBase):
 
         grp = self.dset['glue'].create_group(idnum)
         save_dict_to_h5grp(grp, gluedf)
-        self.dset.file.flush()
+        self._flush()
         print('GLUE results saved successfully')
 
     def get_glue(self, idnum):
@@ -579,7 +961,7 @@ class WLDataFrameHDF5(WLDataFrameBase):
         """Delete GLUE results at idnum."""
         if idnum in self.glue_idnums():
             del self.dset['glue'][idnum]
-            self.dset.file.flush()
+            self._flush()
             print('GLUE data %s deleted successfully' % idnum)
         else:
             print('GLUE data %s does not exist' % idnum)
@@ -612,7 +994,7 @@ class WLDataFrameHDF5(WLDataFrameBase):
             raise ValueError("The size of the specified 'period' must be 2.")
         grp = self.dset.require_group('brf')
         grp.attrs['period'] = period
-        self.dset.file.flush()
+        self._flush()
 
     def get_brfperiod(self):
         """
@@ -641,32 +1023,6 @@ class WLDataFrameHDF5(WLDataFrameBase):
         """
         grp = self.dset['brf'][name]
 
-        # Make older datasets compatible with newer format (see PR#).
-        flush = False
-        if 'err' in grp.keys():
-            grp['sdA'] = grp['err']
-            del grp['err']
-            flush = True
-        if 'SumA' not in grp.keys():
-            grp['SumA'] = grp['A']
-            del grp['A']
-            flush = True
-        if 'lag' in grp.keys():
-            grp['Lag'] = grp['lag']
-            del grp['lag']
-            flush = True
-        for key in ['date start', 'date end']:
-            if key in grp.keys():
-                grp.attrs[key] = (
-                    datetime.datetime(*grp[key][...], 0).isoformat())
-                del grp[key]
-                flush = True
-        if 'detrending' not in grp.attrs.keys():
-            grp.attrs['detrending'] = ''
-            flush = True
-        if flush:
-            self.dset.file.flush()
-
         # Cast the data into a pandas dataframe.
         keys = ['Lag', 'A', 'sdA', 'SumA', 'sdSumA', 'B',
                 'sdB', 'SumB', 'sdSumB']
@@ -703,14 +1059,14 @@ class WLDataFrameHDF5(WLDataFrameBase):
         grp.attrs['detrending'] = {
             True: 'Yes', False: 'No', None: ''}[detrending]
 
-        self.dset.file.flush()
+        self._flush()
         print('done')
 
     def del_brf(self, name):
         """Delete the BRF evaluation saved with the specified name."""
         if name in list(self.dset['brf'].keys()):
             del self.dset['brf'][name]
-            self.dset.file.flush()
+            self._flush()
             print('BRF %s deleted successfully' % name)
         else:
             print('BRF does not exist')
@@ -747,9 +1103,9 @@ class WLDataFrameHDF5(WLDataFrameBase):
             []
             ]
         fcontent.append(list(databrf.columns))
-        fcontent.extend(nan_as_text_tolist(databrf.values))
-
-        save_content_to_file(filename, fcontent)
+        save_columns_to_file(
+            filename, fcontent,
+            [databrf[col].values for col in databrf.columns])
 
     # ---- Hydrograph layout
     def save_layout(self, layout):
@@ -767,11 +1123,12 @@ class WLDataFrameHDF5(WLDataFrameBase):
                     grp.attrs[key] = '__' + str(layout[key]) + '__'
                 else:
                     grp.attrs[key] = layout[key]
-        self.dset.file.flush()
+        self._flush()
 
     def get_layout(self):
         """Return the layout dict that is saved in the project hdf5 file."""
-        if 'TIMEmin' not in self.dset['layout'].attrs.keys():
+        if ('layout' not in self.dset.keys() or
+                'TIMEmin' not in self.dset['layout'].attrs.keys()):
             return None
         layout = {}
         for key in list(self.dset['layout'].attrs.keys()):
@@ -784,9 +1141,10 @@ class WLDataFrameHDF5(WLDataFrameBase):
                 layout[key] = False
 
         layout['colors'] = {}
-        grp_colors = self.dset['layout'].require_group('colors')
-        for key in list(grp_colors.attrs.keys()):
-            layout['colors'][key] = grp_colors.attrs[key].tolist()
+        if 'colors' in self.dset['layout'].keys():
+            grp_colors = self.dset['layout']['colors']
+            for key in list(grp_colors.attrs.keys()):
+                layout['colors'][key] = grp_colors.attrs[key].tolist()
 
         keys = list(layout.keys())
         if 'meteo_on' not in keys:
@@ -831,69 +1189,6 @@ class WXDataFrameHDF5(WXDataFrameBase):
         """Load and format the data from the h5py group."""
         self.dataset = dataset
 
-        # Make older datasets compatible with newer format.
-        if isinstance(dataset['Time'][0], (int, float)):
-            # Time needs to be converted from Excel numeric dates
-            # to ISO date strings (see jnsebgosselin/gwhat#297).
-            print('Saving time as ISO date strings instead of Excel dates...',
-                  end=' ')
-            strtimes = xldates_to_strftimes(dataset['Time'])
-            del dataset['Time']
-            dataset.create_dataset('Time', data=strtimes)
-            dataset.file.flush()
-            print('done')
-        if 'Location' not in list(dataset.attrs.keys()):
-            # Added in version 0.4.0 (see jnsebgosselin/gwhat#297).
-            if 'Province' in dataset.attrs.keys():
-                dataset.attrs['Location'] = dataset.attrs['Province']
-                del dataset.attrs['Province']
-            else:
-                dataset.attrs['Location'] = ''
-            dataset.file.flush()
-        if 'Station ID' not in list(dataset.attrs.keys()):
-            # Added in version 0.4.0 (see jnsebgosselin/gwhat#297).
-            if 'Climate Identifier' in dataset.attrs.keys():
-                dataset.attrs['Station ID'] = (
-                    dataset.attrs['Climate Identifier'])
-                del dataset.attrs['Climate Identifier']
-            else:
-                dataset.attrs['Station ID'] = ''
-            dataset.file.flush()
-        for key in ['yearly', 'monthly', 'normals', 'Period']:
-            # Removed in version 0.4.0 (see jnsebgosselin/gwhat#297).
-            if key in dataset.keys():
-                del dataset[key]
-                print(("Removing '{}' from project data because it is "
-                       "not needed anymore.").format(key))
-        for variable in METEO_VARIABLES:
-            key = 'Missing {}'.format(variable)
-            if (key in dataset.keys() and len(dataset[key]) > 0 and
-                    isinstance(dataset[key][0], (int, float))):
-                print(("Saving missing {} data time as ISO date strings "
-                       "instead of Excel dates...").format(variable),
-                      end=' ')
-                # The missing data were previously saved as a list
-                # of xldate periods separated by a nan value. To convert to
-                # the new format, we need to expand the datetimes values
-                # within each period and remove the nan values.
-                try:
-                    missing_idx = dataset[key][:-1]
-                    missing_idx = np.reshape(
-                        missing_idx, (len(missing_idx) // 3, 3))[:, 1:]
-
-                    restruct_missing_idx = []
-                    for period in missing_idx:
-                        restruct_missing_idx.extend(np.arange(*period))
-
-                    del dataset[key]
-                except ValueError:
-                    pass
-                else:
-                    strtimes = xldates_to_strftimes(restruct_missing_idx)
-                    dataset.create_dataset(key, data=strtimes)
-                dataset.file.flush()
-                print('done')
-
         # Get the metadata.
         for key in dataset.attrs.keys():
             self.metadata[key] = dataset.attrs[key]
@@ -902,7 +1197,7 @@ class WXDataFrameHDF5(WXDataFrameBase):
         self.data = pd.DataFrame(
             [],
             columns=METEO_VARIABLES,
-            index=pd.to_datetime(dataset['Time'], infer_datetime_format=True)
+            index=pd.DatetimeIndex(load_datetimes_from_h5grp(dataset, 'Time'))
             )
         for variable in METEO_VARIABLES:
             self.data[variable] = np.copy(dataset[variable])
@@ -912,13 +1207,20 @@ class WXDataFrameHDF5(WXDataFrameBase):
         for variable in METEO_VARIABLES:
             key = 'Missing {}'.format(variable)
             if key in dataset.keys():
-                self.missing_value_indexes[variable] = pd.to_datetime(
-                    dataset[key][:], infer_datetime_format=True)
+                self.missing_value_indexes[variable] = pd.DatetimeIndex(
+                    load_datetimes_from_h5grp(dataset, key))
 
     @property
     def name(self):
         return osp.basename(self.dataset.name)
 
+    def memory_usage(self):
+        """
+        Return the memory used by the data of this dataset in bytes.
+        """
+        return int(self.data.memory_usage(index=True).sum() + sum(
+            index.nbytes for index in self.missing_value_indexes.values()))
+
 
 class GLUEDataFrameHDF5(GLUEDataFrameBase):
     """
@@ -985,6 +1287,14 @@ def save_dict_to_h5grp(h5grp, dic):
             h5grp.create_dataset(key, data=item)
 
 
+def load_datetimes_from_h5grp(h5grp, key):
+    """
+    Return the datetimes saved as int64 epoch times in a dataset of the
+    hdf5 group as a numpy array of datetime64[ns].
+    """
+    return h5grp[key][...].astype('int64').view('datetime64[ns]')
+
+
 def load_dict_from_h5grp(h5grp):
     """
     Retrieve the content of a hdf5 group and organize it in a dictionary.
@@ -15,19 +15,34 @@ import os.path as osp
 import csv
 from collections import OrderedDict
 from collections.abc import Mapping
+import warnings
 
 # ---- Third party imports
 import numpy as np
 import pandas as pd
+from pandas.errors import DtypeWarning
 import xlrd
 from xlrd.xldate import xldate_from_datetime_tuple
 from xlrd import xldate_as_tuple
 
 # ---- Local library imports
 from gwhat.common.utils import save_content_to_csv
+from gwhat.utils.dates import (
+    datetime64_to_isostrings, datetimeindex_to_xldates, format_time_data)
+from gwhat.utils.excel import ExcelDataReader
+from gwhat.utils.filecache import to_json_value
+from gwhat.utils.math import (
+    indexes_to_ranges, merge_ranges, ranges_to_indexes)
+from gwhat import __version__
 
 FILE_EXTS = ['.csv', '.xls', '.xlsx']
 
+# The version of the parser of water level datafiles that is used to
+# invalidate the parsed data stored in a ParsedFileCache. The number after
+# the version of GWHAT must be incremented when the way datafiles are parsed
+# changes.
+PARSER_VERSION = __version__ + '-1'
+
 
 # ---- Read and Load Water Level Datafiles
 INDEX = 'Time'
@@ -61,9 +76,16 @@ class EmptyWLDataset(pd.DataFrame):
 
 
 class WLDataset(EmptyWLDataset):
+    # The metadata of the dataset are stored as attributes of the dataframe
+    # and must be declared here to be preserved when it is pickled.
+    _metadata = list(HEADER.keys()) + ['filename']
+
     def __init__(self, data, columns):
         super().__init__()
-        df = pd.DataFrame(data, columns=columns)
+        if isinstance(data, pd.DataFrame):
+            df = data
+        else:
+            df = pd.DataFrame(data, columns=columns)
         for column in columns:
             for colname, regex in COL_REGEX.items():
                 str_ = column.replace(" ", "").replace("_", "")
@@ -87,24 +109,10 @@ class WLDataset(EmptyWLDataset):
     def format_datetime_data(self):
         """Format the dates to datetimes and set it as index."""
         if INDEX in self.columns:
-            try:
-                # We assume first that the dates are stored in the
-                # Excel numeric format.
-                datetimes = self['Time'].astype('float64', errors='raise')
-                datetimes = pd.to_datetime(datetimes.apply(
-                    lambda date: xlrd.xldate.xldate_as_datetime(date, 0)))
-            except ValueError:
-                try:
-                    # Try converting the strings to datetime objects.
-                    # The format of the datetime strings must be
-                    # "%Y-%m-%d %H:%M:%S"
-                    datetimes = pd.to_datetime(
-                        self['Time'], infer_datetime_format=True)
-                except ValueError:
-                    print('WARNING: the dates are not formatted correctly.')
-            finally:
-                self['Time'] = datetimes
-                self.set_index(['Time'], drop=True, inplace=True)
+            # The dates are either stored in the Excel numeric format or
+            # as strings.
+            self['Time'] = format_time_data(self['Time'].values)
+            self.set_index(['Time'], drop=True, inplace=True)
         else:
             print('WARNING: no "Time" data found in the datafile.')
 
@@ -115,61 +123,117 @@ class WLDataset(EmptyWLDataset):
             self.drop_duplicates(keep='first', inplace=True)
 
 
-def open_water_level_datafile(filename):
-    """Open a water level data file and return the data."""
+def read_water_level_datafile(filename):
+    """
+    Load a water level dataset from a csv or an Excel file and format the
+    data in a Pandas dataframe with the dates used as index.
+    """
+    if filename is None or not osp.exists(filename):
+        return None
     root, ext = os.path.splitext(filename)
-    if ext not in FILE_EXTS:
-        raise ValueError("Supported file format are: ", FILE_EXTS)
-    else:
-        print('Loading waterlvl time-series from "%s"...' %
-              osp.basename(filename))
-
     if ext == '.csv':
-        with open(filename, 'r', encoding='utf8') as f:
-            data = list(csv.reader(f, delimiter=','))
+        return read_water_level_csvfile(filename)
     elif ext in ['.xls', '.xlsx']:
-        with xlrd.open_workbook(filename, on_demand=True) as wb:
-            sheet = wb.sheet_by_index(0)
-            data = [sheet.row_values(rowx, start_colx=0, end_colx=None) for
-                    rowx in range(sheet.nrows)]
+        return read_water_level_excelfile(filename)
+    else:
+        raise ValueError("Supported file format are: ", FILE_EXTS)
 
-    return data
 
+def read_water_level_csvfile(filename):
+    """
+    Load a water level dataset from a csv file and format the data in a
+    Pandas dataframe with the dates used as index.
 
-def read_water_level_datafile(filename):
+    The lines of the header are parsed one at a time until the row
+    containing the labels of the columns is found. The data are then read
+    from there with the C engine of pandas, which reads only the columns
+    that are needed, with numerical values parsed directly as floats.
     """
-    Load a water level dataset from a csv or an Excel file and format the
-    data in a Pandas dataframe with the dates used as index.
+    print('Loading waterlvl time-series from "%s"...' %
+          osp.basename(filename))
+    with open(filename, 'rb') as f:
+        # Fetch the metadata from the header.
+        header = deepcopy(HEADER)
+        while True:
+            line = f.readline()
+            if not line:
+                print("ERROR: the water level datafile is not "
+                      "formatted correctly.")
+                return None
+            row = next(csv.reader([line.decode('utf8')], delimiter=','), [])
+            if not len(row):
+                continue
+            if _read_header_row(row, header):
+                break
+        data_offset = f.tell()
+
+        # Determine the columns that need to be read from the file.
+        usecols = _get_usecols(row)
+        names = {i: row[i] for i in usecols.values()}
+
+        # Read the data with the C engine of pandas. If some values can't
+        # be parsed as floats, the data are read again with the types
+        # inferred by pandas and these values are coerced to nan
+        # afterwards in WLDataset.
+        read_csv_kwargs = dict(
+            sep=',', header=None, names=list(range(len(row))),
+            usecols=list(names.keys()), engine='c', encoding='utf8',
+            skip_blank_lines=True)
+        try:
+            df = pd.read_csv(f, dtype={
+                i: 'float64' for colname, i in usecols.items() if
+                colname != INDEX}, **read_csv_kwargs)
+        except ValueError:
+            f.seek(data_offset)
+            with warnings.catch_warnings():
+                # Columns with mixed types are expected here.
+                warnings.simplefilter('ignore', DtypeWarning)
+                df = pd.read_csv(f, **read_csv_kwargs)
+    df.rename(columns=names, inplace=True)
+
+    # Cast the data into a Pandas dataframe.
+    dataf = WLDataset(df, columns=list(df.columns))
+
+    # Add the metadata to the dataframe.
+    for key in header.keys():
+        setattr(dataf, key, header[key])
+    dataf.filename = filename
+
+    return dataf
+
+
+def read_water_level_excelfile(filename):
     """
-    if filename is None or not osp.exists(filename):
-        return None
-    reader = open_water_level_datafile(filename)
-
-    # Fetch the metadata from the header.
-    header = deepcopy(HEADER)
-    for i, row in enumerate(reader):
-        if not len(row):
-            continue
-        label = str(row[0]).replace(" ", "").replace("_", "")
-        for key in HEADER.keys():
-            if re.search(HEADER_REGEX[key], label, re.IGNORECASE):
-                if isinstance(header[key], (float, int)):
-                    try:
-                        header[key] = float(row[1])
-                    except ValueError:
-                        print('Wrong format for entry "{}".'.format(key))
-                else:
-                    header[key] = str(row[1])
+    Load a water level dataset from an Excel file and format the data in a
+    Pandas dataframe with the dates used as index.
+
+    Only the rows of the header are read one by one. The data are then read
+    by columns, and only for the columns that are needed, so that numerical
+    values are stored directly in numerical arrays.
+    """
+    print('Loading waterlvl time-series from "%s"...' %
+          osp.basename(filename))
+    with ExcelDataReader(filename) as reader:
+        # Fetch the metadata from the header.
+        header = deepcopy(HEADER)
+        for row in reader:
+            if not len(row):
+                continue
+            if _read_header_row(row, header):
                 break
         else:
-            if re.search(COL_REGEX[INDEX], label, re.IGNORECASE):
-                break
-    else:
-        print("ERROR: the water level datafile is not formatted correctly.")
-        return None
+            print("ERROR: the water level datafile is not "
+                  "formatted correctly.")
+            return None
+
+        # Read the data of the columns that are needed.
+        colxs = list(_get_usecols(row).values())
+        df = pd.DataFrame(OrderedDict(
+            (row[colx], values) for colx, values in
+            zip(colxs, reader.read_columns(colxs))))
 
     # Cast the data into a Pandas dataframe.
-    dataf = WLDataset(reader[i+1:], columns=row)
+    dataf = WLDataset(df, columns=list(df.columns))
 
     # Add the metadata to the dataframe.
     for key in header.keys():
@@ -179,6 +243,41 @@ def read_water_level_datafile(filename):
     return dataf
 
 
+def _get_usecols(columns):
+    """
+    Return a dictionary with the indexes of the labels of the water level
+    datafile that match the Time, WL, BP and ET columns.
+    """
+    usecols = {}
+    for i, column in enumerate(columns):
+        str_ = str(column).replace(" ", "").replace("_", "")
+        for colname, regex in COL_REGEX.items():
+            if re.search(regex, str_, re.IGNORECASE):
+                usecols[colname] = i
+                break
+    return usecols
+
+
+def _read_header_row(row, header):
+    """
+    Read the metadata contained in a row of the header of a water level
+    datafile and return whether the row contains the labels of the
+    columns of the data instead.
+    """
+    label = str(row[0]).replace(" ", "").replace("_", "")
+    for key in HEADER.keys():
+        if re.search(HEADER_REGEX[key], label, re.IGNORECASE):
+            if isinstance(header[key], (float, int)):
+                try:
+                    header[key] = float(row[1])
+                except ValueError:
+                    print('Wrong format for entry "{}".'.format(key))
+            else:
+                header[key] = str(row[1])
+            return False
+    return bool(re.search(COL_REGEX[INDEX], label, re.IGNORECASE))
+
+
 # ---- Water Level Manual Measurements
 def init_waterlvl_measures(dirname):
     """
@@ -309,22 +408,59 @@ class WLDataFrameBase(Mapping):
         Return a numpy array containing the Excel numerical dates
         corresponding to the dates of the dataset.
         """
-        if 'XLDATES' not in self._dataf.columns:
+        if 'XLDATES' not in self.data.columns:
             print('Converting datetimes to xldates...', end=' ')
-            timedeltas = (
-                self._dataf.index - xlrd.xldate.xldate_as_datetime(4000, 0))
-            self._dataf['XLDATES'] = (
-                timedeltas.total_seconds()/(3600 * 24) + 4000)
+            self.data['XLDATES'] = datetimeindex_to_xldates(self.data.index)
             print('done')
-        return self._dataf['XLDATES'].values
+        return self.data['XLDATES'].values
 
     @property
-    def dates(self):
+    def times(self):
+        """
+        Return a numpy array containing the datetime64 times of the dataset.
+        """
         return self.data.index.values
 
+    @property
+    def dates(self):
+        return self.times
+
     @property
     def strftime(self):
-        return self.data.index.strftime("%Y-%m-%dT%H:%M:%S").values.tolist()
+        return datetime64_to_isostrings(self.times).tolist()
+
+    # ---- Time windows
+    def get_index_range(self, start=None, end=None):
+        """
+        Return the half-open [start, stop) index range of the data whose
+        times are between the start and end datetimes inclusively. The
+        times of the dataset must be sorted.
+
+        The range is not bounded on the left if start is None and on the
+        right if end is None.
+        """
+        times = self.times
+        istart = (0 if start is None else int(np.searchsorted(
+            times, pd.Timestamp(start).to_datetime64(), side='left')))
+        istop = (len(times) if end is None else int(np.searchsorted(
+            times, pd.Timestamp(end).to_datetime64(), side='right')))
+        return istart, max(istart, istop)
+
+    def get_window(self, start=None, end=None):
+        """
+        Return a dataframe with the data whose times are between the start
+        and end datetimes inclusively.
+        """
+        times = self.times
+        if np.all(times[1:] >= times[:-1]):
+            return self.data.iloc[slice(*self.get_index_range(start, end))]
+        else:
+            mask = np.ones(len(times), dtype=bool)
+            if start is not None:
+                mask &= times >= pd.Timestamp(start).to_datetime64()
+            if end is not None:
+                mask &= times <= pd.Timestamp(end).to_datetime64()
+            return self.data[mask]
 
     @property
     def waterlevels(self):
@@ -345,8 +481,8 @@ class WLDataFrameBase(Mapping):
     def undo(self):
         """Undo the last changes made to the water level data."""
         if self.has_uncommited_changes:
-            changes = self._undo_stack.pop(-1)
-            self._dataf['WL'][changes.index] = changes
+            ranges, old_values = self._undo_stack.pop(-1)
+            self._set_waterlevels_at(ranges_to_indexes(ranges), old_values)
 
     def clear_all_changes(self):
         """
@@ -356,31 +492,76 @@ class WLDataFrameBase(Mapping):
         while self.has_uncommited_changes:
             self.undo()
 
+    def get_uncommited_ranges(self, gap=0):
+        """
+        Return the half-open [start, stop) index ranges of the water level
+        data that were changed since the last commit.
+
+        Ranges that are separated by no more than the specified gap are
+        merged together.
+        """
+        return merge_ranges(
+            *[ranges for ranges, old_values in self._undo_stack], gap=gap)
+
     def delete_waterlevels_at(self, indexes):
         """Delete the water level data at the specified indexes."""
-        if len(indexes):
-            self._add_to_undo_stack(indexes)
-            self._dataf['WL'].iloc[indexes] = np.nan
+        self.delete_waterlevels_in(indexes_to_ranges(indexes))
 
-    def _add_to_undo_stack(self, indexes):
+    def delete_waterlevels_in(self, ranges):
+        """
+        Delete the water level data in the specified half-open
+        [start, stop) index ranges.
         """
-        Store the old water level values at the specified indexes in a stack
-        before changing or deleting them. This allow to undo or cancel any
-        changes made to the water level data before commiting them.
+        ranges = merge_ranges(ranges)
+        if len(ranges):
+            indexes = ranges_to_indexes(ranges)
+            self._add_to_undo_stack(ranges, indexes)
+            self._set_waterlevels_at(indexes, np.nan)
+
+    def _add_to_undo_stack(self, ranges, indexes):
         """
-        if len(indexes):
-            self._undo_stack.append(self._dataf['WL'].iloc[indexes].copy())
+        Store the old water level values at the specified index ranges in
+        a stack before changing or deleting them. This allow to undo or
+        cancel any changes made to the water level data before commiting
+        them.
+
+        Only the index ranges and the values they contain are stored, so
+        that the memory used by the stack is proportional to the size of
+        the changes rather than the size of the dataset.
+        """
+        if len(ranges):
+            self._undo_stack.append(
+                (ranges, self.data['WL'].values[indexes].copy()))
+
+    def _set_waterlevels_at(self, indexes, values):
+        """Set the water level data at the specified indexes."""
+        self.data.iloc[indexes, self.data.columns.get_loc('WL')] = values
 
 
 class WLDataFrame(WLDataFrameBase):
     """
     A water level dataset container that loads its data from a csv
     or an Excel file.
+
+    If a ParsedFileCache is provided, the data are loaded from the cache
+    if the datafile did not change since it was last parsed, and are stored
+    in the cache otherwise.
     """
 
-    def __init__(self, filename, *args, **kwargs):
+    def __init__(self, filename, *args, cache=None, **kwargs):
         super().__init__(*args, **kwargs)
+        if cache is not None:
+            key = cache.get_key(filename, PARSER_VERSION)
+            cached = cache.get(filename, PARSER_VERSION, key=key)
+            if cached is not None:
+                print('Loading waterlvl time-series of "%s" from cache.' %
+                      osp.basename(filename))
+                self._set_cached_state(*cached)
+                return
         self.__load_dataset__(filename)
+        if cache is not None and self._dataf is not None:
+            cache.put(filename, PARSER_VERSION, *self._get_cached_state(),
+                      key=key)
 
     def __getitem__(self, key):
         """Returns the value saved in the store at key."""
@@ -399,6 +580,29 @@ class WLDataFrame(WLDataFrameBase):
         """Loads the dataset from a file and saves it in the store."""
         self._dataf = read_water_level_datafile(filename)
 
+    def _get_cached_state(self):
+        """
+        Return the arrays and the attributes to store in a ParsedFileCache
+        to restore this dataset without parsing its datafile again.
+        """
+        arrays = {INDEX: self._dataf.index.values}
+        for column in self._dataf.columns:
+            arrays[column] = self._dataf[column].values
+        attrs = {'columns': self._dataf.columns.tolist(),
+                 'metadata': {key: to_json_value(getattr(self._dataf, key))
+                              for key in WLDataset._metadata}}
+        return arrays, attrs
+
+    def _set_cached_state(self, arrays, attrs):
+        """Restore this dataset from the data stored in a ParsedFileCache."""
+        columns = [INDEX] + attrs['columns']
+        self._dataf = WLDataset(
+            pd.DataFrame(OrderedDict(
+                (column, arrays[column]) for column in columns)),
+            columns=columns)
+        for key, value in attrs['metadata'].items():
+            setattr(self._dataf, key, value)
+
 
 if __name__ == "__main__":
     from gwhat import __rootdir__
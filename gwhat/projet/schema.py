@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""
+The version of the schema of the project hdf5 files and the migration of
+the projects saved with an older version of the schema.
+
+The schema version of a project is saved in the 'schema_version' attribute
+of the root of its hdf5 file:
+
+1: Projects created before the schema was versioned. The time axes of the
+   datasets are saved as ISO date strings or as Excel numeric dates, and
+   the format of each dataset is checked and updated when it is loaded.
+2: The time axes of the datasets are saved as int64 nanoseconds since the
+   Unix epoch.
+3: All the datasets of the project are migrated in a single pass when the
+   project is loaded, so that the datasets can be loaded without checking
+   their format.
+"""
+
+# ---- Standard library imports
+import datetime
+import os.path as osp
+import shutil
+
+# ---- Third party imports
+import numpy as np
+
+# ---- Local imports
+from gwhat.meteo.weather_reader import METEO_VARIABLES
+from gwhat.projet.storage import (
+    DEFAULT_STORAGE_POLICY, save_datetimes_to_h5grp)
+from gwhat.utils.dates import isostrings_to_datetime64, xldates_to_datetime64
+
+SCHEMA_VERSION = 3
+
+
+def get_schema_version(h5file):
+    """Return the schema version of the project hdf5 file."""
+    return int(h5file.attrs.get('schema_version', 1))
+
+
+def get_schema_backup_filename(filename, version):
+    """
+    Return the path of the copy of the project hdf5 file that is saved
+    before the project is migrated from the specified schema version.
+    """
+    return '{}.v{}.bak'.format(filename, version)
+
+
+def backup_project_before_migration(filename, version):
+    """
+    Copy the project hdf5 file before it is migrated from the specified
+    schema version, since the migration can't be undone.
+
+    An existing copy is not replaced, since the project may have been
+    changed by a migration that did not complete.
+    """
+    backup_filename = get_schema_backup_filename(filename, version)
+    if osp.exists(backup_filename):
+        return
+    print("Saving a copy of the project before migration to '{}'...".format(
+        osp.basename(backup_filename)), end=' ')
+    shutil.copy2(filename, backup_filename)
+    print('done')
+
+
+def migrate_project(h5file):
+    """
+    Migrate all the datasets of the project hdf5 file to the current schema
+    version in a single pass and save the new schema version in the root
+    attributes of the file.
+    """
+    print("Migrating project from schema version {} to {}...".format(
+        get_schema_version(h5file), SCHEMA_VERSION), end=' ')
+    for name in h5file['wldsets'].keys():
+        _migrate_wldset(h5file['wldsets'][name])
+    for name in h5file['wxdsets'].keys():
+        _migrate_wxdset(h5file['wxdsets'][name])
+    h5file.attrs['schema_version'] = SCHEMA_VERSION
+    h5file.flush()
+    print('done')
+
+
+def _migrate_datetimes(h5grp, key):
+    """
+    Save the datetimes of the dataset that were saved as Excel numeric
+    dates or as ISO date strings as int64 epoch times.
+    """
+    dataset = h5grp[key]
+    if dataset.dtype.kind in ('i', 'u'):
+        return
+    if dataset.dtype.kind == 'f':
+        datetimes = xldates_to_datetime64(dataset[...])
+    else:
+        datetimes = isostrings_to_datetime64(dataset[...])
+    del h5grp[key]
+    save_datetimes_to_h5grp(h5grp, key, datetimes, DEFAULT_STORAGE_POLICY)
+
+
+def _migrate_wldset(grp):
+    """Migrate the water level dataset saved in the hdf5 group."""
+    # Time was saved as Excel numeric dates before PR #276 and as ISO
+    # date strings before version 2 of the schema.
+    _migrate_datetimes(grp, 'Time')
+    if 'Well ID' not in grp.attrs.keys():
+        # Added in version 0.2.1 (see PR #124).
+        grp.attrs['Well ID'] = ""
+    if 'Province' not in grp.attrs.keys():
+        # Added in version 0.2.1 (see PR #124).
+        grp.attrs['Province'] = ""
+    if 'glue' not in grp.keys():
+        # Added in version 0.3.1 (see PR #184)
+        grp.create_group('glue')
+    if 'mrc' not in grp.keys():
+        mrc = grp.create_group('mrc')
+        mrc.attrs['exists'] = 0
+        mrc.create_dataset('params', data=(0, 0), dtype='float64')
+        mrc.create_dataset('peak_indx', data=np.array([]),
+                           dtype='int16', maxshape=(None,))
+        mrc.create_dataset('recess', data=np.array([]),
+                           dtype='float64', maxshape=(None,))
+        mrc.create_dataset('time', data=np.array([]),
+                           dtype='float64', maxshape=(None,))
+    if 'layout' not in grp.keys():
+        grp.create_group('layout')
+    if 'manual' not in grp.keys():
+        mmeas = grp.create_group('manual')
+        mmeas.create_dataset('Time', data=np.array([]), maxshape=(None,))
+        mmeas.create_dataset('WL', data=np.array([]), maxshape=(None,))
+    for name in grp.require_group('brf').keys():
+        _migrate_brf(grp['brf'][name])
+
+
+def _migrate_brf(grp):
+    """Migrate the BRF evaluation saved in the hdf5 group."""
+    if 'err' in grp.keys():
+        grp['sdA'] = grp['err']
+        del grp['err']
+    if 'SumA' not in grp.keys():
+        grp['SumA'] = grp['A']
+        del grp['A']
+    if 'lag' in grp.keys():
+        grp['Lag'] = grp['lag']
+        del grp['lag']
+    for key in ['date start', 'date end']:
+        if key in grp.keys():
+            grp.attrs[key] = (
+                datetime.datetime(*grp[key][...], 0).isoformat())
+            del grp[key]
+    if 'detrending' not in grp.attrs.keys():
+        grp.attrs['detrending'] = ''
+
+
+def _migrate_wxdset(grp):
+    """Migrate the weather dataset saved in the hdf5 group."""
+    if 'Location' not in grp.attrs.keys():
+        # Added in version 0.4.0 (see jnsebgosselin/gwhat#297).
+        if 'Province' in grp.attrs.keys():
+            grp.attrs['Location'] = grp.attrs['Province']
+            del grp.attrs['Province']
+        else:
+            grp.attrs['Location'] = ''
+    if 'Station ID' not in grp.attrs.keys():
+        # Added in version 0.4.0 (see jnsebgosselin/gwhat#297).
+        if 'Climate Identifier' in grp.attrs.keys():
+            grp.attrs['Station ID'] = grp.attrs['Climate Identifier']
+            del grp.attrs['Climate Identifier']
+        else:
+            grp.attrs['Station ID'] = ''
+    for key in ['yearly', 'monthly', 'normals', 'Period']:
+        # Removed in version 0.4.0 (see jnsebgosselin/gwhat#297).
+        if key in grp.keys():
+            del grp[key]
+
+    # Time was saved as Excel numeric dates before jnsebgosselin/gwhat#297
+    # and as ISO date strings before version 2 of the schema.
+    _migrate_datetimes(grp, 'Time')
+    for variable in METEO_VARIABLES:
+        key = 'Missing {}'.format(variable)
+        if key not in grp.keys():
+            continue
+        if len(grp[key]) > 0 and grp[key].dtype.kind == 'f':
+            # The missing data were previously saved as a list of xldate
+            # periods separated by a nan value. To convert to the new
+            # format, we need to expand the datetimes values within each
+            # period and remove the nan values.
+            try:
+                missing_idx = grp[key][:-1]
+                missing_idx = np.reshape(
+                    missing_idx, (len(missing_idx) // 3, 3))[:, 1:]
+            except ValueError:
+                pass
+            else:
+                restruct_missing_idx = []
+                for period in missing_idx:
+                    restruct_missing_idx.extend(np.arange(*period))
+                del grp[key]
+                save_datetimes_to_h5grp(
+                    grp, key, xldates_to_datetime64(restruct_missing_idx),
+                    DEFAULT_STORAGE_POLICY)
+        _migrate_datetimes(grp, key)
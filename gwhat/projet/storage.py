@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""
+The storage policy that defines the chunking and the compression filters of
+the time series datasets saved in the project hdf5 files, and a tool to
+report the space used by existing projects and to repack them with a given
+storage policy.
+
+Usage, from the command line:
+    python -m gwhat.projet.storage project.gwt --compression gzip --level 4
+    python -m gwhat.projet.storage project.gwt --report
+"""
+
+# ---- Standard library imports
+import argparse
+from collections import namedtuple
+import os
+import os.path as osp
+import shutil
+import tempfile
+
+# ---- Third party imports
+import h5py
+import numpy as np
+
+# ---- Local imports
+from gwhat.projet.lock import ProjectLock, ProjectLockedError
+
+
+COMPRESSION_OPTIONS = ['gzip', 'lzf', 'none']
+
+# The units of the int64 datasets in which datetimes are saved.
+EPOCH_UNITS = 'nanoseconds since 1970-01-01T00:00:00'
+
+StoragePolicy = namedtuple('StoragePolicy', [
+    'chunk_size', 'compression', 'compression_opts', 'shuffle'])
+StoragePolicy.__doc__ = """
+The storage policy of the time series datasets saved in a project.
+
+The chunk size is the number of values stored in each chunk of the
+datasets. The compression is either 'gzip', 'lzf' or None, in which case
+the datasets are stored contiguously without any filter. The compression
+options is the gzip compression level, from 0 to 9, and is ignored for the
+other compression filters. If shuffle is True, the bytes of the values are
+shuffled before compression, which improves the compression ratio of
+slowly varying time series.
+"""
+
+# Chunks of 32768 values (256 KB for float64) are small enough to fit in the
+# default chunk cache of HDF5 and large enough to keep the overhead of the
+# chunk index small for long high-frequency time series.
+DEFAULT_STORAGE_POLICY = StoragePolicy(
+    chunk_size=2 ** 15, compression='gzip', compression_opts=4, shuffle=True)
+CONTIGUOUS_STORAGE_POLICY = StoragePolicy(
+    chunk_size=None, compression=None, compression_opts=None, shuffle=False)
+
+SpaceReport = namedtuple('SpaceReport', [
+    'file_size', 'data_size', 'free_size', 'ndatasets'])
+SpaceReport.__doc__ = """
+A report of the space used by a project hdf5 file, in bytes.
+
+The data size is the space allocated to the data of all the datasets of
+the project and the free size is the rest of the file, which is the space
+used by the metadata of the file and the space that was left unused by the
+datasets and groups that were deleted or rewritten, since hdf5 files do
+not reclaim this space. The number of datasets is the number of hdf5
+datasets in the file.
+"""
+
+
+def get_dataset_kwargs(storage_policy, size):
+    """
+    Return the keyword arguments to pass to h5py create_dataset to create a
+    time series dataset of the specified size with the storage policy.
+    """
+    if (storage_policy is None or storage_policy.compression is None or
+            size == 0):
+        # Filters can only be applied to chunked datasets and chunks can't be
+        # larger than the size of a dataset that is not resizable.
+        return {}
+    kwargs = {'chunks': (min(storage_policy.chunk_size, size),),
+              'compression': storage_policy.compression,
+              'shuffle': storage_policy.shuffle}
+    if storage_policy.compression == 'gzip':
+        kwargs['compression_opts'] = storage_policy.compression_opts
+    return kwargs
+
+
+def create_timeseries_dataset(h5grp, key, data, storage_policy=None):
+    """
+    Create a dataset in the hdf5 group to store the time series data with
+    the storage policy.
+    """
+    data = np.asarray(data)
+    return h5grp.create_dataset(
+        key, data=data, **get_dataset_kwargs(storage_policy, data.size))
+
+
+def save_datetimes_to_h5grp(h5grp, key, datetimes, storage_policy=None):
+    """
+    Save the datetimes in a dataset of the hdf5 group as int64 nanoseconds
+    since the Unix epoch. NaT values are saved as the minimum int64 value.
+    """
+    dataset = create_timeseries_dataset(
+        h5grp, key,
+        np.asarray(datetimes, dtype='datetime64[ns]').view('int64'),
+        storage_policy)
+    dataset.attrs['units'] = EPOCH_UNITS
+    return dataset
+
+
+def is_timeseries_dataset(item):
+    """
+    Return whether the hdf5 item is the time, data or missing value times
+    dataset of a water level or a weather dataset of a project.
+    """
+    path = item.name.strip('/').split('/')
+    return (isinstance(item, h5py.Dataset) and len(path) == 3 and
+            path[0] in ('wldsets', 'wxdsets') and item.ndim == 1 and
+            item.dtype.kind in ('i', 'u', 'f'))
+
+
+# ---- Space report and repack
+def get_space_report(h5file):
+    """Return a SpaceReport of the space used by the project hdf5 file."""
+    h5file.flush()
+    datasets = []
+    h5file.visititems(
+        lambda name, item: datasets.append(item) if
+        isinstance(item, h5py.Dataset) else None)
+    file_size = osp.getsize(h5file.filename)
+    data_size = sum(dataset.id.get_storage_size() for dataset in datasets)
+    return SpaceReport(
+        file_size, data_size, max(file_size - data_size, 0), len(datasets))
+
+
+def format_space_report(report):
+    """Return the space report formatted as a text."""
+    return ('Project size: {:0.1f} MB ({:,} datasets), data: {:0.1f} MB, '
+            'metadata and free space: {:0.1f} MB ({:0.0%})').format(
+                report.file_size / 1024**2, report.ndatasets,
+                report.data_size / 1024**2, report.free_size / 1024**2,
+                report.free_size / max(report.file_size, 1))
+
+
+def repack_project(filename, storage_policy=DEFAULT_STORAGE_POLICY,
+                   dest=None):
+    """
+    Rewrite the project hdf5 file with its time series datasets stored with
+    the specified storage policy, and return the size of the file in bytes
+    before and after it was repacked.
+
+    The project is rewritten in a temporary file that replaces the original
+    file, or that is saved at dest if provided, only once it was
+    completely written. Since hdf5 files do not reclaim the space of deleted
+    or rewritten datasets, repacking also reduces the size of projects in
+    which many datasets were deleted or migrated. The permissions of the
+    original file are preserved.
+
+    The write access to the project must be granted with a ProjectLock.
+    """
+    dest = filename if dest is None else dest
+    fd, tmpfilename = tempfile.mkstemp(
+        suffix='.gwt', dir=osp.dirname(osp.abspath(dest)))
+    os.close(fd)
+    try:
+        with h5py.File(filename, mode='r') as src, \
+                h5py.File(tmpfilename, mode='w') as dst:
+            _copy_attrs(src, dst)
+            for key in src.keys():
+                _copy_item(src[key], dst, storage_policy)
+        old_size = osp.getsize(filename)
+        # The temporary file is created readable and writable only by its
+        # owner.
+        shutil.copymode(filename, tmpfilename)
+        os.replace(tmpfilename, dest)
+    finally:
+        if osp.exists(tmpfilename):
+            os.remove(tmpfilename)
+    return old_size, osp.getsize(dest)
+
+
+def _copy_item(item, dst, storage_policy):
+    """
+    Copy recursively the hdf5 item in the destination group, storing the time
+    series datasets with the storage policy.
+    """
+    name = osp.basename(item.name)
+    if isinstance(item, h5py.Group):
+        grp = dst.create_group(name)
+        _copy_attrs(item, grp)
+        for key in item.keys():
+            _copy_item(item[key], grp, storage_policy)
+    elif is_timeseries_dataset(item):
+        dset = create_timeseries_dataset(
+            dst, name, item[...], storage_policy)
+        _copy_attrs(item, dset)
+    else:
+        dst.copy(item, name)
+
+
+def _copy_attrs(src, dst):
+    """Copy the attributes of the source hdf5 item to the destination."""
+    for key, value in src.attrs.items():
+        dst.attrs[key] = value
+
+
+def main(argv=None):
+    """Repack a project from the command line."""
+    parser = argparse.ArgumentParser(
+        prog='python -m gwhat.projet.storage',
+        description=("Repack a GWHAT project with the time series datasets "
+                     "stored with the specified chunking and compression."))
+    parser.add_argument(
+        'project', help="The path of the project file (*.gwt).")
+    parser.add_argument(
+        '-o', '--output', default=None, metavar='FILE',
+        help="The path of the repacked project. The project is repacked in "
+             "place if not provided.")
+    parser.add_argument(
+        '--compression', choices=COMPRESSION_OPTIONS,
+        default=DEFAULT_STORAGE_POLICY.compression,
+        help="The compression filter of the time series datasets.")
+    parser.add_argument(
+        '--level', type=int, default=DEFAULT_STORAGE_POLICY.compression_opts,
+        choices=range(10), metavar='{0-9}',
+        help="The gzip compression level.")
+    parser.add_argument(
+        '--no-shuffle', action='store_true',
+        help="Do not apply the shuffle filter before compression.")
+    parser.add_argument(
+        '--chunk-size', type=int, default=DEFAULT_STORAGE_POLICY.chunk_size,
+        help="The number of values stored in each chunk.")
+    parser.add_argument(
+        '--report', action='store_true',
+        help="Only report the space used by the project.")
+    args = parser.parse_args(argv)
+
+    if args.report:
+        with h5py.File(args.project, mode='r') as h5file:
+            print(format_space_report(get_space_report(h5file)))
+        return 0
+
+    storage_policy = StoragePolicy(
+        chunk_size=args.chunk_size,
+        compression=(None if args.compression == 'none' else
+                     args.compression),
+        compression_opts=args.level,
+        shuffle=not args.no_shuffle)
+    # The project can't be written by GWHAT while it is repacked.
+    locks = [ProjectLock(args.project)]
+    if args.output is not None:
+        locks.append(ProjectLock(args.output))
+    try:
+        for lock in locks:
+            lock.acquire()
+    except ProjectLockedError as error:
+        for lock in locks:
+            lock.release()
+        print('ERROR: {}'.format(error))
+        return 1
+    print("Repacking project '{}'...".format(
+        osp.basename(args.project)), end=' ')
+    try:
+        old_size, new_size = repack_project(
+            osp.abspath(args.project), storage_policy,
+            None if args.output is None else osp.abspath(args.output))
+    finally:
+        for lock in locks:
+            lock.release()
+    print('done')
+    print('Project size: {:0.1f} MB -> {:0.1f} MB'.format(
+        old_size / 1024**2, new_size / 1024**2))
+    return 0
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main())
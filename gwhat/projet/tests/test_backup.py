@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+
+# ---- Standard Libraries Imports
+import os
+import os.path as osp
+from shutil import copyfile
+
+# ---- Third Party Libraries Imports
+import h5py
+import numpy as np
+import pytest
+
+# ---- Local Libraries Imports
+from gwhat.meteo.weather_reader import WXDataFrame
+from gwhat.projet.reader_waterlvl import WLDataFrame
+from gwhat.projet.reader_projet import ProjetReader
+from gwhat.projet.backup import (
+    BACKUP_REVISION_ATTR, backup_project, get_revision)
+
+DATADIR = osp.join(osp.dirname(osp.realpath(__file__)), 'data')
+WXFILENAME = osp.join(DATADIR, 'sample_weather_datafile.csv')
+WLFILENAME = osp.join(DATADIR, 'sample_water_level_datafile.csv')
+
+
+# ---- Pytest Fixtures
+@pytest.fixture
+def project(tmpdir):
+    """A project with two water level datasets and a weather dataset."""
+    project = ProjetReader(osp.join(str(tmpdir), "backup_test.gwt"))
+    project.name = 'backup_test'
+    project.add_wldset('wldset1', WLDataFrame(WLFILENAME))
+    project.add_wldset('wldset2', WLDataFrame(WLFILENAME))
+    project.add_wxdset('wxdset', WXDataFrame(WXFILENAME))
+    yield project
+    project.close()
+
+
+# ---- Tests
+def test_increment_revision(project):
+    """
+    Test that the revision of the datasets is incremented when they are
+    modified.
+    """
+    revision = get_revision(project.db['wldsets/wldset1'])
+    assert revision > 0
+    assert get_revision(project.db) == get_revision(
+        project.db['wxdsets/wxdset'])
+
+    wldset = project.get_wldset('wldset1')
+    wldset.save_brfperiod([41241.0, 41584.0])
+    assert get_revision(project.db['wldsets/wldset1']) > revision
+    assert get_revision(project.db['wldsets/wldset1']) == get_revision(
+        project.db)
+
+
+def test_incremental_backup(project):
+    """
+    Test that only the datasets that were modified, added or deleted since
+    the last backup are updated in the backup file.
+    """
+    bakfilename = project.filename + '.bak'
+    result = backup_project(project.db, bakfilename)
+    assert result.full is True
+    assert sorted(result.copied) == [
+        'wldsets/wldset1', 'wldsets/wldset2', 'wxdsets/wxdset']
+
+    # Nothing is copied when the project was not modified.
+    result = backup_project(project.db, bakfilename)
+    assert result == (False, [], [])
+
+    project.get_wldset('wldset1').save_brfperiod([41241.0, 41584.0])
+    project.del_wldset('wldset2')
+    project.add_wldset('wldset3', WLDataFrame(WLFILENAME))
+    project.name = 'backup_test_modified'
+    result = backup_project(project.db, bakfilename)
+    assert result == (False, ['wldsets/wldset1', 'wldsets/wldset3'],
+                      ['wldsets/wldset2'])
+
+    # Datasets deleted and added with the same name are copied.
+    project.del_wldset('wldset3')
+    project.add_wldset('wldset3', WLDataFrame(WLFILENAME))
+    result = backup_project(project.db, bakfilename)
+    assert result.copied == ['wldsets/wldset3']
+
+    backup = ProjetReader(bakfilename)
+    assert backup.check_project_file() is True
+    assert backup.name == 'backup_test_modified'
+    assert backup.wldsets == ['wldset1', 'wldset3']
+    assert backup.get_wldset('wldset1').get_brfperiod() == [41241.0, 41584.0]
+    assert np.array_equal(
+        backup.get_wldset('wldset3')['WL'],
+        project.get_wldset('wldset3')['WL'], equal_nan=True)
+    backup.close()
+
+
+@pytest.mark.skipif(os.name == 'nt', reason="Unix permissions only.")
+def test_backup_permissions(project):
+    """
+    Test that the backup file has the permissions of the project file when
+    it is created and that they are preserved when it is rewritten from
+    scratch.
+    """
+    bakfilename = project.filename + '.bak'
+    os.chmod(project.filename, 0o664)
+    assert backup_project(project.db, bakfilename).full is True
+    assert os.stat(bakfilename).st_mode & 0o777 == 0o664
+
+    os.chmod(bakfilename, 0o640)
+    with h5py.File(bakfilename, mode='a') as h5file:
+        del h5file.attrs[BACKUP_REVISION_ATTR]
+    assert backup_project(project.db, bakfilename).full is True
+    assert os.stat(bakfilename).st_mode & 0o777 == 0o640
+
+
+def test_backup_without_free_space_tracking(project, mocker):
+    """
+    Test that the project is backed up with the versions of h5py that do
+    not support tracking the free space of the files.
+    """
+    h5py_file = h5py.File
+
+    def h5py_file_without_fs_strategy(*args, **kwargs):
+        if 'fs_strategy' in kwargs or 'fs_persist' in kwargs:
+            raise TypeError("unexpected keyword argument 'fs_strategy'")
+        return h5py_file(*args, **kwargs)
+    mocker.patch.object(
+        h5py, 'File', side_effect=h5py_file_without_fs_strategy)
+
+    bakfilename = project.filename + '.bak'
+    result = backup_project(project.db, bakfilename)
+    assert result.full is True
+    with h5py_file(bakfilename, mode='r') as backup:
+        assert sorted(backup['wldsets'].keys()) == ['wldset1', 'wldset2']
+
+    # The backup can be updated incrementally afterwards.
+    project.get_wldset('wldset1').save_brfperiod([41241.0, 41584.0])
+    result = backup_project(project.db, bakfilename)
+    assert result == (False, ['wldsets/wldset1'], [])
+
+
+def test_interrupted_backup(project):
+    """
+    Test that the project is backed up from scratch when the last backup
+    did not complete.
+    """
+    bakfilename = project.filename + '.bak'
+    backup_project(project.db, bakfilename)
+    with h5py.File(bakfilename, mode='a') as h5file:
+        del h5file.attrs[BACKUP_REVISION_ATTR]
+        del h5file['wldsets/wldset1']
+
+    result = backup_project(project.db, bakfilename)
+    assert result.full is True
+    with h5py.File(bakfilename, mode='r') as h5file:
+        assert 'wldset1' in h5file['wldsets']
+
+
+def test_backup_in_background(project):
+    """
+    Test that the project is backed up in a background thread and that the
+    project can be restored from the backup.
+    """
+    filename = project.filename
+    expected_wl = project.get_wldset('wldset1')['WL']
+
+    assert project.backup_project_file(background=True) is True
+    assert project.wait_for_backup() is True
+    project.close()
+
+    os.remove(filename)
+    copyfile(filename + '.bak', filename)
+    project = ProjetReader(filename)
+    assert project.check_project_file() is True
+    assert project.name == 'backup_test'
+    assert np.array_equal(
+        project.get_wldset('wldset1')['WL'], expected_wl, equal_nan=True)
+    project.close()
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
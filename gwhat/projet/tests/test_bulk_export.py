@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+
+# ---- Standard Libraries Imports
+from datetime import datetime
+import os
+import os.path as osp
+import zipfile
+
+# ---- Third Party Libraries Imports
+import numpy as np
+import pandas as pd
+import pytest
+
+# ---- Local Libraries Imports
+from gwhat.meteo.weather_reader import WXDataFrame
+from gwhat.projet.reader_waterlvl import WLDataFrame
+from gwhat.projet.reader_projet import ProjetReader
+from gwhat.projet.bulk_export import bulk_export_results, main
+
+DATADIR = osp.join(osp.dirname(osp.realpath(__file__)), 'data')
+WXFILENAME = osp.join(DATADIR, 'sample_weather_datafile.csv')
+WLFILENAME = osp.join(DATADIR, 'sample_water_level_datafile.csv')
+
+
+# ---- Pytest Fixtures
+@pytest.fixture
+def projectpath(tmpdir):
+    """
+    A path to a project with two water level datasets, one with MRC and BRF
+    results, and a weather dataset.
+    """
+    projectpath = osp.join(str(tmpdir), "bulk_export_test.gwt")
+    project = ProjetReader(projectpath)
+    wldset = project.add_wldset('wldset1', WLDataFrame(WLFILENAME))
+    nsamples = len(wldset['WL'])
+    wldset.set_mrc(0.1, 0.2, [0, 10], np.arange(nsamples),
+                   np.arange(nsamples) / 10)
+    for i in range(2):
+        wldset.save_brf(
+            pd.DataFrame({'Lag': [0, 1], 'SumA': [0.1, 0.2],
+                          'sdA': [0.01, np.nan]}),
+            datetime(2013, 3, 1), datetime(2013, 3, 2))
+    project.add_wldset('wldset2', WLDataFrame(WLFILENAME))
+    project.add_wxdset('wxdset1', WXDataFrame(WXFILENAME))
+    project.close()
+    return projectpath
+
+
+# ---- Tests
+def test_bulk_export_results(projectpath, tmpdir):
+    """
+    Test that the results of the datasets of a project are exported in
+    a directory in all the specified formats.
+    """
+    outdir = osp.join(str(tmpdir), 'results')
+    reported = []
+    reports = bulk_export_results(
+        projectpath, outdir, formats=['csv', 'xlsx'], max_workers=2,
+        callback=reported.append)
+
+    assert len(reported) == len(reports) == 6
+    assert [(report.name, report.result) for report in reports] == [
+        ('wldset1', 'mrc'), ('wldset1', 'brf 1'), ('wldset1', 'brf 2'),
+        ('wxdset1', 'weather daily'), ('wxdset1', 'weather monthly'),
+        ('wxdset1', 'weather yearly')]
+    assert all(report.status == 'exported' for report in reports)
+    assert all(report.size > 0 for report in reports)
+    assert reports[0].filenames == [
+        osp.join('wells', 'wldset1', 'mrc.csv'),
+        osp.join('wells', 'wldset1', 'mrc.xlsx')]
+    for report in reports:
+        for filename in report.filenames:
+            assert osp.exists(osp.join(outdir, filename))
+
+    # Assert that the exported weather data are correct.
+    with open(osp.join(outdir, 'weather stations', 'wxdset1',
+                       'weather_daily.csv'), encoding='utf8') as f:
+        lines = f.read().splitlines()
+    wxdset = WXDataFrame(WXFILENAME)
+    assert len(lines) == 14 + len(wxdset.data)
+
+
+def test_bulk_export_results_to_archive(projectpath, tmpdir):
+    """
+    Test that the results are exported in a zip archive and that only the
+    specified results and datasets are exported.
+    """
+    archivename = osp.join(str(tmpdir), 'results.zip')
+    reports = bulk_export_results(
+        projectpath, archivename, results=['brf', 'weather daily'],
+        wldsets=['wldset1', 'wldset2'], wxdsets=[], max_workers=1)
+    assert [report.result for report in reports] == ['brf 1', 'brf 2']
+
+    with zipfile.ZipFile(archivename) as archive:
+        assert sorted(archive.namelist()) == [
+            'wells/wldset1/brf_1.csv', 'wells/wldset1/brf_2.csv']
+    # The temporary directory in which the results were exported is removed.
+    assert os.listdir(str(tmpdir)) == sorted(
+        ['bulk_export_test.gwt', 'results.zip'])
+
+    with pytest.raises(ValueError):
+        bulk_export_results(projectpath, archivename, wldsets=['wldset3'])
+
+
+def test_bulk_export_cli(projectpath, tmpdir, capsys):
+    """Test that the results of a project are exported from the CLI."""
+    outdir = osp.join(str(tmpdir), 'results')
+    assert main([projectpath, outdir, '--results', 'mrc', '--formats',
+                 'tsv', 'xls', '-j', '2']) == 0
+    assert sorted(os.listdir(osp.join(outdir, 'wells', 'wldset1'))) == [
+        'mrc.tsv', 'mrc.xls']
+
+    captured = capsys.readouterr()
+    assert 'exported wldset1 mrc' in captured.out
+    assert 'Exported 2 files' in captured.out
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
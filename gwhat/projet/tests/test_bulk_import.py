@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+
+# ---- Standard Libraries Imports
+import os
+import os.path as osp
+
+# ---- Third Party Libraries Imports
+import numpy as np
+import pytest
+
+# ---- Local Libraries Imports
+from gwhat.meteo.weather_reader import WXDataFrame
+from gwhat.projet.reader_waterlvl import WLDataFrame
+from gwhat.projet.reader_projet import ProjetReader
+from gwhat.projet.bulk_import import bulk_import_datasets, main
+
+DATADIR = osp.join(osp.dirname(osp.realpath(__file__)), 'data')
+WXFILENAME = osp.join(DATADIR, 'sample_weather_datafile.csv')
+WLFILENAME = osp.join(DATADIR, 'sample_water_level_datafile.csv')
+WLFILENAME2 = osp.join(DATADIR, 'sample_water_level_datafile2.csv')
+
+
+# ---- Pytest Fixtures
+@pytest.fixture
+def projectpath(tmpdir):
+    return osp.join(str(tmpdir), "bulk_import_test.gwt")
+
+
+@pytest.fixture
+def project(projectpath):
+    project = ProjetReader(projectpath)
+    yield project
+    project.close()
+
+
+@pytest.fixture
+def badfilename(tmpdir):
+    filename = osp.join(str(tmpdir), "bad_water_level_datafile.csv")
+    with open(filename, 'w') as f:
+        f.write('This is not a water level datafile.\n')
+    return filename
+
+
+# ---- Tests
+def test_bulk_import_datasets(project, badfilename):
+    """
+    Test that water level and weather datafiles are imported in the project
+    and that a report is returned for each datafile.
+    """
+    reported = []
+    reports = bulk_import_datasets(
+        project, [WLFILENAME, badfilename, WLFILENAME2], [WXFILENAME],
+        max_workers=2, callback=reported.append)
+
+    assert len(reported) == 4
+    assert [report.filename for report in reports] == [
+        WLFILENAME, badfilename, WLFILENAME2, WXFILENAME]
+    assert [report.status for report in reports] == [
+        'imported', 'failed', 'imported', 'imported']
+    assert all(report.parse_time > 0 for report in reports)
+    assert reports[1].messages
+
+    # Assert that the datasets were saved correctly in the project.
+    assert sorted(project.wldsets) == sorted(
+        [reports[0].name, reports[2].name])
+    assert project.wxdsets == [reports[3].name]
+
+    wldset = project.get_wldset(reports[0].name)
+    expected = WLDataFrame(WLFILENAME)
+    assert np.array_equal(wldset['WL'], expected['WL'], equal_nan=True)
+    assert wldset['Well'] == expected['Well']
+
+    wxdset = project.get_wxdset(reports[3].name)
+    expected = WXDataFrame(WXFILENAME)
+    assert np.allclose(wxdset.data['Ptot'].values,
+                       expected.data['Ptot'].values)
+
+
+@pytest.mark.parametrize("on_exists", ['rename', 'replace', 'skip'])
+def test_bulk_import_existing_datasets(project, on_exists):
+    """
+    Test that datasets that already exist in the project are handled as
+    expected.
+    """
+    reports = bulk_import_datasets(project, [WLFILENAME], max_workers=1)
+    name = reports[0].name
+
+    reports = bulk_import_datasets(
+        project, [WLFILENAME], max_workers=1, on_exists=on_exists)
+    if on_exists == 'rename':
+        assert reports[0].status == 'imported'
+        assert reports[0].name == name + ' (2)'
+        assert sorted(project.wldsets) == [name, name + ' (2)']
+    elif on_exists == 'replace':
+        assert reports[0].status == 'imported'
+        assert reports[0].name == name
+        assert project.wldsets == [name]
+    elif on_exists == 'skip':
+        assert reports[0].status == 'skipped'
+        assert project.wldsets == [name]
+
+
+def test_bulk_import_cli(projectpath, capsys):
+    """Test that datafiles are imported in a project from the CLI."""
+    assert main([projectpath, '--wl', WLFILENAME, '--wx', WXFILENAME,
+                 '-j', '2']) == 0
+
+    project = ProjetReader(projectpath)
+    assert len(project.wldsets) == 1
+    assert len(project.wxdsets) == 1
+    project.close()
+
+    captured = capsys.readouterr()
+    assert 'imported {}'.format(WLFILENAME) in captured.out
+    assert 'imported {}'.format(WXFILENAME) in captured.out
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+
+# ---- Standard Libraries Imports
+import os
+import os.path as osp
+
+# ---- Third Party Libraries Imports
+import pytest
+
+# ---- Local Libraries Imports
+from gwhat.meteo.weather_reader import WXDataFrame
+from gwhat.projet.reader_waterlvl import WLDataFrame
+from gwhat.projet.reader_projet import ProjetReader
+from gwhat.projet.bulk_render import (
+    bulk_render_hydrographs, main, render_hydrograph)
+
+DATADIR = osp.join(osp.dirname(osp.realpath(__file__)), 'data')
+WXFILENAME = osp.join(DATADIR, 'sample_weather_datafile.csv')
+WLFILENAME = osp.join(DATADIR, 'sample_water_level_datafile.csv')
+
+LAYOUT = {'WLmin': 4.5, 'WLscale': 0.5, 'RAINscale': 40,
+          'fwidth': 8.5, 'fheight': 5, 'va_ratio': 0.3, 'NZGrid': 10,
+          'bwidth_indx': 2, 'date_labels_pattern': 1, 'datemode': 'Year',
+          'wxdset': 'wxdset1', 'TIMEmin': 41275, 'TIMEmax': 41640,
+          'WLdatum': 'masl', 'title_on': False, 'legend_on': True,
+          'language': 'french', 'trend_line': False, 'meteo_on': True,
+          'glue_wl_on': False, 'mrc_wl_on': False, 'figframe_lw': 1,
+          'colors': {'Rain': [0, 0, 255]}}
+
+
+# ---- Pytest Fixtures
+@pytest.fixture
+def projectpath(tmpdir):
+    """
+    A path to a project with two water level datasets, one with a saved
+    graph layout, and a weather dataset.
+    """
+    projectpath = osp.join(str(tmpdir), "bulk_render_test.gwt")
+    project = ProjetReader(projectpath)
+    wldset = project.add_wldset('wldset1', WLDataFrame(WLFILENAME))
+    wldset.save_layout(LAYOUT)
+    project.add_wldset('wldset2', WLDataFrame(WLFILENAME))
+    project.add_wxdset('wxdset1', WXDataFrame(WXFILENAME))
+    project.close()
+    return projectpath
+
+
+# ---- Tests
+def test_render_hydrograph(projectpath, tmpdir):
+    """
+    Test that the hydrograph of a well is rendered with its saved layout.
+    """
+    project = ProjetReader(projectpath, readonly=True)
+    wldset = project.get_wldset('wldset1')
+    wxdset = project.get_wxdset('wxdset1')
+
+    filename = osp.join(str(tmpdir), 'hydrograph.png')
+    hydrograph = render_hydrograph(
+        filename, wldset, wxdset, wldset.get_layout())
+    assert osp.exists(filename)
+    assert hydrograph.WLmin == 4.5
+    assert hydrograph.WLscale == 0.5
+    assert hydrograph.WLdatum == 1
+    assert hydrograph.datemode == 'Year'
+    assert hydrograph.language == 'french'
+    assert hydrograph.isGraphTitle is False
+    assert hydrograph.meteo_on is True
+    assert hydrograph.colorsDB.RGB['Rain'] == [0, 0, 255]
+    assert list(hydrograph.get_size_inches()) == [8.5, 5]
+
+    # Without a layout, the scales are fitted to the water level data.
+    hydrograph = render_hydrograph(filename, wldset)
+    assert hydrograph.meteo_on is False
+    assert hydrograph.TIMEmin < hydrograph.TIMEmax
+    assert hydrograph.WLscale > 0
+
+    with pytest.raises(ValueError):
+        render_hydrograph(osp.join(str(tmpdir), 'hydrograph.jpg'), wldset)
+    project.close()
+
+
+def test_bulk_render_hydrographs(projectpath, tmpdir):
+    """
+    Test that the hydrographs of the wells of a project are rendered in
+    all the specified formats.
+    """
+    outdir = osp.join(str(tmpdir), 'hydrographs')
+    reported = []
+    reports = bulk_render_hydrographs(
+        projectpath, outdir, formats=['pdf', 'svg'], max_workers=2,
+        callback=reported.append)
+
+    assert len(reported) == len(reports) == 2
+    assert [report.name for report in reports] == ['wldset1', 'wldset2']
+    assert all(report.status == 'rendered' for report in reports)
+    assert all(report.size > 0 for report in reports)
+    # The weather dataset of the well without a layout is the closest one.
+    assert [report.wxdset for report in reports] == ['wxdset1', 'wxdset1']
+    assert sorted(os.listdir(outdir)) == [
+        'wldset1.pdf', 'wldset1.svg', 'wldset2.pdf', 'wldset2.svg']
+
+    with pytest.raises(ValueError):
+        bulk_render_hydrographs(projectpath, outdir, wldsets=['wldset3'])
+    with pytest.raises(ValueError):
+        bulk_render_hydrographs(projectpath, outdir, formats=['jpg'])
+
+
+def test_bulk_render_cli(projectpath, tmpdir, capsys):
+    """Test that the hydrographs of a project are rendered from the CLI."""
+    outdir = osp.join(str(tmpdir), 'hydrographs')
+    assert main([projectpath, outdir, '--wl', 'wldset2', '--formats',
+                 'png', '-j', '1']) == 0
+    assert os.listdir(outdir) == ['wldset2.png']
+
+    captured = capsys.readouterr()
+    assert 'rendered wldset2' in captured.out
+    assert 'Rendered the hydrographs of 1 wells' in captured.out
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
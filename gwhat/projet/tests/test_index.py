@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+
+# ---- Standard Libraries Imports
+from datetime import datetime
+import os
+import os.path as osp
+
+# ---- Third Party Libraries Imports
+import h5py
+import numpy as np
+import pandas as pd
+import pytest
+
+# ---- Local Libraries Imports
+from gwhat.meteo.weather_reader import WXDataFrame
+from gwhat.projet.backup import increment_revision
+from gwhat.projet.reader_waterlvl import WLDataFrame
+import gwhat.projet.reader_projet
+from gwhat.projet.reader_projet import ProjetReader
+from gwhat.projet.index import INDEX_GROUP
+
+DATADIR = osp.join(osp.dirname(osp.realpath(__file__)), 'data')
+WXFILENAME = osp.join(DATADIR, 'sample_weather_datafile.csv')
+WLFILENAME = osp.join(DATADIR, 'sample_water_level_datafile.csv')
+
+# The name, latitude, longitude and time shift in years of the data of the
+# weather stations of the test project.
+STATIONS = [('station1', 45.0, -73.0, 0),
+            ('station2', 46.0, -73.0, 0),
+            ('station3', 45.1, -73.1, -50),
+            ('station4', 49.0, -80.0, 0)]
+
+
+def copy_first_lines(filename, dirname, nlines):
+    """
+    Copy the first lines of the datafile in the directory and return the
+    path of the copy.
+    """
+    copyname = osp.join(dirname, osp.basename(filename))
+    with open(filename, 'r', encoding='utf-8') as src:
+        lines = [src.readline() for i in range(nlines)]
+    with open(copyname, 'w', encoding='utf-8') as dst:
+        dst.writelines(lines)
+    return copyname
+
+
+# ---- Pytest Fixtures
+@pytest.fixture(scope='module')
+def wxdset():
+    return WXDataFrame(WXFILENAME)
+
+
+@pytest.fixture
+def projectpath(tmpdir, wxdset):
+    """A path to a project with weather datasets at different locations."""
+    projectpath = osp.join(str(tmpdir), "index_test.gwt")
+    project = ProjetReader(projectpath)
+    data = wxdset.data
+    for name, lat, lon, shift in STATIONS:
+        wxdset.metadata['Latitude'] = lat
+        wxdset.metadata['Longitude'] = lon
+        wxdset.data = data.set_index(
+            data.index + pd.DateOffset(years=shift))
+        project.add_wxdset(name, wxdset)
+    wxdset.data = data
+    project.close()
+    return projectpath
+
+
+# ---- Tests
+def test_wxdsets_index(projectpath, wxdset):
+    """
+    Test that the index of the weather datasets is saved in the project
+    and updated when weather datasets are added or deleted.
+    """
+    project = ProjetReader(projectpath)
+    index = project.get_wxdsets_index()
+    assert list(index.index) == [name for name, *_ in STATIONS]
+    assert list(index['Latitude']) == [lat for _, lat, _, _ in STATIONS]
+    assert project.get_wxdsets_lon() == [lon for _, _, lon, _ in STATIONS]
+    assert index.loc['station1', 'Start'] == wxdset.data.index[0]
+    assert index.loc['station1', 'End'] == wxdset.data.index[-1]
+    assert index.loc['station3', 'End'] < wxdset.data.index[0]
+
+    project.del_wxdset('station2')
+    wxdset.metadata['Latitude'] = 44.0
+    project.add_wxdset('station0', wxdset)
+    project.close()
+
+    # The index is loaded from the project instead of being rebuilt.
+    project = ProjetReader(projectpath)
+    assert INDEX_GROUP in project.db
+    index = project.get_wxdsets_index()
+    assert list(index.index) == ['station0', 'station1', 'station3',
+                                 'station4']
+    assert index.loc['station0', 'Latitude'] == 44.0
+    project.close()
+
+    # The index is rebuilt if a weather dataset was added without updating
+    # the index.
+    with h5py.File(projectpath, mode='a') as h5file:
+        h5file.copy(h5file['wxdsets/station4'], 'wxdsets/station5')
+    project = ProjetReader(projectpath)
+    index = project.get_wxdsets_index()
+    assert list(index.index)[-1] == 'station5'
+    assert index.loc['station5', 'Longitude'] == -80.0
+    project.close()
+
+
+def test_wxdsets_index_one_sample(projectpath, tmpdir):
+    """
+    Test that a weather dataset with a single sample is indexed with the
+    same start and end time.
+    """
+    wxdset = WXDataFrame(copy_first_lines(WXFILENAME, str(tmpdir), 12))
+    assert len(wxdset.data) == 1
+
+    project = ProjetReader(projectpath)
+    project.add_wxdset('station5', wxdset)
+    index = project.get_wxdsets_index()
+    assert index.loc['station5', 'Samples'] == 1
+    assert index.loc['station5', 'Start'] == wxdset.data.index[0]
+    assert index.loc['station5', 'End'] == wxdset.data.index[0]
+    project.close()
+
+
+def test_add_wldset_failed(tmpdir, mocker):
+    """
+    Test that a water level dataset that fails to be saved is removed from
+    the project and its index.
+    """
+    project = ProjetReader(osp.join(str(tmpdir), "index_test.gwt"))
+    wldf = WLDataFrame(WLFILENAME)
+    project.add_wldset('wldset1', wldf)
+    project.get_wldsets_index()
+
+    mocker.patch.object(
+        gwhat.projet.reader_projet, 'create_timeseries_dataset',
+        side_effect=OSError)
+    assert project.add_wldset('wldset2', wldf) is None
+    assert project.wldsets == ['wldset1']
+    assert list(project.get_wldsets_index().index) == ['wldset1']
+
+    # An existing dataset is not deleted when a dataset is added with
+    # the same name.
+    with pytest.raises(ValueError):
+        project.add_wldset('wldset1', wldf)
+    assert project.wldsets == ['wldset1']
+    project.close()
+
+
+def test_wldsets_index(tmpdir, mocker):
+    """
+    Test that the index of the water level datasets is updated when the
+    datasets are added, modified or deleted and that it is rebuilt only
+    when it is not up-to-date.
+    """
+    projectpath = osp.join(str(tmpdir), "index_test.gwt")
+    wldf = WLDataFrame(WLFILENAME)
+    project = ProjetReader(projectpath)
+    project.add_wldset('wldset1', wldf)
+    index = project.get_wldsets_index()
+    assert list(index.index) == ['wldset1']
+    assert index.loc['wldset1', 'Well'] == wldf['Well']
+    assert index.loc['wldset1', 'Latitude'] == wldf['Latitude']
+    assert index.loc['wldset1', 'Samples'] == len(wldf.data)
+    assert index.loc['wldset1', 'Start'] == wldf.dates[0]
+    assert index.loc['wldset1', 'End'] == wldf.dates[-1]
+    assert not index.loc['wldset1', 'MRC']
+    assert index.loc['wldset1', 'BRF'] == 0
+    assert index.loc['wldset1', 'Size'] > 0
+
+    project.add_wldset('wldset2', wldf)
+    wldset = project.get_wldset('wldset1')
+    wldset.save_brf(
+        pd.DataFrame({'Lag': [0, 1], 'A': [0.1, 0.2], 'err': [0.01, 0.02]}),
+        datetime(2013, 3, 1), datetime(2013, 3, 2))
+    wldset.set_mrc(0.1, 0.2, [0, 10], np.arange(10), np.arange(10))
+    index = project.get_wldsets_index()
+    assert list(index.index) == ['wldset1', 'wldset2']
+    assert index.loc['wldset1', 'BRF'] == 1
+    assert index.loc['wldset1', 'MRC']
+    assert index.loc['wldset2', 'BRF'] == 0
+
+    project.del_wldset('wldset2')
+    assert list(project.get_wldsets_index().index) == ['wldset1']
+
+    # A dataset with a single sample is indexed with the same start and
+    # end time.
+    wldf_one_sample = WLDataFrame(copy_first_lines(WLFILENAME, str(tmpdir), 9))
+    assert len(wldf_one_sample.data) == 1
+    project.add_wldset('wldset3', wldf_one_sample)
+    index = project.get_wldsets_index()
+    assert index.loc['wldset3', 'Samples'] == 1
+    assert index.loc['wldset3', 'Start'] == wldf_one_sample.dates[0]
+    assert index.loc['wldset3', 'End'] == wldf_one_sample.dates[0]
+    project.del_wldset('wldset3')
+    project.close()
+
+    # The index is saved atomically in the project and loaded instead of
+    # being rebuilt when the project is opened again.
+    spy = mocker.spy(gwhat.projet.reader_projet, 'build_index')
+    project = ProjetReader(projectpath)
+    assert list(project.db[INDEX_GROUP].keys()) == ['wldsets']
+    index = project.get_wldsets_index()
+    assert spy.call_count == 0
+    assert index.loc['wldset1', 'BRF'] == 1
+    project.close()
+
+    # The index is rebuilt if a water level dataset was modified without
+    # updating the index.
+    with h5py.File(projectpath, mode='a') as h5file:
+        h5file['wldsets/wldset1'].attrs['Well'] = 'modified'
+        increment_revision(h5file['wldsets/wldset1'])
+    project = ProjetReader(projectpath)
+    index = project.get_wldsets_index()
+    assert spy.call_count == 1
+    assert index.loc['wldset1', 'Well'] == 'modified'
+    project.close()
+
+
+def test_get_closest_wxdsets(projectpath, wxdset):
+    """
+    Test that the closest weather datasets are found and filtered by their
+    data period.
+    """
+    project = ProjetReader(projectpath)
+    assert project.get_closest_wxdsets(45.1, -73.1) == ['station3']
+    assert project.get_closest_wxdsets(45.1, -73.1, k=3) == [
+        'station3', 'station1', 'station2']
+    assert project.get_closest_wxdsets(45.1, -73.1, k=10) == [
+        'station3', 'station1', 'station2', 'station4']
+
+    start, end = wxdset.data.index[[2, 8]].values
+    assert project.get_closest_wxdsets(
+        45.1, -73.1, start=start, end=end) == ['station1']
+    assert project.get_closest_wxdsets(
+        45.1, -73.1, start=np.datetime64('1800-01-01'),
+        end=np.datetime64('1800-12-31')) == []
+    project.close()
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+
+# ---- Standard Libraries Imports
+import json
+import os
+import os.path as osp
+import socket
+import subprocess
+import sys
+
+# ---- Third Party Libraries Imports
+import h5py
+import pytest
+
+# ---- Local Libraries Imports
+from gwhat.projet.reader_waterlvl import WLDataFrame
+from gwhat.projet.reader_projet import ProjetReader
+from gwhat.projet.lock import ProjectLock, ProjectLockedError
+
+DATADIR = osp.join(osp.dirname(osp.realpath(__file__)), 'data')
+WLFILENAME = osp.join(DATADIR, 'sample_water_level_datafile.csv')
+
+
+# ---- Pytest Fixtures
+@pytest.fixture
+def projectpath(tmpdir):
+    """A path to a project with a water level dataset."""
+    projectpath = osp.join(str(tmpdir), "lock_test.gwt")
+    project = ProjetReader(projectpath)
+    project.name = 'lock_test'
+    project.add_wldset('wldset1', WLDataFrame(WLFILENAME))
+    project.close()
+    return projectpath
+
+
+def write_lockfile(projectpath, pid, hostname=None):
+    """Write a lock file for the project as if it was held by pid."""
+    with open(projectpath + '.lock', 'w') as f:
+        json.dump({'pid': pid,
+                   'hostname': hostname or socket.gethostname(),
+                   'created': ''}, f)
+
+
+# ---- Tests
+def test_project_lock(projectpath):
+    """
+    Test that the lock file of a project is held while it is opened with
+    write access and that the lock is reentrant in a process.
+    """
+    lockfile = projectpath + '.lock'
+    project = ProjetReader(projectpath)
+    assert osp.exists(lockfile)
+    assert ProjectLock(projectpath).get_owner()['pid'] == os.getpid()
+
+    project2 = ProjetReader(projectpath)
+    project.close()
+    assert osp.exists(lockfile)
+    project2.close()
+    assert not osp.exists(lockfile)
+
+    # Projects opened in read-only mode do not hold the lock.
+    project = ProjetReader(projectpath, readonly=True)
+    assert not osp.exists(lockfile)
+    project.close()
+
+
+def test_project_locked_by_other_process(projectpath):
+    """
+    Test that a project can't be opened with write access while another
+    process holds its lock, but that it can be opened in read-only mode.
+    """
+    # The parent process of the tests is running.
+    write_lockfile(projectpath, os.getppid())
+    with pytest.raises(ProjectLockedError):
+        ProjetReader(projectpath)
+
+    # The processes of other hosts are assumed to be running.
+    write_lockfile(projectpath, os.getppid(), hostname='other_host')
+    with pytest.raises(ProjectLockedError):
+        ProjetReader(projectpath)
+
+    project = ProjetReader(projectpath, readonly=True)
+    assert project.name == 'lock_test'
+    assert project.get_wldset('wldset1') is not None
+    assert project.backup_project_file() is False
+    with pytest.raises(ValueError):
+        project.compact()
+    project.close()
+
+
+def test_stale_project_lock(projectpath):
+    """
+    Test that the lock file left by a process that is not running anymore
+    is replaced.
+    """
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    write_lockfile(projectpath, process.pid)
+
+    project = ProjetReader(projectpath)
+    assert ProjectLock(projectpath).get_owner()['pid'] == os.getpid()
+    project.close()
+
+
+def test_break_project_lock(projectpath):
+    """
+    Test that the lock of a project held by a process of another host can
+    be broken, but not the lock held by this process.
+    """
+    write_lockfile(projectpath, os.getppid(), hostname='other_host')
+    with pytest.raises(ProjectLockedError):
+        ProjetReader(projectpath)
+
+    ProjectLock(projectpath).break_lock()
+    assert not osp.exists(projectpath + '.lock')
+    project = ProjetReader(projectpath)
+    with pytest.raises(ValueError):
+        ProjectLock(projectpath).break_lock()
+    assert osp.exists(projectpath + '.lock')
+    project.close()
+
+    # Breaking a lock that is not held does nothing.
+    ProjectLock(projectpath).break_lock()
+
+
+def test_hdf5_file_locking_disabled(projectpath, mocker):
+    """
+    Test that the file locking of hdf5 is disabled before h5py is imported,
+    since it can't be disabled when the files are opened with h5py older
+    than 3.5.
+    """
+    env = os.environ.copy()
+    env.pop('HDF5_USE_FILE_LOCKING', None)
+    code = ("import os, gwhat, h5py; "
+            "print('LOCKING:' + os.environ['HDF5_USE_FILE_LOCKING'])")
+    process = subprocess.run(
+        [sys.executable, '-c', code], capture_output=True,
+        universal_newlines=True, env=env,
+        cwd=osp.dirname(osp.dirname(osp.dirname(osp.dirname(
+            osp.realpath(__file__))))))
+    assert 'LOCKING:FALSE' in process.stdout
+
+    # The projects are opened without the locking keyword with h5py
+    # older than 3.5.
+    h5py_file = h5py.File
+
+    def h5py_file_without_locking(*args, **kwargs):
+        if 'locking' in kwargs:
+            raise TypeError("unexpected keyword argument 'locking'")
+        return h5py_file(*args, **kwargs)
+    mocker.patch.object(h5py, 'File', side_effect=h5py_file_without_locking)
+
+    writer = ProjetReader(projectpath)
+    reader = ProjetReader(projectpath, readonly=True)
+    assert reader.wldsets == writer.wldsets == ['wldset1']
+    reader.close()
+    writer.close()
+
+
+def test_read_while_writing(projectpath):
+    """
+    Test that a project can be read in read-only mode by another process
+    while it is opened with write access and that the reader can be
+    refreshed to read the changes flushed by the writer.
+    """
+    writer = ProjetReader(projectpath)
+    writer.name = 'lock_test_modified'
+    writer.db.flush()
+
+    code = ("import sys; "
+            "from gwhat.projet.reader_projet import ProjetReader; "
+            "reader = ProjetReader(sys.argv[1], readonly=True); "
+            "print('NAME:' + reader.name); "
+            "print('WLDSETS:' + ','.join(reader.wldsets))")
+    process = subprocess.run(
+        [sys.executable, '-c', code, projectpath], capture_output=True,
+        universal_newlines=True,
+        cwd=osp.dirname(osp.dirname(osp.dirname(osp.dirname(
+            osp.realpath(__file__))))))
+    assert 'NAME:lock_test_modified' in process.stdout
+    assert 'WLDSETS:wldset1' in process.stdout
+
+    reader = ProjetReader(projectpath, readonly=True)
+    assert reader.wldsets == ['wldset1']
+    writer.add_wldset('wldset2', WLDataFrame(WLFILENAME))
+    reader.refresh()
+    assert reader.wldsets == ['wldset1', 'wldset2']
+    reader.close()
+    writer.close()
+
+
+def test_readonly_legacy_project(projectpath):
+    """
+    Test that a project saved with an older version of the schema can't be
+    opened in read-only mode, since it needs to be migrated.
+    """
+    with h5py.File(projectpath, mode='a') as h5file:
+        del h5file.attrs['schema_version']
+    with pytest.raises(ValueError):
+        ProjetReader(projectpath, readonly=True)
+
+    # The project can be read once it is migrated.
+    ProjetReader(projectpath).close()
+    project = ProjetReader(projectpath, readonly=True)
+    assert project.wldsets == ['wldset1']
+    project.close()
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
@@ -13,6 +13,7 @@ import os
 import os.path as osp
 
 # ---- Third Party Libraries Imports
+import pandas as pd
 import pytest
 from PyQt5.QtCore import Qt
 
@@ -249,6 +250,36 @@ def test_delete_waterlevel_data(datamanager, mocker, qtbot):
     assert mock_exec_.call_count == 2
 
 
+def test_set_closest_wxdset(datamanager, project):
+    """
+    Test that the closest weather station whose data period overlaps the
+    one of the water level dataset is selected, or the closest weather
+    station if none overlaps.
+    """
+    project.add_wldset('wldset', WLDataFrame(WLFILENAME))
+    datamanager.update_wldsets('wldset')
+    datamanager.wldset_changed()
+
+    # The data of the sample weather datafile are from 2000, while the
+    # water level data are from 2013.
+    wxdset = WXDataFrame(WXFILENAME)
+    wxdset.metadata['Latitude'] = 45.74581
+    wxdset.metadata['Longitude'] = -73.28024
+    project.add_wxdset('closest', wxdset)
+    wxdset.metadata['Latitude'] = 46.5
+    wxdset.data = wxdset.data.set_index(
+        wxdset.data.index + pd.DateOffset(years=12, months=4))
+    project.add_wxdset('overlapping', wxdset)
+    datamanager.update_wxdsets()
+
+    assert datamanager.set_closest_wxdset() == 'overlapping'
+    assert datamanager.wxdsets_cbox.currentText() == 'overlapping'
+
+    datamanager._confirm_before_deleting_dset = False
+    datamanager.del_current_wxdset()
+    assert datamanager.set_closest_wxdset() == 'closest'
+
+
 def test_last_opened_datasets(qtbot, projectpath):
     """
     Test that the data manager recall correctly the water level and weather
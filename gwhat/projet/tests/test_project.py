@@ -8,14 +8,18 @@
 # -----------------------------------------------------------------------------
 
 # ---- Standard library imports
+import json
 import os
 import os.path as osp
+import socket
 os.environ['GWHAT_PYTEST'] = 'True'
 
 # ---- Third party imports
+import h5py
 import pytest
 
 # ---- Local imports
+from gwhat.projet import reader_projet
 from gwhat.projet.reader_projet import ProjetReader
 from gwhat.projet.manager_projet import (
     ProjetManager, QFileDialog, QMessageBox, CONF)
@@ -109,6 +113,7 @@ def test_create_new_projet(projmanager, mocker, projectpath):
     # have been created.
     projmanager.new_projet_dialog.save_project()
     assert osp.exists(projectpath)
+    assert projmanager.projet.wait_for_backup() is True
     assert osp.exists(projectpath + '.bak')
     assert projmanager.project_selector.text() == NAME + '.gwt'
     assert projmanager.project_selector.recent_projects() == [
@@ -128,6 +133,7 @@ def test_load_projet(projmanager, mocker, projectfile):
     mocker.patch.object(
         QFileDialog, 'getOpenFileName', return_value=(projectfile, '*.gwt'))
     projmanager.select_project()
+    assert projmanager.projet.wait_for_backup() is True
     assert osp.exists(projectfile + '.bak')
 
     # Assert that the project has been loaded correctly and that its name is
@@ -243,6 +249,50 @@ def test_load_corrupt_project_cancel(projmanager, mocker, projectfile):
     assert not osp.exists(projectfile + '.bak')
 
 
+def test_load_locked_project(projmanager, mocker, projectfile):
+    """
+    Test loading a project that is already opened with write access by
+    another process.
+    """
+    with open(projectfile + '.lock', 'w') as f:
+        json.dump({'pid': os.getppid(), 'hostname': socket.gethostname()}, f)
+
+    # Breaking the lock is not offered, since the process of this host
+    # that holds the lock is running.
+    mock_qmsgbox = mocker.patch.object(
+        QMessageBox, 'exec_', return_value=QMessageBox.Yes)
+    result = projmanager.load_project(projectfile)
+
+    assert mock_qmsgbox.call_count == 1
+    assert result is False
+    assert projmanager.projet is None
+    assert projmanager.project_selector.text() == ''
+    # The lock file of the other process is not removed.
+    with open(projectfile + '.lock', 'r') as f:
+        assert json.load(f)['pid'] == os.getppid()
+
+
+def test_break_project_lock(projmanager, mocker, projectfile):
+    """
+    Test that the lock of a project held by a process of another host can
+    be broken to open the project.
+    """
+    with open(projectfile + '.lock', 'w') as f:
+        json.dump({'pid': os.getpid(), 'hostname': 'otherhost'}, f)
+
+    mock_qmsgbox = mocker.patch.object(
+        QMessageBox, 'exec_', return_value=QMessageBox.Yes)
+    result = projmanager.load_project(projectfile)
+
+    assert mock_qmsgbox.call_count == 1
+    assert result is True
+    assert projmanager.projet is not None
+    with open(projectfile + '.lock', 'r') as f:
+        assert json.load(f)['hostname'] == socket.gethostname()
+    projmanager.close_projet()
+    assert not osp.exists(projectfile + '.lock')
+
+
 def test_restore_invalid_project(projmanager, mocker, projectfile, bakfile):
     """
     Test restoring an invalid project from backup.
@@ -342,14 +392,15 @@ def test_restore_corrupt_project(projmanager, mocker, projectfile, bakfile):
         projectfile]
     assert len(projmanager.project_selector.menu.actions()) == 4
 
-    # Try loading the corrupt project and click Yes.
+    # Try loading the corrupt project and click Yes. The backup is checked
+    # without being opened as a project.
     mock_checkproj.reset_mock()
-    mock_checkproj.side_effect = [False, True, True]
+    mock_checkproj.side_effect = [False, True]
     mock_qmsgbox.return_value = QMessageBox.Yes
 
     result = projmanager.load_project(projectfile)
     assert mock_qmsgbox.call_count == 3
-    assert mock_checkproj.call_count == 3
+    assert mock_checkproj.call_count == 2
     assert result is True
     assert isinstance(projmanager.projet, ProjetReader)
     assert projmanager.project_selector.text() == NAME + '.gwt'
@@ -358,5 +409,31 @@ def test_restore_corrupt_project(projmanager, mocker, projectfile, bakfile):
     assert len(projmanager.project_selector.menu.actions()) == 4
 
 
+def test_restore_project_from_old_backup(projmanager, mocker, projectfile,
+                                         bakfile):
+    """
+    Test that a backup saved with an older version of the schema is checked
+    in read-only mode, so that it is not migrated, when the project is
+    restored from it.
+    """
+    with h5py.File(bakfile, mode='a') as h5file:
+        del h5file.attrs['schema_version']
+    with open(projectfile, 'w') as f:
+        f.write('empty file')
+
+    migrate_project = mocker.spy(reader_projet, 'migrate_project')
+    mocker.patch.object(QMessageBox, 'exec_', return_value=QMessageBox.Yes)
+    result = projmanager.load_project(projectfile)
+    assert result is True
+    assert projmanager.projet.name == NAME
+    projmanager.projet.wait_for_backup()
+
+    # Only the restored project was migrated, after a copy of it was saved.
+    assert migrate_project.call_count == 1
+    with h5py.File(projectfile + '.v1.bak', mode='r') as h5file:
+        assert 'schema_version' not in h5file.attrs
+        assert h5file.attrs['name'] == NAME
+
+
 if __name__ == "__main__":
     pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
@@ -0,0 +1,393 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+
+# ---- Standard Libraries Imports
+from datetime import datetime
+import os
+import os.path as osp
+
+# ---- Third Party Libraries Imports
+import h5py
+import numpy as np
+import pandas as pd
+import pytest
+
+# ---- Local Libraries Imports
+from gwhat.meteo.weather_reader import WXDataFrame, METEO_VARIABLES
+from gwhat.projet.reader_waterlvl import WLDataFrame
+from gwhat.projet import reader_projet
+from gwhat.projet.reader_projet import ProjetReader, SCHEMA_VERSION
+from gwhat.projet.storage import CONTIGUOUS_STORAGE_POLICY, StoragePolicy
+from gwhat.utils.dates import datetime64_to_isostrings
+
+DATADIR = osp.join(osp.dirname(osp.realpath(__file__)), 'data')
+WXFILENAME = osp.join(DATADIR, 'sample_weather_datafile.csv')
+WLFILENAME = osp.join(DATADIR, 'sample_water_level_datafile.csv')
+
+
+# ---- Pytest Fixtures
+@pytest.fixture
+def projectpath(tmpdir):
+    return osp.join(str(tmpdir), "reader_projet_test.gwt")
+
+
+@pytest.fixture
+def project(projectpath):
+    project = ProjetReader(projectpath)
+    yield project
+    project.close()
+
+
+@pytest.fixture
+def wldset():
+    return WLDataFrame(WLFILENAME)
+
+
+@pytest.fixture
+def wxdset():
+    return WXDataFrame(WXFILENAME)
+
+
+# ---- Tests
+def test_save_times_as_epoch(project, wldset, wxdset):
+    """
+    Test that the time axes of the datasets are saved in the project as int64
+    epoch times and that they are loaded back correctly.
+    """
+    assert project.schema_version == SCHEMA_VERSION
+    project.add_wldset('wldset', wldset)
+    project.add_wxdset('wxdset', wxdset)
+
+    assert project.db['wldsets/wldset/Time'].dtype == np.int64
+    assert project.db['wxdsets/wxdset/Time'].dtype == np.int64
+    for variable in METEO_VARIABLES:
+        assert (project.db['wxdsets/wxdset/Missing {}'.format(variable)]
+                .dtype == np.int64)
+
+    wldset_hdf5 = project.get_wldset('wldset')
+    assert np.array_equal(wldset_hdf5.dates, wldset.dates)
+    assert wldset_hdf5['Time'] == wldset['Time']
+    assert np.array_equal(wldset_hdf5['WL'], wldset['WL'], equal_nan=True)
+
+    wxdset_hdf5 = project.get_wxdset('wxdset')
+    assert wxdset_hdf5.data.index.equals(wxdset.data.index)
+    for variable in METEO_VARIABLES:
+        assert wxdset_hdf5.missing_value_indexes[variable].equals(
+            wxdset.missing_value_indexes[variable])
+
+
+def test_migrate_times_saved_as_strings(projectpath, wldset, wxdset):
+    """
+    Test that the time axes of datasets saved as ISO date strings in
+    projects with an older schema are migrated to int64 epoch times when
+    the project is loaded.
+    """
+    project = ProjetReader(projectpath)
+    project.add_wldset('wldset', wldset)
+    project.add_wxdset('wxdset', wxdset)
+    project.close()
+
+    # Save the time axes as ISO date strings as it was done in version 1
+    # of the schema.
+    with h5py.File(projectpath, mode='a') as h5file:
+        del h5file.attrs['schema_version']
+        keys = (['wldsets/wldset/Time', 'wxdsets/wxdset/Time'] +
+                ['wxdsets/wxdset/Missing {}'.format(variable) for
+                 variable in METEO_VARIABLES])
+        for key in keys:
+            datetimes = h5file[key][...].view('datetime64[ns]')
+            del h5file[key]
+            h5file.create_dataset(
+                key, data=np.array(
+                    datetime64_to_isostrings(datetimes).tolist(),
+                    dtype=h5py.special_dtype(vlen=str)))
+
+    project = ProjetReader(projectpath)
+    assert project.schema_version == SCHEMA_VERSION
+    for key in keys:
+        assert project.db[key].dtype == np.int64
+
+    wldset_hdf5 = project.get_wldset('wldset')
+    assert np.array_equal(wldset_hdf5.dates, wldset.dates)
+
+    wxdset_hdf5 = project.get_wxdset('wxdset')
+    assert wxdset_hdf5.data.index.equals(wxdset.data.index)
+    for variable in METEO_VARIABLES:
+        assert wxdset_hdf5.missing_value_indexes[variable].equals(
+            wxdset.missing_value_indexes[variable])
+    project.close()
+
+
+def test_migrate_project(projectpath, wldset, wxdset, mocker):
+    """
+    Test that all the datasets of a project saved with an older version of
+    the schema are migrated in a single pass when the project is loaded, and
+    that projects that are up-to-date are not migrated again.
+    """
+    project = ProjetReader(projectpath)
+    project.add_wldset('wldset', wldset)
+    # The BRF results were saved with these column names in older versions.
+    project.get_wldset('wldset').save_brf(
+        pd.DataFrame({'Lag': [0, 1], 'A': [0.1, 0.2], 'err': [0.01, 0.02]}),
+        datetime(2013, 3, 1), datetime(2013, 3, 2))
+    project.add_wxdset('wxdset', wxdset)
+    project.close()
+
+    # Save the datasets as they were saved in older versions of GWHAT.
+    with h5py.File(projectpath, mode='a') as h5file:
+        del h5file.attrs['schema_version']
+        grp = h5file['wldsets/wldset']
+        del grp.attrs['Well ID']
+        del grp['glue']
+        del grp['mrc']
+        del grp['manual']
+        del grp['brf/1'].attrs['detrending']
+
+        grp = h5file['wxdsets/wxdset']
+        grp.attrs['Province'] = grp.attrs['Location']
+        del grp.attrs['Location']
+        grp.create_group('yearly')
+
+    migrate_project = mocker.spy(reader_projet, 'migrate_project')
+    project = ProjetReader(projectpath)
+    assert migrate_project.call_count == 1
+    assert project.schema_version == SCHEMA_VERSION
+
+    # A copy of the project was saved before it was migrated.
+    with h5py.File(projectpath + '.v1.bak', mode='r') as h5file:
+        assert 'schema_version' not in h5file.attrs
+        assert 'Well ID' not in h5file['wldsets/wldset'].attrs
+        assert 'yearly' in h5file['wxdsets/wxdset']
+
+    wldset_hdf5 = project.get_wldset('wldset')
+    assert wldset_hdf5['Well ID'] == ''
+    assert wldset_hdf5.glue_count() == 0
+    assert wldset_hdf5.mrc_exists() is False
+    brf = wldset_hdf5.get_brf(wldset_hdf5.get_brfname_at(0))
+    assert list(brf['SumA']) == [0.1, 0.2]
+    assert list(brf['sdA']) == [0.01, 0.02]
+    assert brf.detrending == ''
+    assert 'manual' in project.db['wldsets/wldset'].keys()
+    time, wl = wldset_hdf5.get_wlmeas()
+    assert len(time) == len(wl) == 0
+
+    wxdset_hdf5 = project.get_wxdset('wxdset')
+    assert wxdset_hdf5.metadata['Location'] == wxdset.metadata['Location']
+    assert 'yearly' not in project.db['wxdsets/wxdset'].keys()
+    project.close()
+
+    project = ProjetReader(projectpath)
+    assert migrate_project.call_count == 1
+    project.close()
+
+
+def test_readonly_missing_groups(projectpath, wldset):
+    """
+    Test that the manual measurements and the layout of a water level
+    dataset whose groups are missing are read as empty from a project
+    opened in read-only mode.
+    """
+    project = ProjetReader(projectpath)
+    project.add_wldset('wldset', wldset).save_layout(
+        {'TIMEmin': 41275, 'TIMEmax': 41640, 'colors': {'Rain': [0, 0, 255]}})
+    project.close()
+
+    with h5py.File(projectpath, mode='a') as h5file:
+        del h5file['wldsets/wldset/manual']
+        del h5file['wldsets/wldset/layout/colors']
+
+    project = ProjetReader(projectpath, readonly=True)
+    wldset_hdf5 = project.get_wldset('wldset')
+    time, wl = wldset_hdf5.get_wlmeas()
+    assert len(time) == len(wl) == 0
+    layout = wldset_hdf5.get_layout()
+    assert layout['TIMEmin'] == 41275
+    assert layout['colors'] == {}
+    project.close()
+
+    with h5py.File(projectpath, mode='a') as h5file:
+        del h5file['wldsets/wldset/layout']
+    project = ProjetReader(projectpath, readonly=True)
+    assert project.get_wldset('wldset').get_layout() is None
+    project.close()
+
+
+def test_storage_policy(projectpath, wldset, wxdset):
+    """
+    Test that the time series of the datasets are saved in the project with
+    the storage policy of the project reader.
+    """
+    project = ProjetReader(
+        projectpath, storage_policy=StoragePolicy(4, 'gzip', 6, True))
+    project.add_wldset('wldset', wldset)
+    project.add_wxdset('wxdset', wxdset)
+    for key in ['wldsets/wldset/Time', 'wldsets/wldset/WL',
+                'wxdsets/wxdset/Time', 'wxdsets/wxdset/Ptot']:
+        dset = project.db[key]
+        assert dset.chunks == (4,)
+        assert dset.compression == 'gzip'
+        assert dset.compression_opts == 6
+        assert dset.shuffle is True
+    assert np.array_equal(project.get_wldset('wldset')['WL'], wldset['WL'],
+                          equal_nan=True)
+    project.close()
+
+    project = ProjetReader(
+        projectpath, storage_policy=CONTIGUOUS_STORAGE_POLICY)
+    project.add_wldset('wldset2', wldset)
+    assert project.db['wldsets/wldset2/WL'].chunks is None
+    assert project.db['wldsets/wldset2/WL'].compression is None
+    project.close()
+
+
+def test_wldset_get_window(project, wldset):
+    """
+    Test that time windows of a water level dataset are read from the
+    project without reading the whole data of the dataset.
+    """
+    project.add_wldset('wldset', wldset)
+    wldset_hdf5 = project.get_wldset('wldset')
+    assert wldset_hdf5['Well'] == wldset['Well']
+    assert wldset_hdf5._dataf is None
+
+    start, end = wldset.dates[3], wldset.dates[8]
+    expected = wldset.data.loc[start:end]
+    for window in [wldset_hdf5.get_window(start, end),
+                   wldset_hdf5.get_window(
+                       start - np.timedelta64(1, 's'),
+                       end + np.timedelta64(1, 's'))]:
+        assert len(window) == 6
+        assert window.index.equals(expected.index)
+        assert np.array_equal(window['WL'].values, expected['WL'].values,
+                              equal_nan=True)
+    assert len(wldset_hdf5.get_window(end=start)) == 4
+    assert len(wldset_hdf5.get_window(start=end)) == len(wldset.dates) - 8
+    assert len(wldset_hdf5.get_window(end, start)) == 0
+    assert wldset_hdf5._dataf is None
+
+    # The whole data are read when they are needed and the windows are
+    # then taken from the data in memory, including uncommited changes.
+    assert np.array_equal(wldset_hdf5.xldates, wldset.xldates)
+    assert wldset_hdf5._dataf is not None
+    wldset_hdf5.delete_waterlevels_at([4])
+    window = wldset_hdf5.get_window(start, end)
+    assert window.index.equals(expected.index)
+    assert np.isnan(window['WL'].values[1])
+
+
+def test_datasets_cache(project, wldset, wxdset):
+    """
+    Test that the datasets loaded from the project are cached and that the
+    cache is invalidated when the datasets are deleted or added.
+    """
+    project.add_wldset('wldset', wldset)
+    project.add_wxdset('wxdset', wxdset)
+
+    wldset_hdf5 = project.get_wldset('wldset')
+    wxdset_hdf5 = project.get_wxdset('wxdset')
+    assert project.get_wldset('wldset') is wldset_hdf5
+    assert project.get_wxdset('wxdset') is wxdset_hdf5
+
+    project.del_wldset('wldset')
+    project.add_wldset('wldset', wldset)
+    assert project.get_wldset('wldset') is not wldset_hdf5
+
+    project.del_wxdset('wxdset')
+    assert project.get_wxdset('wxdset') is None
+    project.add_wxdset('wxdset', wxdset)
+    assert project.get_wxdset('wxdset') is not wxdset_hdf5
+
+    # The cache is cleared when the project is reloaded.
+    wldset_hdf5 = project.get_wldset('wldset')
+    project.load_projet(project.filename)
+    assert project.get_wldset('wldset') is not wldset_hdf5
+
+
+def test_datasets_cache_eviction(project, wldset, wxdset):
+    """
+    Test that the least recently used datasets are evicted from the cache
+    when the memory used by the cached datasets exceeds its budget.
+    """
+    for name in ['wldset1', 'wldset2']:
+        project.add_wldset(name, wldset)
+    project.add_wxdset('wxdset', wxdset)
+
+    wldset1 = project.get_wldset('wldset1')
+    wldset1.data
+    wxdset_hdf5 = project.get_wxdset('wxdset')
+    project.cache_size = (
+        wldset1.memory_usage() + wxdset_hdf5.memory_usage())
+
+    # The second water level dataset is not read yet and uses almost no
+    # memory, so that no dataset is evicted.
+    wldset2 = project.get_wldset('wldset2')
+    assert project.get_wldset('wldset1') is wldset1
+    assert project.get_wxdset('wxdset') is wxdset_hdf5
+
+    # Once its data are read, the least recently used dataset is evicted.
+    wldset2.data
+    assert project.get_wldset('wldset2') is wldset2
+    assert project.get_wldset('wldset1') is not wldset1
+    assert project.get_wxdset('wxdset') is wxdset_hdf5
+
+
+def test_datasets_cache_commit(project, wldset):
+    """
+    Test that a cached water level dataset is invalidated when changes are
+    commited to the project from another object of the same dataset.
+    """
+    project.add_wldset('wldset', wldset)
+    wldset1 = project.get_wldset('wldset')
+
+    # Changes commited from the cached dataset do not invalidate it.
+    wldset1.delete_waterlevels_at([1])
+    wldset1.commit()
+    assert project.get_wldset('wldset') is wldset1
+
+    # Evict the dataset from the cache, while it is still in use.
+    project._dataset_cache.clear()
+    wldset2 = project.get_wldset('wldset')
+    assert wldset2 is not wldset1
+    assert np.isnan(wldset2.waterlevels[1])
+
+    wldset1.delete_waterlevels_at([2])
+    wldset1.commit()
+    wldset3 = project.get_wldset('wldset')
+    assert wldset3 is not wldset2
+    assert np.isnan(wldset3.waterlevels[2])
+
+
+def test_datasets_cache_uncommited_changes(project, wldset):
+    """
+    Test that a cached water level dataset with changes that were not
+    commited is not returned, so that these changes are discarded as
+    when the dataset is not cached.
+    """
+    project.add_wldset('wldset', wldset)
+    wldset1 = project.get_wldset('wldset')
+    wldset1.delete_waterlevels_at([1])
+    assert wldset1.has_uncommited_changes
+
+    wldset2 = project.get_wldset('wldset')
+    assert wldset2 is not wldset1
+    assert not wldset2.has_uncommited_changes
+    assert not np.isnan(wldset2.waterlevels[1])
+    assert project.get_wldset('wldset') is wldset2
+
+    # The changes that were not commited are kept in the other object.
+    assert np.isnan(wldset1.waterlevels[1])
+    wldset1.commit()
+    wldset3 = project.get_wldset('wldset')
+    assert wldset3 is not wldset2
+    assert np.isnan(wldset3.waterlevels[1])
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
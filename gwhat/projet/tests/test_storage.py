@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+
+# ---- Standard Libraries Imports
+import json
+import os
+import os.path as osp
+
+# ---- Third Party Libraries Imports
+import numpy as np
+import pytest
+
+# ---- Local Libraries Imports
+from gwhat.meteo.weather_reader import WXDataFrame
+from gwhat.projet.reader_waterlvl import WLDataFrame
+from gwhat.projet.reader_projet import ProjetReader
+from gwhat.projet.lock import ProjectLock
+from gwhat.projet.storage import (
+    CONTIGUOUS_STORAGE_POLICY, StoragePolicy, main, repack_project)
+
+DATADIR = osp.join(osp.dirname(osp.realpath(__file__)), 'data')
+WXFILENAME = osp.join(DATADIR, 'sample_weather_datafile.csv')
+WLFILENAME = osp.join(DATADIR, 'sample_water_level_datafile.csv')
+
+
+# ---- Pytest Fixtures
+@pytest.fixture
+def projectpath(tmpdir):
+    """
+    A path to a project with a water level and a weather dataset saved
+    without chunking and compression.
+    """
+    projectpath = osp.join(str(tmpdir), "storage_test.gwt")
+    project = ProjetReader(
+        projectpath, storage_policy=CONTIGUOUS_STORAGE_POLICY)
+    project.name = 'storage_test'
+    wldset = project.add_wldset('wldset', WLDataFrame(WLFILENAME))
+    wldset.save_brfperiod([41241.0, 41584.0])
+    project.add_wxdset('wxdset', WXDataFrame(WXFILENAME))
+    project.close()
+    return projectpath
+
+
+# ---- Tests
+def test_repack_project(projectpath):
+    """
+    Test that the time series of a project are repacked with the
+    specified storage policy and that the content of the project is
+    preserved.
+    """
+    project = ProjetReader(projectpath)
+    expected_wl = project.get_wldset('wldset')['WL']
+    expected_wx = project.get_wxdset('wxdset').data
+    project.close()
+
+    repack_project(projectpath, StoragePolicy(4, 'lzf', None, True))
+
+    project = ProjetReader(projectpath)
+    assert project.name == 'storage_test'
+    for key in ['wldsets/wldset/Time', 'wldsets/wldset/WL',
+                'wxdsets/wxdset/Time', 'wxdsets/wxdset/Ptot']:
+        assert project.db[key].chunks == (4,)
+        assert project.db[key].compression == 'lzf'
+        assert project.db[key].shuffle is True
+    # Datasets that are not time series are copied as is.
+    assert project.db['wldsets/wldset/manual/WL'].maxshape == (None,)
+
+    wldset = project.get_wldset('wldset')
+    assert np.array_equal(wldset['WL'], expected_wl, equal_nan=True)
+    assert wldset.get_brfperiod() == [41241.0, 41584.0]
+    assert project.get_wxdset('wxdset').data.equals(expected_wx)
+    project.close()
+
+
+@pytest.mark.skipif(os.name == 'nt', reason="Unix permissions only.")
+def test_repack_project_permissions(projectpath):
+    """
+    Test that the permissions of the project file are preserved when it
+    is repacked.
+    """
+    os.chmod(projectpath, 0o664)
+    repack_project(projectpath)
+    assert os.stat(projectpath).st_mode & 0o777 == 0o664
+
+
+def test_repack_project_cli(projectpath, tmpdir, capsys):
+    """Test that a project is repacked in another file from the CLI."""
+    output = osp.join(str(tmpdir), 'repacked.gwt')
+    assert main([projectpath, '-o', output, '--compression', 'gzip',
+                 '--level', '9', '--chunk-size', '8']) == 0
+    assert 'Project size' in capsys.readouterr().out
+
+    project = ProjetReader(output)
+    assert project.db['wldsets/wldset/WL'].chunks == (8,)
+    assert project.db['wldsets/wldset/WL'].compression_opts == 9
+    project.close()
+
+    # The original project is not changed.
+    project = ProjetReader(projectpath)
+    assert project.db['wldsets/wldset/WL'].chunks is None
+    project.close()
+
+
+def test_repack_project_cli_locked(projectpath, capsys, mocker):
+    """
+    Test that a project can't be repacked from the CLI while it is opened
+    with write access by another process.
+    """
+    lock = ProjectLock(projectpath)
+    with open(lock.filename, 'w') as f:
+        json.dump({'pid': 1, 'hostname': 'otherhost'}, f)
+    mocked_repack = mocker.patch('gwhat.projet.storage.repack_project')
+    assert main([projectpath]) == 1
+    assert 'already opened with write access' in capsys.readouterr().out
+    assert mocked_repack.call_count == 0
+    # The lock file of the other process is not removed.
+    assert osp.exists(lock.filename)
+
+
+def test_compact_project(projectpath, capsys):
+    """
+    Test that the space left unused by the datasets that were deleted is
+    reported and reclaimed when the project is compacted.
+    """
+    project = ProjetReader(projectpath)
+    report = project.get_space_report()
+    assert report.file_size == osp.getsize(projectpath)
+    assert 0 < report.data_size < report.file_size
+    project.close()
+
+    # Hdf5 files do not reclaim the space of the objects that are deleted
+    # in a session once the file is closed.
+    for i in range(3):
+        project = ProjetReader(projectpath)
+        project.add_wxdset('temp', WXDataFrame(WXFILENAME))
+        project.add_wldset('wldset2', WLDataFrame(WLFILENAME))
+        project.close()
+        project = ProjetReader(projectpath)
+        project.del_wxdset('temp')
+        project.del_wldset('wldset2')
+        project.close()
+
+    project = ProjetReader(projectpath)
+    fragmented_report = project.get_space_report()
+    assert fragmented_report.file_size > report.file_size
+    assert fragmented_report.ndatasets == report.ndatasets
+    assert fragmented_report.free_size > report.free_size
+
+    expected_wl = project.get_wldset('wldset')['WL']
+    old_size, new_size = project.compact(CONTIGUOUS_STORAGE_POLICY)
+    assert old_size >= fragmented_report.file_size
+    assert new_size < report.file_size
+
+    # The project is reopened once it is compacted.
+    assert project.name == 'storage_test'
+    assert project.db['wldsets/wldset/WL'].chunks is None
+    assert project.get_space_report().free_size < report.free_size
+    assert np.array_equal(
+        project.get_wldset('wldset')['WL'], expected_wl, equal_nan=True)
+    project.close()
+
+    capsys.readouterr()
+    assert main([projectpath, '--report']) == 0
+    assert 'Project size' in capsys.readouterr().out
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
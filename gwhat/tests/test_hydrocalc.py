@@ -11,13 +11,14 @@ import os
 import os.path as osp
 
 # ---- Third Party Libraries Imports
+import numpy as np
 import pytest
 from PyQt5.QtCore import Qt
 
 # ---- Local Libraries Imports
 from gwhat.meteo.weather_reader import WXDataFrame
 from gwhat.projet.reader_waterlvl import WLDataFrame
-from gwhat.HydroCalc2 import WLCalc
+from gwhat.HydroCalc2 import WLCalc, DisplayPointsIndex
 from gwhat.projet.manager_data import DataManager
 from gwhat.projet.reader_projet import ProjetReader
 
@@ -70,6 +71,47 @@ def test_hydrocalc_init(hydrocalc, mocker):
     assert hydrocalc
 
 
+def test_draw_overlays(hydrocalc, mocker):
+    """
+    Test that the dynamic layers of the graph are composited over the
+    cached bitmap of the static layers without a full draw of the canvas,
+    unless the view has changed.
+    """
+    hydrocalc.draw()
+    mocked_draw = mocker.patch.object(hydrocalc.canvas, 'draw')
+
+    # Add peaks and draw them on the graph.
+    hydrocalc.peak_indx = np.array([10, 100])
+    hydrocalc.peak_memory.append(hydrocalc.peak_indx)
+    hydrocalc.draw_mrc()
+    assert mocked_draw.call_count == 0
+
+    # Change the view of the graph.
+    xmin, xmax = hydrocalc.fig.axes[0].get_xlim()
+    hydrocalc.fig.axes[0].set_xlim(xmin, (xmin + xmax) / 2)
+    hydrocalc.draw_mrc()
+    assert mocked_draw.call_count == 1
+
+
+def test_display_points_index():
+    """
+    Test that the index used to hit-test the peaks returns the nearest
+    point within the tolerance, in the original order of the points.
+    """
+    xdisplay = np.array([300, 10, 100, 105, 200], dtype=float)
+    ydisplay = np.array([50, 50, 50, 60, np.nan], dtype=float)
+    index = DisplayPointsIndex(xdisplay, ydisplay)
+
+    assert len(index) == 4
+    assert index.nearest(12, 52, 15) == 1
+    assert index.nearest(104, 58, 15) == 3
+    assert index.nearest(300, 64, 15) == 0
+    assert index.nearest(300, 65, 15) is None
+
+    # Points with non finite coordinates must be ignored.
+    assert index.nearest(200, 50, 15) is None
+
+
 if __name__ == "__main__":
     pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
     # pytest.main()
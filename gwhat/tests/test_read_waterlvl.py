@@ -15,6 +15,7 @@ import csv
 # ---- Third party imports
 import pytest
 import numpy as np
+import pandas as pd
 import xlsxwriter
 
 # ---- Local library imports
@@ -22,6 +23,7 @@ from gwhat.common.utils import (save_content_to_excel, save_content_to_csv,
                                 delete_file)
 from gwhat.projet.reader_waterlvl import (
         load_waterlvl_measures, init_waterlvl_measures, WLDataFrame)
+from gwhat.utils.filecache import ParsedFileCache
 
 DATA = [['Well name = ', "êi!@':i*"],
         ['well id : ', '1234ABC'],
@@ -81,6 +83,78 @@ def test_reading_waterlvl(datatmpdir, ext):
     assert np.abs(np.min(df.xldates - expected_results['Time'])) < 10e-6
 
 
+def test_reading_waterlvl_csv_with_strings(tmpdir):
+    """
+    Test that water level data saved in a csv file with dates saved as
+    strings, values that are not numerical and columns that are not needed
+    are read correctly.
+    """
+    filename = osp.join(str(tmpdir), FILENAME + '.csv')
+    save_content_to_csv(filename, DATA[:8] + [
+        ['Date', 'Notes', 'WL(mbgs)', 'BP(m)'],
+        ['2012-11-28 16:45:00', 'note 1', 3.667377006, 10.33327435],
+        ['2012-11-28 17:00:00', 'note 2', 'error', 10.33127437],
+        ['2012-11-28 17:15:00', 'note 3', 3.665277031, '']])
+    df = WLDataFrame(filename)
+
+    assert df['Well'] == "êi!@':i*"
+    assert df['Latitude'] == 45.36
+    assert df.data.index.strftime('%Y-%m-%d %H:%M').tolist() == [
+        '2012-11-28 16:45', '2012-11-28 17:00', '2012-11-28 17:15']
+    assert df.data['WL'].dtype == 'float64'
+    assert np.allclose(df['WL'], [3.667377006, np.nan, 3.665277031],
+                       equal_nan=True)
+    assert np.allclose(df['BP'], [10.33327435, 10.33127437, np.nan],
+                       equal_nan=True)
+    assert np.all(np.isnan(df['ET']))
+
+
+def test_reading_waterlvl_with_cache(datatmpdir, mocker):
+    """
+    Test that water level datasets are loaded from a ParsedFileCache
+    without parsing the datafile again when it did not change.
+    """
+    cache = ParsedFileCache(osp.join(datatmpdir, 'cache'))
+    filename = osp.join(datatmpdir, FILENAME + '.xlsx')
+    df = WLDataFrame(filename, cache=cache)
+    assert len(cache) == 1
+
+    mocked_read = mocker.patch(
+        'gwhat.projet.reader_waterlvl.read_water_level_datafile')
+    cached_df = WLDataFrame(filename, cache=cache)
+    assert mocked_read.call_count == 0
+    assert pd.DataFrame(cached_df.data).equals(pd.DataFrame(df.data))
+    for key in ['Well', 'Well ID', 'Province', 'Latitude', 'Longitude',
+                'Elevation', 'Municipality', 'filename']:
+        assert cached_df[key] == df[key]
+
+
+def test_delete_and_undo_waterlvl(datatmpdir):
+    """
+    Test that deleting water level data stores the changes as index ranges
+    that can be undone.
+    """
+    df = WLDataFrame(osp.join(datatmpdir, FILENAME + '.csv'))
+    expected_wl = np.array([3.667377006, 3.665777025, 3.665277031])
+    assert not df.has_uncommited_changes
+
+    df.delete_waterlevels_at([0, 2])
+    df.delete_waterlevels_in([[1, 2]])
+    assert df.has_uncommited_changes
+    assert np.all(np.isnan(df['WL']))
+    assert df.get_uncommited_ranges().tolist() == [[0, 3]]
+    assert df._undo_stack[0][0].tolist() == [[0, 1], [2, 3]]
+
+    df.undo()
+    assert np.isnan(df['WL'][0]) and np.isnan(df['WL'][2])
+    assert abs(df['WL'][1] - expected_wl[1]) < 10e-6
+    assert df.get_uncommited_ranges().tolist() == [[0, 1], [2, 3]]
+
+    df.clear_all_changes()
+    assert not df.has_uncommited_changes
+    assert np.max(np.abs(df['WL'] - expected_wl)) < 10e-6
+
+
 # Test water_level_measurements.
 # -------------------------------
 
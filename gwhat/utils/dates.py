@@ -12,48 +12,128 @@
 import h5py
 import numpy as np
 import pandas as pd
-import xlrd
 from xlrd import xldate_as_tuple
-from xlrd.xldate import xldate_as_datetime
 from PyQt5.QtCore import QDate, QDateTime
 
 
-def format_time_data(self, timedata):
+# The origins of the Excel numeric dates. For workbooks created in Windows
+# (datemode=0), serial dates are counted from 1899-12-31, but Excel wrongly
+# considers 1900 as a leap year, so that the origin is shifted back by one
+# day from serial 60 onward. The nonexistent 1900-02-29 (serial 60) is thus
+# read as 1900-02-28 and 1900-03-01 is serial 61. For workbooks created on
+# macOS (datemode=1), serial dates are counted from 1904-01-01.
+XLDATE_ORIGIN_1900 = np.datetime64('1899-12-31', 'ms')
+XLDATE_ORIGIN_1900_MINUS_1 = np.datetime64('1899-12-30', 'ms')
+XLDATE_ORIGIN_1904 = np.datetime64('1904-01-01', 'ms')
+MS_PER_DAY = 86400000
+
+
+def format_time_data(timedata):
     """
-    Format a numpy array containing time data, either in a string or Excel
-    numeric format, and return a pandas datetime index.
+    Format a numpy array containing time data, either in a string, Excel
+    numeric or datetime64 format, and return a pandas datetime index.
     """
     datetimes = pd.DatetimeIndex([])
+    if np.asarray(timedata).dtype.kind == 'M':
+        return pd.DatetimeIndex(timedata)
     try:
         # We first assume that the dates are stored in the
         # Excel numeric format.
-        timedata = timedata.astype('float64', errors='raise')
+        timedata = np.asarray(timedata).astype('float64')
     except ValueError:
         try:
             # Try converting the strings to datetime objects.
             # The format of the datetime strings must be
             # "%Y-%m-%d %H:%M:%S"
-            datetimes = pd.to_datetime(timedata, infer_datetime_format=True)
+            datetimes = pd.DatetimeIndex(isostrings_to_datetime64(timedata))
         except ValueError:
             print('WARNING: the dates are not formatted correctly.')
     else:
-        try:
-            # Try converting the Excel numeric dates to pandas
-            # datetime objects.
-            datetimes = pd.to_datetime(datetimes.apply(
-                lambda date: xlrd.xldate.xldate_as_datetime(date, 0)))
-        except Exception:
-            print('Warning: the dates are not formatted correctly.')
+        datetimes = xldates_to_datetimeindex(timedata)
+    return datetimes
+
+
+def xldates_to_datetime64(xldates, datemode=0):
+    """
+    Convert a list or numpy array of Excel numeric dates to a numpy array
+    of datetime64[ns], rounded to the nearest millisecond as done in xlrd.
+
+    A value of 0 is used of the workbook was created in Windows (1900-based),
+    while a value of 1 is used if it was created on macOS (1904-based).
+    Non-finite values are converted to NaT.
+    """
+    xldates = np.asarray(xldates, dtype='float64')
+    isfinite = np.isfinite(xldates)
+    xldates = np.where(isfinite, xldates, 0)
+
+    days = np.trunc(xldates)
+    msecs = np.round((xldates - days) * MS_PER_DAY).astype('int64')
+    if datemode:
+        origin = XLDATE_ORIGIN_1904
+    else:
+        origin = np.where(
+            xldates < 60, XLDATE_ORIGIN_1900, XLDATE_ORIGIN_1900_MINUS_1)
+
+    datetimes = (origin +
+                 days.astype('int64').astype('timedelta64[D]') +
+                 msecs.astype('timedelta64[ms]'))
+    datetimes = datetimes.astype('datetime64[ns]')
+    datetimes[~isfinite] = np.datetime64('NaT')
     return datetimes
 
 
+def datetime64_to_xldates(datetimes, datemode=0):
+    """
+    Convert a list or numpy array of datetime64 to a numpy array of Excel
+    numeric dates. NaT values are converted to nan.
+
+    A value of 0 is used of the workbook was created in Windows (1900-based),
+    while a value of 1 is used if it was created on macOS (1904-based).
+    """
+    datetimes = np.asarray(datetimes, dtype='datetime64[ns]')
+    if datemode:
+        origin = XLDATE_ORIGIN_1904
+    else:
+        origin = np.where(
+            datetimes < np.datetime64('1900-03-01'),
+            XLDATE_ORIGIN_1900, XLDATE_ORIGIN_1900_MINUS_1)
+    xldates = (datetimes - origin) / np.timedelta64(1, 'D')
+    return xldates.astype('float64')
+
+
+def datetime64_to_isostrings(datetimes):
+    """
+    Convert a list or numpy array of datetime64 to a numpy array of
+    ISO date strings formatted as "%Y-%m-%dT%H:%M:%S".
+    """
+    datetimes = np.asarray(datetimes, dtype='datetime64[ns]')
+    return np.datetime_as_string(datetimes.astype('datetime64[s]'), unit='s')
+
+
+def isostrings_to_datetime64(isostrings):
+    """
+    Convert a list or numpy array of ISO date strings to a numpy array
+    of datetime64[ns].
+
+    The strings are parsed with numpy when they are strictly formatted
+    as "%Y-%m-%dT%H:%M:%S" or "%Y-%m-%d %H:%M:%S", and with pandas
+    otherwise.
+    """
+    isostrings = np.asarray(isostrings)
+    if isostrings.dtype.kind in ('O', 'S'):
+        isostrings = isostrings.astype(str)
+    try:
+        return isostrings.astype('datetime64[ns]')
+    except ValueError:
+        return pd.to_datetime(
+            isostrings, infer_datetime_format=True).values
+
+
 def datetimeindex_to_xldates(datetimeindex):
     """
     Convert a datetime index to a numpy array of Excel numerical date format.
     """
-    timedeltas = datetimeindex - xldate_as_datetime(4000, 0)
-    xldates = timedeltas.total_seconds() / (3600 * 24) + 4000
-    return xldates.values
+    return datetime64_to_xldates(np.asarray(datetimeindex))
 
 
 def xldates_to_datetimeindex(xldates):
@@ -61,8 +141,7 @@ def xldates_to_datetimeindex(xldates):
     Format a list or numpy array of Excel numeric dates into a
     pandas datetime index.
     """
-    return pd.to_datetime(
-        [xlrd.xldate.xldate_as_datetime(xldate, 0) for xldate in xldates])
+    return pd.DatetimeIndex(xldates_to_datetime64(xldates))
 
 
 def xldates_to_strftimes(xldates):
@@ -70,9 +149,8 @@ def xldates_to_strftimes(xldates):
     Format a a list or numpy array of Excel numeric dates into a numpy array
     of ISO date strings that can be saved in a hdf5 file.
     """
-    dtimeindex = xldates_to_datetimeindex(xldates)
     return np.array(
-        dtimeindex.strftime("%Y-%m-%dT%H:%M:%S").values.tolist(),
+        datetime64_to_isostrings(xldates_to_datetime64(xldates)).tolist(),
         dtype=h5py.special_dtype(vlen=str)
         )
 
@@ -0,0 +1,490 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""
+Utilities to read the data of Excel files by columns instead of by rows.
+"""
+
+# ---- Standard library imports
+import os.path as osp
+import posixpath
+import re
+from xml.etree.ElementTree import fromstring
+import zipfile
+
+# ---- Third party imports
+import numpy as np
+import xlrd
+from xlrd import (XL_CELL_NUMBER, XL_CELL_DATE, XL_CELL_BOOLEAN,
+                  XL_CELL_EMPTY, XL_CELL_BLANK)
+
+
+NUMERIC_CELL_TYPES = [XL_CELL_NUMBER, XL_CELL_DATE, XL_CELL_BOOLEAN]
+EMPTY_CELL_TYPES = [XL_CELL_EMPTY, XL_CELL_BLANK]
+
+XLSX_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+XLSX_RELS_NS = (
+    '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}')
+XLSX_CELL_REGEX = re.compile(
+    br'<c r="([A-Z]+)([0-9]+)"([^>]*?)(?:/>|>(?:<v>([^<]*)</v>)?(.*?)</c>)',
+    re.DOTALL)
+
+
+def open_excel_sheet(filename, sheetx=0):
+    """
+    Open the Excel workbook on demand, so that only the sheet at the
+    specified index is loaded, and return the workbook and the sheet.
+
+    The workbook should be released with its release_resources method
+    when the sheet is not needed anymore.
+    """
+    book = xlrd.open_workbook(filename, on_demand=True)
+    return book, book.sheet_by_index(sheetx)
+
+
+def iter_excel_rows(sheet, start_rowx=0):
+    """
+    Return an iterator over the values of the rows of the sheet, starting
+    at the specified row index, so that the rows of a header can be read
+    until the row where the data begin is found.
+    """
+    return (sheet.row_values(rowx) for rowx in range(start_rowx, sheet.nrows))
+
+
+def read_excel_column(sheet, colx, start_rowx=0):
+    """
+    Read the values of the column of the sheet at the specified index,
+    starting at the specified row index.
+
+    A float64 numpy array is returned if the column contains only numerical
+    or empty cells, with the empty cells set to nan. Otherwise, an object
+    numpy array containing the values of the cells is returned, with the
+    empty cells also set to nan.
+    """
+    types = np.array(sheet.col_types(colx, start_rowx), dtype=int)
+    values = sheet.col_values(colx, start_rowx)
+    isempty = np.isin(types, EMPTY_CELL_TYPES)
+    if not np.all(np.isin(types, NUMERIC_CELL_TYPES) | isempty):
+        column = np.array(values, dtype=object)
+        column[isempty] = np.nan
+    elif not np.any(isempty):
+        column = np.array(values, dtype='float64')
+    else:
+        column = np.full(len(values), np.nan, dtype='float64')
+        column[~isempty] = np.array(values, dtype=object)[~isempty]
+    return column
+
+
+class ExcelDataReader(object):
+    """
+    A reader to read the rows of the header of the first sheet of an
+    Excel file one by one, and then the data below by columns, only for
+    the columns that are needed.
+
+    The sheets of xlsx files are streamed directly from the file, so that
+    the cells of the columns that are not needed are never converted to
+    Python objects. The sheets of xls files are read with xlrd.
+
+    Usage:
+        with ExcelDataReader(filename) as reader:
+            for row in reader:
+                if is_header(row):
+                    break
+            columns = reader.read_columns(colxs)
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._rowx = -1
+        if osp.splitext(filename)[1] == '.xlsx':
+            self._book = None
+            self._sheet = _XlsxSheetStream(filename)
+            self._rows = self._sheet.iter_rows()
+        else:
+            self._book, self._sheet = open_excel_sheet(filename)
+            self._rows = iter_excel_rows(self._sheet)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __iter__(self):
+        for row in self._rows:
+            self._rowx += 1
+            yield row
+
+    def close(self):
+        """Release the resources used to read the Excel file."""
+        if self._book is not None:
+            self._book.release_resources()
+        else:
+            self._sheet.close()
+
+    def read_columns(self, colxs):
+        """
+        Read the data below the last row that was read for the columns at
+        the specified indexes and return a list of numpy arrays.
+
+        See read_excel_column for the type of the arrays that are returned.
+        """
+        if self._book is not None:
+            return [read_excel_column(self._sheet, colx, self._rowx + 1)
+                    for colx in colxs]
+        else:
+            return self._sheet.read_columns(colxs)
+
+
+class _XlsxSheetStream(object):
+    """
+    A stream over the rows of the first sheet of a xlsx file.
+
+    The XML of the sheet is decompressed and parsed by blocks of complete
+    rows, so that the memory needed to read a sheet is bounded.
+    """
+    BLOCKSIZE = 2 ** 16
+
+    def __init__(self, filename):
+        self._zipfile = zipfile.ZipFile(filename)
+        self._shared_strings = self._read_shared_strings()
+        self._file = self._zipfile.open(self._get_first_sheet_path())
+        self._buffer = b''
+        self._eof = False
+        self._rows = []
+        self._rowpos = 0
+        self._next_rowx = 0
+        self._colx_cache = {}
+        self._init_stream()
+
+    def close(self):
+        """Close the xlsx file."""
+        self._file.close()
+        self._zipfile.close()
+
+    def _get_first_sheet_path(self):
+        """Return the path of the first sheet in the xlsx archive."""
+        workbook = fromstring(self._zipfile.read('xl/workbook.xml'))
+        rid = workbook.find(XLSX_NS + 'sheets')[0].get(XLSX_RELS_NS + 'id')
+        rels = fromstring(self._zipfile.read('xl/_rels/workbook.xml.rels'))
+        for rel in rels:
+            if rel.get('Id') == rid:
+                target = rel.get('Target')
+                if target.startswith('/'):
+                    return target[1:]
+                return posixpath.normpath(posixpath.join('xl', target))
+        raise ValueError("Cannot find the first sheet of the workbook.")
+
+    def _read_shared_strings(self):
+        """Read the table of the strings shared by the cells."""
+        try:
+            root = fromstring(self._zipfile.read('xl/sharedStrings.xml'))
+        except KeyError:
+            return []
+        return [''.join(t.text or '' for t in si.iter(XLSX_NS + 't'))
+                for si in root.iter(XLSX_NS + 'si')]
+
+    # ---- Blocks of rows
+    def _init_stream(self):
+        """
+        Read the stream up to the beginning of the sheet data and
+        determine how to wrap the blocks of rows so that they can be
+        parsed as valid XML documents.
+        """
+        while True:
+            match = re.search(
+                br'<(\w+:)?sheetData(\s[^>]*)?(/?)>', self._buffer)
+            if match is not None or self._eof:
+                break
+            self._fill_buffer()
+        if match is None:
+            raise ValueError("Cannot find the data of the sheet.")
+        worksheet = re.search(
+            br'<((?:\w+:)?worksheet)(\s[^>]*)?>', self._buffer[:match.start()])
+        prefix = match.group(1) or b''
+        self._wrap_start = worksheet.group(0)
+        self._wrap_end = b'</' + worksheet.group(1) + b'>'
+        self._row_end = b'</' + prefix + b'row>'
+        self._data_end = b'</' + prefix + b'sheetData>'
+        if match.group(3):
+            # The sheet is empty.
+            self._buffer = b''
+            self._eof = True
+        else:
+            self._buffer = self._buffer[match.end():]
+
+    def _fill_buffer(self):
+        """Read the next chunk of the XML of the sheet in the buffer."""
+        chunk = self._file.read(self.BLOCKSIZE)
+        if chunk:
+            self._buffer += chunk
+        else:
+            self._eof = True
+
+    def _read_next_block_data(self):
+        """
+        Return the XML of the next block of complete rows of the sheet or
+        None if there is no more rows.
+        """
+        while True:
+            data_end = self._buffer.find(self._data_end)
+            if data_end != -1:
+                block = self._buffer[:data_end]
+                self._buffer = b''
+                self._eof = True
+                break
+            row_end = self._buffer.rfind(self._row_end)
+            if row_end != -1 and (
+                    self._eof or len(self._buffer) >= self.BLOCKSIZE):
+                row_end += len(self._row_end)
+                block = self._buffer[:row_end]
+                self._buffer = self._buffer[row_end:]
+                break
+            if self._eof:
+                block = self._buffer
+                self._buffer = b''
+                break
+            self._fill_buffer()
+        return block if block.strip() else None
+
+    def _parse_block_data(self, block):
+        """Parse the XML of a block of rows and return the row elements."""
+        return list(fromstring(self._wrap_start + block + self._wrap_end))
+
+    def _read_next_block(self):
+        """
+        Parse the next block of complete rows of the sheet and return
+        the list of the row elements or None if there is no more rows.
+        """
+        block = self._read_next_block_data()
+        return None if block is None else self._parse_block_data(block)
+
+    def _iter_row_elements(self):
+        """
+        Return an iterator over the row elements of the sheet, with empty
+        rows yielded as None.
+        """
+        while True:
+            if self._rowpos >= len(self._rows):
+                self._rows = self._read_next_block()
+                self._rowpos = 0
+                if self._rows is None:
+                    self._rows = []
+                    return
+            elem = self._rows[self._rowpos]
+            rowx = int(elem.get('r', self._next_rowx + 1)) - 1
+            if rowx > self._next_rowx:
+                self._next_rowx += 1
+                yield None
+                continue
+            self._rowpos += 1
+            self._next_rowx = rowx + 1
+            yield elem
+
+    # ---- Cells
+    def _get_colx(self, ref, last_colx):
+        """Return the column index corresponding to a cell reference."""
+        if ref is None:
+            return last_colx + 1
+        letters = ref.rstrip('0123456789')
+        try:
+            return self._colx_cache[letters]
+        except KeyError:
+            colx = 0
+            for letter in letters:
+                colx = colx * 26 + ord(letter) - ord('A') + 1
+            self._colx_cache[letters] = colx - 1
+            return colx - 1
+
+    def _get_cell_value(self, cell):
+        """
+        Return the value of a cell, as a float if it is numerical, or
+        None if it is empty.
+
+        The value of formula cells that were saved without a cached value
+        is empty, as it is for the cells written by openpyxl.
+        """
+        celltype = cell.get('t')
+        if celltype == 'inlineStr':
+            return ''.join(t.text or '' for t in cell.iter(XLSX_NS + 't'))
+        value = cell.findtext(XLSX_NS + 'v')
+        if value is None or not value.strip():
+            return None
+        elif celltype in (None, 'n', 'b'):
+            return float(value)
+        elif celltype == 's':
+            return self._shared_strings[int(value)]
+        else:
+            return value
+
+    def _get_row_values(self, elem):
+        """Return the values of the cells of a row element."""
+        row = []
+        colx = -1
+        for cell in elem:
+            colx = self._get_colx(cell.get('r'), colx)
+            row.extend([''] * (colx - len(row)))
+            value = self._get_cell_value(cell)
+            row.append('' if value is None else value)
+        return row
+
+    def iter_rows(self):
+        """Return an iterator over the values of the rows of the sheet."""
+        for elem in self._iter_row_elements():
+            yield [] if elem is None else self._get_row_values(elem)
+
+    def read_columns(self, colxs):
+        """
+        Read the remaining rows of the sheet for the columns at the
+        specified indexes and return a list of numpy arrays.
+        """
+        start_rowx = self._next_rowx
+        chunks = [[] for colx in colxs]
+        last_rowx = start_rowx - 1
+
+        # The rows of the block that were already parsed when reading the
+        # header are read first, followed by the remaining blocks.
+        cells = self._read_row_elements(self._rows[self._rowpos:], last_rowx)
+        self._rows, self._rowpos = [], 0
+        while cells is not None:
+            rowxs, cellxs, read_cells = cells
+            if len(rowxs):
+                last_rowx = max(last_rowx, int(np.max(rowxs)))
+                for i, colx in enumerate(colxs):
+                    indexes = np.flatnonzero(cellxs == colx)
+                    if len(indexes):
+                        chunks[i].append((rowxs[indexes] - start_rowx,
+                                          read_cells(indexes)))
+            block = self._read_next_block_data()
+            if block is None:
+                break
+            cells = self._read_block_data(block)
+            if cells is None:
+                cells = self._read_row_elements(
+                    self._parse_block_data(block), last_rowx)
+
+        arrays = []
+        nrows = last_rowx - start_rowx + 1
+        for chunk in chunks:
+            isnumeric = all(values.dtype.kind == 'f' for
+                            indexes, values in chunk)
+            column = np.full(nrows, np.nan, dtype='float64' if isnumeric
+                             else object)
+            for indexes, values in chunk:
+                column[indexes] = values
+            arrays.append(column)
+        return arrays
+
+    def _read_block_data(self, block):
+        """
+        Read the cells of a block of rows directly from its XML with a
+        regular expression, which is a lot faster than parsing the XML of
+        the block, for the cells of a sheet that is laid out as written
+        by Excel.
+
+        Return the row and column indexes of the cells and a function
+        that returns the values of the cells at given indexes, or None if
+        the cells of the block are not all laid out as expected.
+        """
+        matches = XLSX_CELL_REGEX.findall(block)
+        if len(matches) != block.count(b'<c ') + block.count(b'<c>'):
+            return None
+        if not matches:
+            return np.array([], dtype=int), np.array([], dtype=int), None
+
+        letters, rownums, attrs, values, contents = np.array(matches).T
+        rowxs = rownums.astype(int) - 1
+        letters, inverse = np.unique(letters, return_inverse=True)
+        cellxs = np.array(
+            [self._get_colx(letter.decode('ascii'), None) for
+             letter in letters]
+        )[inverse]
+
+        # Cells without a type and with no other content than a value are
+        # numerical, or empty if the value is also missing.
+        isnumeric = (np.char.find(attrs, b't=') == -1) & (contents == b'')
+
+        def read_cells(indexes):
+            isnumeric_ = isnumeric[indexes]
+            values_ = values[indexes]
+            values_[np.char.strip(values_) == b''] = b'nan'
+            if np.all(isnumeric_):
+                return values_.astype('float64')
+            cells = np.empty(len(indexes), dtype=object)
+            cells[isnumeric_] = values_[isnumeric_].astype('float64')
+            cells[~isnumeric_] = [
+                self._get_cell_value(self._parse_cell_data(
+                    letters[inverse[j]], rownums[j], attrs[j], values[j],
+                    contents[j])) for j in indexes[~isnumeric_]]
+            return self._format_cell_values(cells, isnumeric_)
+        return rowxs, cellxs, read_cells
+
+    def _parse_cell_data(self, letters, rownum, attrs, value, content):
+        """Parse the XML of a cell matched with XLSX_CELL_REGEX."""
+        if value:
+            content = b'<v>' + value + b'</v>' + content
+        cell = b'<c r="' + letters + rownum + b'"' + attrs + b'>'
+        return fromstring(self._wrap_start + cell + content + b'</c>' +
+                          self._wrap_end)[0]
+
+    def _read_row_elements(self, rows, last_rowx):
+        """
+        Return the row and column indexes of the cells of the row
+        elements and a function that returns the values of the cells at
+        given indexes.
+        """
+        cells = [cell for row in rows for cell in row]
+        refs = [cell.get('r') for cell in cells]
+        rowrefs = [row.get('r') for row in rows]
+        if None in refs or None in rowrefs:
+            # The references of the rows and cells are optional, in
+            # which case the position of the cells must be determined
+            # one cell at a time.
+            rowxs, cellxs = [], []
+            for row in rows:
+                last_rowx = int(row.get('r', last_rowx + 2)) - 1
+                colx = -1
+                for cell in row:
+                    colx = self._get_colx(cell.get('r'), colx)
+                    rowxs.append(last_rowx)
+                    cellxs.append(colx)
+            rowxs = np.array(rowxs, dtype=int)
+            cellxs = np.array(cellxs, dtype=int)
+        elif cells:
+            rowxs = np.repeat(np.array(rowrefs).astype(int) - 1,
+                              [len(row) for row in rows])
+            letters, inverse = np.unique(
+                np.char.rstrip(np.array(refs), '0123456789'),
+                return_inverse=True)
+            cellxs = np.array(
+                [self._get_colx(letter, None) for
+                 letter in letters])[inverse]
+        else:
+            rowxs = cellxs = np.array([], dtype=int)
+
+        def read_cells(indexes):
+            values = [self._get_cell_value(cells[j]) for j in indexes]
+            isnumeric = np.array([isinstance(value, float) for
+                                  value in values])
+            values = np.array(values + [None], dtype=object)[:-1]
+            return self._format_cell_values(values, isnumeric)
+        return rowxs, cellxs, read_cells
+
+    def _format_cell_values(self, values, isnumeric):
+        """
+        Return the values of cells in a float64 numpy array if all of them
+        are numerical or empty, or in an object numpy array otherwise.
+        """
+        if np.all(isnumeric):
+            return values.astype('float64')
+        isempty = np.equal(values, None)
+        values[isempty] = np.nan
+        if np.all(isempty | isnumeric):
+            return values.astype('float64')
+        return values
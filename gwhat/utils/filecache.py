@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""
+An on-disk cache for the data parsed from datafiles, so that the datafiles
+that did not change since they were last parsed do not need to be parsed
+again.
+"""
+
+# ---- Standard library imports
+import hashlib
+import json
+import os
+import os.path as osp
+import tempfile
+
+# ---- Third party imports
+import numpy as np
+
+
+# The default maximum size of the cache in bytes.
+DEFAULT_MAX_SIZE = 512 * 1024 ** 2
+
+# The name of the array in which the attributes of an entry are stored.
+ATTRS_KEY = '__attrs__'
+
+
+class ParsedFileCache(object):
+    """
+    An on-disk least recently used (LRU) cache for the data parsed from
+    datafiles.
+
+    The entries of the cache are keyed by the path, the size, the last
+    modification time and the hash of the content of the datafiles and of
+    the other files on which the parsed data depend, and by the version of
+    the parser that was used to parse them. Each entry is stored in an
+    uncompressed numpy npz file, in which each column of the parsed data is
+    saved in a separate binary array, so that entries can be loaded back
+    without any parsing.
+
+    The least recently used entries are evicted when the total size of the
+    cache exceeds max_size, in bytes.
+    """
+    EXT = '.npz'
+
+    def __init__(self, dirname, max_size=DEFAULT_MAX_SIZE):
+        self.dirname = dirname
+        self.max_size = max_size
+
+    def get_key(self, filename, version, depends=()):
+        """
+        Return the key of the cache entry corresponding to the specified
+        datafile, parser version and dependencies, or None if the datafile
+        cannot be read.
+
+        The key can be passed to get and put, so that the content of the
+        files is hashed only once when an entry is missing from the cache.
+        """
+        try:
+            return self._get_entry_path(filename, version, depends)
+        except OSError:
+            return None
+
+    def get(self, filename, version, depends=(), key=None):
+        """
+        Return a dictionary with the arrays and a dictionary with the
+        attributes stored in the cache for the specified datafile, parser
+        version and dependencies, or None if there is no valid entry in
+        the cache.
+        """
+        entry = (self.get_key(filename, version, depends) if key is None
+                 else key)
+        if entry is None or not osp.exists(entry):
+            return None
+        try:
+            with np.load(entry, allow_pickle=False) as npzfile:
+                arrays = {key: npzfile[key] for key in npzfile.files}
+            attrs = json.loads(str(arrays.pop(ATTRS_KEY)))
+        except Exception:
+            # The entry is corrupted, so we remove it from the cache.
+            self._remove(entry)
+            return None
+        # Mark the entry as the most recently used.
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return arrays, attrs
+
+    def put(self, filename, version, arrays, attrs, depends=(), key=None):
+        """
+        Store in the cache the arrays and the attributes parsed from the
+        specified datafile with the specified parser version.
+
+        The depends argument is a list of the paths of the other files,
+        existing or not, on which the parsed data depend.
+
+        The arrays must be numerical or datetime numpy arrays and the
+        attributes must be serializable to JSON. The key returned by
+        get_key for the datafile can be provided to avoid hashing the
+        files again.
+        """
+        try:
+            entry = (self._get_entry_path(filename, version, depends) if
+                     key is None else key)
+            os.makedirs(self.dirname, exist_ok=True)
+            arrays = dict(arrays)
+            arrays[ATTRS_KEY] = np.array(json.dumps(attrs))
+
+            # The entry is written to a temporary file first, so that a
+            # partially written entry is never read from the cache.
+            fd, tmpfilename = tempfile.mkstemp(
+                suffix=self.EXT, dir=self.dirname)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    np.savez(f, **arrays)
+                os.replace(tmpfilename, entry)
+            finally:
+                self._remove(tmpfilename)
+        except (OSError, TypeError, ValueError) as error:
+            print("Unable to cache the data of '{}': {}".format(
+                osp.basename(filename), error))
+            return
+        self.evict()
+
+    def evict(self):
+        """
+        Remove the least recently used entries of the cache until its total
+        size is below max_size.
+        """
+        entries = []
+        for entry in self._list_entries():
+            try:
+                stat = os.stat(entry)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+        entries.sort()
+        size = sum(entry[1] for entry in entries)
+        while entries and size > self.max_size:
+            mtime, entry_size, entry = entries.pop(0)
+            self._remove(entry)
+            size -= entry_size
+
+    def clear(self):
+        """Remove all the entries of the cache."""
+        for entry in self._list_entries():
+            self._remove(entry)
+
+    @property
+    def size(self):
+        """Return the total size of the entries of the cache in bytes."""
+        return sum(osp.getsize(entry) for entry in self._list_entries())
+
+    def __len__(self):
+        return len(self._list_entries())
+
+    # ---- Private API
+    def _list_entries(self):
+        """Return the paths of the files of the entries of the cache."""
+        if not osp.isdir(self.dirname):
+            return []
+        return [osp.join(self.dirname, name) for name in
+                os.listdir(self.dirname) if name.endswith(self.EXT) and
+                not name.startswith('tmp')]
+
+    def _get_entry_path(self, filename, version, depends=()):
+        """
+        Return the path of the file of the cache entry corresponding to the
+        specified datafile, parser version and dependencies.
+        """
+        key = [get_file_key(filename), version]
+        for dependency in depends:
+            key.append(get_file_key(dependency) if osp.exists(dependency)
+                       else [osp.abspath(dependency), None])
+        key = json.dumps(key)
+        return osp.join(
+            self.dirname, hashlib.sha1(key.encode('utf8')).hexdigest() +
+            self.EXT)
+
+    def _remove(self, entry):
+        """Remove the file of an entry of the cache."""
+        try:
+            os.remove(entry)
+        except OSError:
+            pass
+
+
+def get_file_key(filename):
+    """
+    Return a list with the absolute path, the size, the last modification
+    time and the hash of the content of a file.
+    """
+    filename = osp.abspath(filename)
+    stat = os.stat(filename)
+    return [filename, stat.st_size, stat.st_mtime_ns,
+            get_file_hash(filename)]
+
+
+def get_file_hash(filename, blocksize=2 ** 20):
+    """Return the hexadecimal blake2b hash of the content of a file."""
+    filehash = hashlib.blake2b()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(blocksize), b''):
+            filehash.update(block)
+    return filehash.hexdigest()
+
+
+def to_json_value(value):
+    """
+    Return the value as a native Python type that can be serialized to
+    JSON, so that numpy scalars can be stored in the attributes of an
+    entry of the cache.
+    """
+    return value.item() if isinstance(value, np.generic) else value
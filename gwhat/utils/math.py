@@ -53,11 +53,94 @@ def nan_as_text_tolist(arr):
     Convert the float nan are to text while converting a numpy 2d array to a
     list, so that it is possible to save to an Excel file.
     """
-    if np.isnan(arr).any():
-        m, n = np.shape(arr)
-        list_ = []
-        for i in range(m):
-            list_.append(['nan' if np.isnan(x) else x for x in arr[i, :]])
+    isnan = np.isnan(arr)
+    if isnan.any():
+        arr = np.asarray(arr).astype(object)
+        arr[isnan] = 'nan'
+    return arr.tolist()
+
+
+# ---- Index ranges
+def mask_to_ranges(mask, offset=0):
+    """
+    Convert a boolean mask to a 2D array of half-open [start, stop) index
+    ranges of contiguous True values, shifted by the specified offset.
+    """
+    mask = np.asarray(mask, dtype=bool)
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask, [0]))))
+    return np.column_stack((edges[0::2], edges[1::2])).astype(int) + offset
+
+
+def indexes_to_ranges(indexes):
+    """
+    Convert a sequence of indexes to a sorted 2D array of non-overlapping
+    half-open [start, stop) index ranges.
+    """
+    indexes = np.unique(np.asarray(indexes, dtype=int))
+    if len(indexes) == 0:
+        return np.empty((0, 2), dtype=int)
+    breaks = np.flatnonzero(np.diff(indexes) != 1) + 1
+    starts = indexes[np.concatenate(([0], breaks))]
+    stops = indexes[np.concatenate((breaks - 1, [-1]))] + 1
+    return np.column_stack((starts, stops))
+
+
+def merge_ranges(*ranges, gap=0):
+    """
+    Merge one or more 2D arrays of half-open [start, stop) index ranges
+    into a sorted array of non-overlapping ranges.
+
+    Ranges that are separated by no more than the specified gap are merged
+    together.
+    """
+    ranges = np.vstack([np.reshape(r, (-1, 2)) for r in ranges] +
+                       [np.empty((0, 2), dtype=int)]).astype(int)
+    ranges = ranges[ranges[:, 1] > ranges[:, 0]]
+    if len(ranges) == 0:
+        return ranges
+    ranges = ranges[np.argsort(ranges[:, 0], kind='mergesort')]
+    stops = np.maximum.accumulate(ranges[:, 1])
+    is_new = np.concatenate(([True], ranges[1:, 0] > stops[:-1] + gap))
+    return np.column_stack((ranges[is_new, 0],
+                            np.maximum.reduceat(ranges[:, 1],
+                                                np.flatnonzero(is_new))))
+
+
+def ranges_to_indexes(ranges):
+    """
+    Expand a 2D array of half-open [start, stop) index ranges into a 1D
+    array of indexes.
+    """
+    ranges = np.reshape(ranges, (-1, 2)).astype(int)
+    lengths = ranges[:, 1] - ranges[:, 0]
+    if np.sum(lengths) == 0:
+        return np.array([], dtype=int)
+    return (np.repeat(ranges[:, 0] - np.cumsum(lengths) + lengths, lengths) +
+            np.arange(np.sum(lengths)))
+
+
+def count_ranges_indexes(ranges):
+    """Return the total number of indexes in the specified index ranges."""
+    ranges = np.reshape(ranges, (-1, 2))
+    return int(np.sum(ranges[:, 1] - ranges[:, 0]))
+
+
+def find_ranges_in_rect(x, y, xmin, xmax, ymin, ymax, x_is_sorted=True):
+    """
+    Return the half-open [start, stop) index ranges of the points whose
+    coordinates are within the specified rectangle.
+
+    When x is sorted in ascending order, the bounds of the rectangle along
+    the x-axis are located with a binary search and the y values are only
+    tested within the resulting slice.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if x_is_sorted:
+        i0 = np.searchsorted(x, xmin, side='left')
+        i1 = np.searchsorted(x, xmax, side='right')
+        yslice = y[i0:i1]
+        return mask_to_ranges((yslice >= ymin) & (yslice <= ymax), i0)
     else:
-        list_ = arr.tolist()
-    return list_
+        return mask_to_ranges(
+            (x >= xmin) & (x <= xmax) & (y >= ymin) & (y <= ymax))
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""
+A reusable layer to execute long computations in a worker that lives in a
+QThread, so that the GUI stays responsive.
+"""
+
+# ---- Standard library imports
+from collections import OrderedDict
+import traceback
+import uuid
+
+# ---- Third party imports
+from PyQt5.QtCore import QObject, QThread
+from PyQt5.QtCore import pyqtSignal as QSignal
+
+
+class TaskCancelledError(Exception):
+    """Raised by a worker when the task it is executing is cancelled."""
+    pass
+
+
+class WorkerBase(QObject):
+    """
+    A worker that executes the tasks that were queued by a TaskManagerBase
+    in a thread.
+
+    The tasks are executed by calling the method of the worker with the
+    same name as the task, but prefixed with an underscore.
+    """
+    sig_task_completed = QSignal(object, object)
+    sig_task_failed = QSignal(object, object)
+    sig_task_progress = QSignal(object, float)
+
+    def __init__(self):
+        super().__init__()
+        self._tasks = OrderedDict()
+        self._current_task_uuid4 = None
+        self._cancel_requested = set()
+
+    def add_task(self, task_uuid4, task, *args, **kargs):
+        """Add a task to the stack of tasks to execute in the worker."""
+        self._tasks[task_uuid4] = (task, args, kargs)
+
+    def cancel_task(self, task_uuid4):
+        """
+        Request the cancellation of the task corresponding to the
+        specified task_uuid4.
+        """
+        self._cancel_requested.add(task_uuid4)
+
+    def is_cancel_requested(self):
+        """Return whether the cancellation of the current task is requested."""
+        return self._current_task_uuid4 in self._cancel_requested
+
+    def check_cancel_requested(self):
+        """
+        Raise a TaskCancelledError if the cancellation of the current task
+        was requested. This is meant to be called periodically by the
+        methods that execute the tasks.
+        """
+        if self.is_cancel_requested():
+            raise TaskCancelledError
+
+    def emit_progress(self, progress):
+        """Emit the progress, in percent, of the current task."""
+        self.sig_task_progress.emit(self._current_task_uuid4, progress)
+
+    def run_tasks(self):
+        """
+        Execute the tasks that were added to the stack.
+
+        The exceptions raised by a task are sent with sig_task_failed and
+        do not prevent the execution of the other tasks.
+        """
+        try:
+            while self._tasks:
+                task_uuid4, (task, args, kargs) = self._tasks.popitem(
+                    last=False)
+                self._current_task_uuid4 = task_uuid4
+                task_error = None
+                try:
+                    if task_uuid4 in self._cancel_requested:
+                        raise TaskCancelledError
+                    returned_values = getattr(self, '_' + task)(
+                        *args, **kargs)
+                except TaskCancelledError:
+                    returned_values = TaskCancelledError
+                except Exception as error:
+                    task_error = error
+                finally:
+                    self._cancel_requested.discard(task_uuid4)
+                    self._current_task_uuid4 = None
+                if task_error is not None:
+                    self.sig_task_failed.emit(task_uuid4, task_error)
+                else:
+                    self.sig_task_completed.emit(task_uuid4, returned_values)
+        finally:
+            self._tasks.clear()
+            self.thread().quit()
+
+
+class TaskManagerBase(QObject):
+    """
+    A manager that queues tasks and executes them in a worker living in
+    a QThread.
+
+    Repeated requests for the same task are coalesced. A task that is
+    added while a previous request for the same task is still queued
+    replaces it, and a previous request that is already running is
+    cancelled. Callbacks are not called for the tasks that were replaced
+    or cancelled.
+
+    The exceptions raised by a task in the worker are passed to the error
+    callback of the task, or are printed if it has none.
+    """
+    sig_run_tasks_finished = QSignal()
+    sig_task_progress = QSignal(str, float)
+
+    def __init__(self):
+        super().__init__()
+        self._worker = None
+        self._thread = None
+
+        self._task_callbacks = {}
+        self._task_error_callbacks = {}
+        self._task_names = {}
+        self._queued_tasks = OrderedDict()
+        self._running_tasks = []
+
+    @property
+    def worker(self):
+        """Return the worker used to execute the tasks."""
+        return self._worker
+
+    def set_worker(self, worker):
+        """Install the provided worker on this manager."""
+        self._thread = QThread()
+        self._worker = worker
+        self._worker.moveToThread(self._thread)
+        self._worker.sig_task_completed.connect(self._handle_task_completed)
+        self._worker.sig_task_failed.connect(self._handle_task_failed)
+        self._worker.sig_task_progress.connect(self._handle_task_progress)
+        self._thread.started.connect(self._worker.run_tasks)
+        self._thread.finished.connect(self._handle_thread_finished)
+
+    def is_running(self):
+        """Return whether tasks are running or queued."""
+        return bool(self._running_tasks) or bool(self._queued_tasks)
+
+    def add_task(self, task, callback, *args, error_callback=None, **kargs):
+        """
+        Queue a task and run it in the worker as soon as the worker is
+        available. The callback is called in the main thread with the
+        values returned by the task once it is completed, and the error
+        callback is called with the exception raised by the task if it
+        failed.
+        """
+        for task_uuid4, name in list(self._task_names.items()):
+            if name == task:
+                self._cancel(task_uuid4)
+
+        task_uuid4 = uuid.uuid4()
+        self._task_callbacks[task_uuid4] = callback
+        self._task_error_callbacks[task_uuid4] = error_callback
+        self._task_names[task_uuid4] = task
+        self._queued_tasks[task_uuid4] = (task, args, kargs)
+        self._run_tasks()
+        return task_uuid4
+
+    def wait(self):
+        """Block until the worker's thread has finished executing tasks."""
+        if self._thread is not None:
+            self._thread.wait()
+
+    def cancel_tasks(self, task=None):
+        """
+        Cancel the queued and running tasks with the specified name, or all
+        of them if no name is provided.
+        """
+        for task_uuid4, name in list(self._task_names.items()):
+            if task is None or name == task:
+                self._cancel(task_uuid4)
+
+    def _cancel(self, task_uuid4):
+        """Cancel the task corresponding to the specified task_uuid4."""
+        self._task_callbacks[task_uuid4] = None
+        self._task_error_callbacks[task_uuid4] = None
+        if task_uuid4 in self._queued_tasks:
+            del self._queued_tasks[task_uuid4]
+            del self._task_callbacks[task_uuid4]
+            del self._task_error_callbacks[task_uuid4]
+            del self._task_names[task_uuid4]
+        else:
+            self._worker.cancel_task(task_uuid4)
+
+    def _run_tasks(self):
+        """Send the queued tasks to the worker and start the thread."""
+        if self._running_tasks or not self._queued_tasks:
+            return
+        for task_uuid4, (task, args, kargs) in self._queued_tasks.items():
+            self._worker.add_task(task_uuid4, task, *args, **kargs)
+            self._running_tasks.append(task_uuid4)
+        self._queued_tasks = OrderedDict()
+        self._thread.start()
+
+    def _handle_task_completed(self, task_uuid4, returned_values):
+        """Handle when a task has been completed by the worker."""
+        callback = self._task_callbacks.pop(task_uuid4, None)
+        self._task_error_callbacks.pop(task_uuid4, None)
+        self._task_names.pop(task_uuid4, None)
+        if (callback is not None and
+                returned_values is not TaskCancelledError):
+            if not isinstance(returned_values, tuple):
+                returned_values = (returned_values,)
+            callback(*returned_values)
+
+    def _handle_task_failed(self, task_uuid4, error):
+        """Handle when a task raised an exception in the worker."""
+        self._task_callbacks.pop(task_uuid4, None)
+        self._task_names.pop(task_uuid4, None)
+        # Tasks that were cancelled or replaced have no error callback,
+        # but their errors are still printed.
+        error_callback = self._task_error_callbacks.pop(task_uuid4, None)
+        if error_callback is not None:
+            error_callback(error)
+        else:
+            traceback.print_exception(
+                type(error), error, error.__traceback__)
+
+    def _handle_task_progress(self, task_uuid4, progress):
+        """Handle when the progress of a task is updated by the worker."""
+        if self._task_callbacks.get(task_uuid4) is not None:
+            self.sig_task_progress.emit(
+                self._task_names[task_uuid4], progress)
+
+    def _handle_thread_finished(self):
+        """Handle when the worker's thread has finished running tasks."""
+        self._running_tasks = []
+        if self._queued_tasks:
+            self._run_tasks()
+        else:
+            self.sig_run_tasks_finished.emit()
@@ -10,10 +10,15 @@
 import os
 
 # ---- Third party imports
+import numpy as np
+import pandas as pd
 import pytest
+from xlrd.xldate import xldate_as_datetime
 
 # ---- Local imports
-from gwhat.utils.dates import qdate_from_xldate
+from gwhat.utils.dates import (
+    qdate_from_xldate, xldates_to_datetime64, datetime64_to_xldates,
+    datetime64_to_isostrings, isostrings_to_datetime64, format_time_data)
 
 
 # ---- Tests
@@ -29,5 +34,73 @@ def test_qdate_from_xldate():
         assert qdate.year() == 2017
 
 
+@pytest.mark.parametrize("datemode", [0, 1])
+def test_xldates_to_datetime64(datemode):
+    """
+    Assert that the vectorized conversion of Excel numeric dates to
+    datetime64 is giving the same results as xlrd, including for the
+    dates that are affected by the Excel 1900 leap year bug.
+    """
+    xldates = np.array([1, 59, 59.5, 60, 61, 61.25, 4000.123456789,
+                        43000.87, 43000.999999999])
+    expected = pd.to_datetime(
+        [xldate_as_datetime(xldate, datemode) for xldate in xldates]).values
+    datetimes = xldates_to_datetime64(xldates, datemode)
+    assert np.all(datetimes == expected)
+
+    # Assert that non-finite values are converted to NaT.
+    datetimes = xldates_to_datetime64([np.nan, np.inf, 43000], datemode)
+    assert np.all(np.isnat(datetimes[:2]))
+    assert not np.isnat(datetimes[2])
+
+
+def test_datetime64_to_xldates():
+    """
+    Assert that the conversion of datetime64 to Excel numeric dates is
+    working as expected.
+    """
+    datetimes = np.array(['1900-02-28', '1900-03-01', '2017-09-22T20:52:48',
+                          'NaT'], dtype='datetime64[ns]')
+    xldates = datetime64_to_xldates(datetimes)
+    assert np.allclose(xldates[:3], [59, 61, 43000.87])
+    assert np.isnan(xldates[3])
+
+    xldates = np.array([61, 4000.5, 43000.87])
+    assert np.allclose(
+        datetime64_to_xldates(xldates_to_datetime64(xldates)), xldates)
+
+
+def test_isostrings():
+    """
+    Assert that the conversion of datetime64 to and from ISO date strings
+    is working as expected.
+    """
+    datetimes = xldates_to_datetime64([43000.87, 43001.5])
+    isostrings = datetime64_to_isostrings(datetimes)
+    assert isostrings.tolist() == ['2017-09-22T20:52:48',
+                                   '2017-09-23T12:00:00']
+    assert np.all(isostrings_to_datetime64(isostrings) == datetimes)
+
+    # Strings saved in a hdf5 file may be returned as bytes.
+    assert np.all(isostrings_to_datetime64(
+        np.array([b'2017-09-22T20:52:48'], dtype=object)) == datetimes[0])
+
+    # Strings that are not strictly in ISO format are parsed with pandas.
+    assert np.all(isostrings_to_datetime64(['09/22/2017 20:52:48']) ==
+                  datetimes[0])
+
+
+def test_format_time_data():
+    """
+    Assert that time data stored either as Excel numeric dates or as
+    strings are formatted correctly to a datetime index.
+    """
+    expected = pd.DatetimeIndex(['2017-09-22 20:52:48'])
+    for timedata in [np.array([43000.87]),
+                     np.array(['43000.87'], dtype=object),
+                     np.array(['2017-09-22 20:52:48'], dtype=object)]:
+        assert format_time_data(timedata).equals(expected)
+
+
 if __name__ == "__main__":
     pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
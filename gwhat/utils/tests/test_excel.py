@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+import os
+import os.path as osp
+import zipfile
+
+# ---- Third party imports
+import numpy as np
+import pytest
+
+# ---- Local imports
+from gwhat.common.utils import save_content_to_excel
+from gwhat.utils.excel import (
+    open_excel_sheet, iter_excel_rows, read_excel_column, ExcelDataReader,
+    _XlsxSheetStream)
+
+
+# ---- Tests
+@pytest.mark.parametrize("ext", ['.xls', '.xlsx'])
+def test_read_excel_column(tmpdir, ext):
+    """
+    Assert that the columns of an Excel sheet are read correctly as
+    numerical arrays when possible.
+    """
+    filename = osp.join(str(tmpdir), 'excel_datafile' + ext)
+    save_content_to_excel(filename, [
+        ['Name', 'Test'],
+        ['Date', 'Value', 'Note', 'Empty'],
+        [41241.5, 1.5, 'a'],
+        [41242.5, '', 'b'],
+        [41243.5, 3, 'c']])
+
+    book, sheet = open_excel_sheet(filename)
+    rows = iter_excel_rows(sheet)
+    assert next(rows)[:2] == ['Name', 'Test']
+    assert next(rows) == ['Date', 'Value', 'Note', 'Empty']
+
+    column = read_excel_column(sheet, 0, start_rowx=2)
+    assert column.dtype == 'float64'
+    assert column.tolist() == [41241.5, 41242.5, 41243.5]
+
+    column = read_excel_column(sheet, 1, start_rowx=2)
+    assert column.dtype == 'float64'
+    assert np.allclose(column, [1.5, np.nan, 3], equal_nan=True)
+
+    column = read_excel_column(sheet, 2, start_rowx=2)
+    assert column.dtype == 'object'
+    assert column.tolist() == ['a', 'b', 'c']
+    book.release_resources()
+
+
+@pytest.mark.parametrize("ext", ['.xls', '.xlsx'])
+def test_excel_data_reader(tmpdir, ext, monkeypatch):
+    """
+    Assert that ExcelDataReader reads the rows of the header one by one and
+    then the data by columns, including when the xml of the sheet is parsed
+    in more than one block.
+    """
+    monkeypatch.setattr(_XlsxSheetStream, 'BLOCKSIZE', 256)
+    filename = osp.join(str(tmpdir), 'excel_datafile' + ext)
+    content = [['Name', 'Test'],
+               [],
+               ['Date', 'Value', 'Note', 'Empty']]
+    content += [[41241.5 + i, i if i % 3 else '', 'note %d' % i]
+                for i in range(100)]
+    save_content_to_excel(filename, content)
+
+    with ExcelDataReader(filename) as reader:
+        rows = []
+        for row in reader:
+            rows.append(row)
+            if row and row[0] == 'Date':
+                break
+        assert rows[0][:2] == ['Name', 'Test']
+        assert rows[-1] == ['Date', 'Value', 'Note', 'Empty']
+        assert len(rows) == 3
+
+        dates, values, notes, empty = reader.read_columns([0, 1, 2, 3])
+    assert dates.dtype == 'float64'
+    assert dates.tolist() == [41241.5 + i for i in range(100)]
+    assert values.dtype == 'float64'
+    assert np.allclose(values, [i if i % 3 else np.nan for i in range(100)],
+                       equal_nan=True)
+    assert notes.dtype == 'object'
+    assert notes.tolist() == ['note %d' % i for i in range(100)]
+    assert empty.dtype == 'float64'
+    assert np.all(np.isnan(empty))
+
+
+@pytest.mark.parametrize("blocksize", [256, 2**20])
+def test_xlsx_empty_cell_values(tmpdir, blocksize, monkeypatch):
+    """
+    Assert that the cells of a xlsx sheet whose value is empty, like the
+    formula cells saved without a cached value, are read as missing values.
+    """
+    monkeypatch.setattr(_XlsxSheetStream, 'BLOCKSIZE', blocksize)
+    filename = osp.join(str(tmpdir), 'excel_datafile.xlsx')
+    save_content_to_excel(filename, [
+        ['Date', 'Value'], ['=1+1', 1.5]] +
+        [[41241.5 + i, i] for i in range(1, 30)])
+
+    # Replace the value of some cells with an empty value as written by
+    # openpyxl for formula cells, or with blank text.
+    with zipfile.ZipFile(filename) as archive:
+        contents = {name: archive.read(name) for name in archive.namelist()}
+    sheetname = 'xl/worksheets/sheet1.xml'
+    xml = contents[sheetname].decode('utf8')
+    xml = xml.replace('<c r="A2"><f>1+1</f><v>0</v></c>',
+                      '<c r="A2"><f>1+1</f><v /></c>')
+    assert '<c r="A2"><f>1+1</f><v /></c>' in xml
+    xml = xml.replace('<c r="B5"><v>3</v></c>',
+                      '<c r="B5"><f>A5*2</f><v/></c>')
+    xml = xml.replace('<c r="B6"><v>4</v></c>', '<c r="B6"><v> </v></c>')
+    contents[sheetname] = xml.encode('utf8')
+    with zipfile.ZipFile(filename, 'w') as archive:
+        for name, content in contents.items():
+            archive.writestr(name, content)
+
+    with ExcelDataReader(filename) as reader:
+        assert next(iter(reader)) == ['Date', 'Value']
+        dates, values = reader.read_columns([0, 1])
+    assert dates.dtype == 'float64'
+    assert np.isnan(dates[0])
+    assert dates[1:].tolist() == [41241.5 + i for i in range(1, 30)]
+    assert values.dtype == 'float64'
+    expected = [1.5] + list(range(1, 30))
+    expected[3] = expected[4] = np.nan
+    assert np.allclose(values, expected, equal_nan=True)
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
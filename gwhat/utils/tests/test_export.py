@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+import os
+import os.path as osp
+
+# ---- Third party imports
+import numpy as np
+import pytest
+import xlrd
+
+# ---- Local imports
+from gwhat.common.utils import (
+    EXCEL_LIMITS, save_columns_to_file, save_content_to_excel,
+    save_content_to_file)
+from gwhat.utils.excel import ExcelDataReader
+from gwhat.utils.math import nan_as_text_tolist
+
+HEADER = [['Station Name', 'Test, with a comma'],
+          [],
+          ['Time', 'Value', 'Note']]
+
+
+# ---- Pytest Fixtures
+@pytest.fixture
+def columns():
+    values = np.round(np.random.rand(25) * 100, 3)
+    values[[1, 7, 8, 24]] = np.nan
+    notes = np.array(['note %d' % i for i in range(25)], dtype=object)
+    notes[3] = 'a "quoted", note'
+    notes[4] = None
+    return [np.arange(25) + 41241.5, values, notes]
+
+
+# ---- Tests
+@pytest.mark.parametrize("ext", ['.csv', '.tsv'])
+def test_save_columns_to_csv(tmpdir, columns, ext):
+    """
+    Assert that the columns saved by chunks to a csv or tsv file are
+    identical to the content saved row by row with the csv module.
+    """
+    filename = osp.join(str(tmpdir), 'columns' + ext)
+    save_columns_to_file(filename, HEADER, columns, chunksize=10)
+
+    expected_filename = osp.join(str(tmpdir), 'expected' + ext)
+    content = [list(row) for row in zip(*[c.tolist() for c in columns])]
+    for row in content:
+        row[1] = 'nan' if np.isnan(row[1]) else row[1]
+    save_content_to_file(expected_filename, HEADER + content)
+
+    with open(filename, encoding='utf8') as f:
+        text = f.read()
+    with open(expected_filename, encoding='utf8') as f:
+        assert text == f.read()
+
+
+@pytest.mark.parametrize("ext", ['.xls', '.xlsx'])
+def test_save_columns_to_excel(tmpdir, columns, ext):
+    """
+    Assert that the columns saved by chunks to an Excel file are read back
+    correctly.
+    """
+    filename = osp.join(str(tmpdir), 'columns' + ext)
+    save_columns_to_file(filename, HEADER, columns[:2], chunksize=10)
+
+    with ExcelDataReader(filename) as reader:
+        rows = []
+        for row in reader:
+            rows.append(row)
+            if row and row[0] == 'Time':
+                break
+        assert rows[0][:2] == HEADER[0]
+        times, values = reader.read_columns([0, 1])
+    assert times.tolist() == columns[0].tolist()
+    # The nan values are saved as empty cells.
+    assert values.dtype == 'float64'
+    assert np.allclose(values, columns[1], equal_nan=True)
+
+
+@pytest.mark.parametrize("ext", ['.xls', '.xlsx'])
+def test_save_columns_to_excel_sheets(tmpdir, columns, ext, monkeypatch):
+    """
+    Assert that the data are split in several sheets, each starting with
+    the header, when they exceed the number of rows of a sheet.
+    """
+    monkeypatch.setitem(EXCEL_LIMITS, ext, (13, 256))
+    filename = osp.join(str(tmpdir), 'columns' + ext)
+    save_columns_to_file(filename, HEADER, columns[:2], chunksize=4)
+
+    book = xlrd.open_workbook(filename)
+    assert book.sheet_names() == ['Data', 'Data (2)', 'Data (3)']
+    times = []
+    for sheet in book.sheets():
+        assert sheet.row_values(2)[:2] == ['Time', 'Value']
+        times.extend(sheet.col_values(0, start_rowx=3))
+    assert times == columns[0].tolist()
+    assert book.sheets()[-1].nrows == 3 + 5
+
+    # The content can't exceed the number of columns of a sheet.
+    with pytest.raises(ValueError):
+        save_columns_to_file(filename, HEADER, [columns[0]] * 257)
+
+
+@pytest.mark.parametrize("ext", ['.xls', '.xlsx'])
+def test_save_content_to_excel(tmpdir, ext):
+    """
+    Assert that the float nan of a content saved to an Excel file are saved
+    as empty cells.
+    """
+    filename = osp.join(str(tmpdir), 'content' + ext)
+    save_content_to_excel(filename, [
+        ['Time', 'Value'], [1, 1.5], [2, np.nan], [3, 'nan']])
+
+    book = xlrd.open_workbook(filename)
+    sheet = book.sheet_by_index(0)
+    assert sheet.col_values(1) == ['Value', 1.5, '', 'nan']
+
+
+def test_nan_as_text_tolist():
+    """Assert that nan values are converted to text in the list."""
+    assert nan_as_text_tolist(np.array([[1.5, np.nan], [np.nan, 3]])) == [
+        [1.5, 'nan'], ['nan', 3.0]]
+    assert nan_as_text_tolist(np.array([[1.5, 2]])) == [[1.5, 2.0]]
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+import os
+import os.path as osp
+
+# ---- Third party imports
+import numpy as np
+import pytest
+
+# ---- Local imports
+from gwhat.utils.filecache import ParsedFileCache
+
+
+# ---- Fixtures
+@pytest.fixture
+def cache(tmpdir):
+    return ParsedFileCache(osp.join(str(tmpdir), 'cache'))
+
+
+@pytest.fixture
+def datafile(tmpdir):
+    filename = osp.join(str(tmpdir), 'datafile.csv')
+    with open(filename, 'w') as f:
+        f.write('Time,WL\n2000-01-01,1.5\n')
+    return filename
+
+
+# ---- Tests
+def test_cache_get_put(cache, datafile):
+    """
+    Assert that the arrays and attributes stored in the cache are returned
+    as long as the datafile and the parser version do not change.
+    """
+    assert cache.get(datafile, '1') is None
+
+    arrays = {'Time': np.array(['2000-01-01'], dtype='datetime64[ns]'),
+              'data/WL': np.array([1.5])}
+    attrs = {'Well': 'test', 'Latitude': np.float64(45.5).item()}
+    cache.put(datafile, '1', arrays, attrs)
+    assert len(cache) == 1
+
+    cached_arrays, cached_attrs = cache.get(datafile, '1')
+    assert cached_attrs == attrs
+    assert sorted(cached_arrays.keys()) == ['Time', 'data/WL']
+    assert cached_arrays['Time'].dtype == 'datetime64[ns]'
+    assert np.array_equal(cached_arrays['Time'], arrays['Time'])
+    assert np.array_equal(cached_arrays['data/WL'], arrays['data/WL'])
+
+    # The entry is not valid for another version of the parser.
+    assert cache.get(datafile, '2') is None
+
+    # The entry is not valid anymore when the content of the datafile
+    # changes.
+    with open(datafile, 'a') as f:
+        f.write('2000-01-02,1.6\n')
+    assert cache.get(datafile, '1') is None
+
+
+def test_cache_depends(cache, datafile, tmpdir):
+    """
+    Assert that the entries of the cache are invalidated when a file on
+    which the parsed data depend is created or changed.
+    """
+    logfile = osp.join(str(tmpdir), 'datafile.log')
+    cache.put(datafile, '1', {'WL': np.array([1.5])}, {}, depends=[logfile])
+    assert cache.get(datafile, '1', depends=[logfile]) is not None
+
+    with open(logfile, 'w') as f:
+        f.write('log')
+    assert cache.get(datafile, '1', depends=[logfile]) is None
+
+
+def test_cache_lru_eviction(cache, tmpdir):
+    """
+    Assert that the least recently used entries are evicted when the size
+    of the cache exceeds its maximum size.
+    """
+    filenames = []
+    for i in range(3):
+        filename = osp.join(str(tmpdir), 'datafile{}.csv'.format(i))
+        with open(filename, 'w') as f:
+            f.write(str(i))
+        filenames.append(filename)
+        cache.put(filename, '1', {'WL': np.random.rand(1000)}, {})
+        # Make sure the entries have distinct access times.
+        entry = cache._get_entry_path(filename, '1')
+        os.utime(entry, (1000 + i, 1000 + i))
+    entry_size = cache.size // 3
+
+    # Use the first entry, so that the second is now the least recently
+    # used, and add a new entry in a cache that can hold only three entries.
+    assert cache.get(filenames[0], '1') is not None
+    cache.max_size = 3 * entry_size
+    filename = osp.join(str(tmpdir), 'datafile3.csv')
+    with open(filename, 'w') as f:
+        f.write('3')
+    cache.put(filename, '1', {'WL': np.random.rand(1000)}, {})
+
+    assert len(cache) == 3
+    assert cache.get(filenames[1], '1') is None
+    assert cache.get(filenames[0], '1') is not None
+    assert cache.get(filenames[2], '1') is not None
+    assert cache.get(filename, '1') is not None
+
+
+def test_cache_corrupted_entry(cache, datafile):
+    """Assert that corrupted entries are removed from the cache."""
+    cache.put(datafile, '1', {'WL': np.array([1.5])}, {})
+    with open(cache._get_entry_path(datafile, '1'), 'wb') as f:
+        f.write(b'corrupted')
+    assert cache.get(datafile, '1') is None
+    assert len(cache) == 0
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
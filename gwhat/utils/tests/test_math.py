@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+import os
+
+# ---- Third party imports
+import numpy as np
+import pytest
+
+# ---- Local imports
+from gwhat.utils.math import (
+    mask_to_ranges, merge_ranges, ranges_to_indexes, count_ranges_indexes,
+    find_ranges_in_rect)
+
+
+# ---- Tests
+def test_index_ranges():
+    """
+    Assert that the functions to convert, merge and expand index ranges
+    are working as expected.
+    """
+    mask = np.array([0, 1, 1, 0, 1, 0, 0, 1, 1, 1], dtype=bool)
+    ranges = mask_to_ranges(mask, offset=5)
+    assert ranges.tolist() == [[6, 8], [9, 10], [12, 15]]
+    assert count_ranges_indexes(ranges) == 6
+    assert np.array_equal(ranges_to_indexes(ranges), np.flatnonzero(mask) + 5)
+
+    merged = merge_ranges(ranges, [[0, 7], [20, 22], [14, 16], [3, 3]])
+    assert merged.tolist() == [[0, 8], [9, 10], [12, 16], [20, 22]]
+
+    assert merge_ranges().shape == (0, 2)
+    assert len(ranges_to_indexes(np.empty((0, 2)))) == 0
+
+
+def test_find_ranges_in_rect():
+    """
+    Assert that the points selected with a binary search on a sorted
+    x-axis are the same as those selected by scanning the whole data.
+    """
+    x = np.arange(1000, dtype=float)
+    y = np.sin(x / 10)
+    y[::7] = np.nan
+    expected = np.where((x >= 100.5) & (x <= 300) & (y >= -0.5) & (y <= 0.2))
+
+    for x_is_sorted in (True, False):
+        ranges = find_ranges_in_rect(
+            x, y, 100.5, 300, -0.5, 0.2, x_is_sorted=x_is_sorted)
+        assert np.array_equal(ranges_to_indexes(ranges), expected[0])
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+import os
+import time
+
+# ---- Third party imports
+import pytest
+
+# ---- Local imports
+from gwhat.utils.taskmanagers import WorkerBase, TaskManagerBase
+
+
+class SleepWorker(WorkerBase):
+    def _sleep(self, value, niter=10):
+        for i in range(niter):
+            self.check_cancel_requested()
+            self.emit_progress((i + 1) / niter * 100)
+            time.sleep(0.01)
+        return value, value * 2
+
+    def _fail(self, message):
+        raise ValueError(message)
+
+
+@pytest.fixture
+def task_manager(qtbot):
+    task_manager = TaskManagerBase()
+    task_manager.set_worker(SleepWorker())
+    yield task_manager
+    task_manager._thread.quit()
+    task_manager._thread.wait()
+
+
+# ---- Tests
+def test_run_task(task_manager, qtbot):
+    """
+    Assert that a task is executed in the worker and that its callback is
+    called with the returned values.
+    """
+    results = []
+    with qtbot.waitSignal(task_manager.sig_run_tasks_finished):
+        task_manager.add_task(
+            'sleep', lambda *values: results.append(values), 3)
+        assert task_manager.is_running()
+    assert results == [(3, 6)]
+    assert not task_manager.is_running()
+
+
+def test_coalesce_and_cancel_tasks(task_manager, qtbot):
+    """
+    Assert that repeated requests for the same task are coalesced so that
+    only the last one calls its callback, and that cancelled tasks do not
+    call their callback.
+    """
+    results = []
+    with qtbot.waitSignal(task_manager.sig_run_tasks_finished):
+        for value in range(3):
+            task_manager.add_task(
+                'sleep', lambda *values: results.append(values), value)
+    assert results == [(2, 4)]
+
+    results = []
+    with qtbot.waitSignal(task_manager.sig_run_tasks_finished):
+        task_manager.add_task(
+            'sleep', lambda *values: results.append(values), 1, niter=100)
+        task_manager.cancel_tasks()
+    assert results == []
+
+
+def test_failed_task(task_manager, qtbot, capsys):
+    """
+    Assert that an exception raised by a task is passed to its error
+    callback, or printed if it has none, and that the manager can run other
+    tasks afterwards.
+    """
+    errors = []
+    results = []
+    with qtbot.waitSignal(task_manager.sig_run_tasks_finished):
+        task_manager.add_task(
+            'fail', lambda: results.append('fail'), 'Task failed.',
+            error_callback=errors.append)
+        task_manager.add_task(
+            'sleep', lambda *values: results.append(values), 3)
+    assert len(errors) == 1
+    assert isinstance(errors[0], ValueError)
+    assert results == [(3, 6)]
+    assert not task_manager.is_running()
+
+    with qtbot.waitSignal(task_manager.sig_run_tasks_finished):
+        task_manager.add_task('fail', None, 'No error callback.')
+    assert 'ValueError: No error callback.' in capsys.readouterr().err
+    assert not task_manager.is_running()
+
+    with qtbot.waitSignal(task_manager.sig_run_tasks_finished):
+        task_manager.add_task(
+            'sleep', lambda *values: results.append(values), 4)
+    assert results == [(3, 6), (4, 8)]
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])